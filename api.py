@@ -0,0 +1,83 @@
+"""
+HTTP scoring service: ATSPipeline.process_candidate behind an async API.
+
+    uvicorn api:app --host 0.0.0.0 --port 8000
+
+Concurrent /score requests are grouped by a MicroBatcher, so the embedder
+and NER model see batches rather than one text at a time. Run a single
+worker process: every worker loads its own copy of the models, and
+batching works best when all requests share one queue.
+
+Settings (env): SCORE_MAX_BATCH, SCORE_MAX_WAIT_MS, SCORE_MAX_QUEUE,
+SCORE_MAX_TEXT_CHARS, SKILL_EXTRACTION_MODE, NER_MODEL_PATH,
+ATS_TRACING / ATS_TRACING_MEMORY (per-stage metrics on /metrics).
+"""
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+
+from src.core.main_pipeline import ATSPipeline
+from src.services.micro_batcher import MicroBatcher, Overloaded
+from src.utils.tracing import tracer
+
+MAX_TEXT_CHARS = int(os.getenv("SCORE_MAX_TEXT_CHARS", 200_000))
+
+
+class ScoreRequest(BaseModel):
+    resume_text: str
+    jd_text: str
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Models load once, before the first request is accepted
+    pipeline = ATSPipeline(
+        model_path=os.getenv("NER_MODEL_PATH", "./output/model-last"),
+        skill_mode=os.getenv("SKILL_EXTRACTION_MODE", "ner"),
+    )
+    app.state.batcher = MicroBatcher(
+        pipeline.process_pairs,
+        max_batch_size=int(os.getenv("SCORE_MAX_BATCH", 32)),
+        max_wait_ms=float(os.getenv("SCORE_MAX_WAIT_MS", 10)),
+        max_queue=int(os.getenv("SCORE_MAX_QUEUE", 256)),
+    )
+    app.state.batcher.start()
+    yield
+    await app.state.batcher.stop()
+
+
+app = FastAPI(title="ATS Resume Ranker", lifespan=lifespan)
+
+
+@app.post("/score")
+async def score(request: ScoreRequest):
+    """Same output as ATSPipeline.process_candidate(resume_text, jd_text)."""
+    for name, text in (("resume_text", request.resume_text), ("jd_text", request.jd_text)):
+        if not text.strip():
+            raise HTTPException(status_code=422, detail=f"{name} is empty")
+        if len(text) > MAX_TEXT_CHARS:
+            raise HTTPException(status_code=413, detail=f"{name} is over {MAX_TEXT_CHARS} characters")
+    try:
+        return await app.state.batcher.submit((request.resume_text, request.jd_text))
+    except Overloaded as e:
+        raise HTTPException(status_code=503, detail=f"Overloaded: {e}", headers={"Retry-After": "1"})
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+@app.get("/stats")
+async def stats():
+    """Micro-batcher counters: queue depth, batches run, mean batch size, rejections."""
+    return app.state.batcher.stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Per-stage time and memory totals, Prometheus text format (empty unless ATS_TRACING=1)."""
+    return tracer.prometheus_text()
@@ -1,14 +1,14 @@
 import streamlit as st
 import os
 import pandas as pd
-import json
-from huggingface_hub import hf_hub_download, HfApi
-from src.utils.parser import ResumeParser
-from src.core.ranker import CompositeRanker
-from src.services.gemini_api import GeminiService
-from src.services.extractor import LocalSkillExtractor
-from src.services.coach_engine import ResumeCoach
+import uuid
+import threading
+from src.core.model_registry import registry
+from src.services.usage_store import UsageStore, HfDatasetHub, LocalHub
+from src.utils.tracing import tracer
 from src.utils.report_gen import generate_pdf_report, generate_chat_txt
+# Heavy stacks (torch, spaCy, chromadb, llama_index) are imported inside the
+# loaders below so the first page renders before any model is touched.
 
 # --- BRIDGE HF OAUTH TO STREAMLIT ---
 if "OAUTH_CLIENT_ID" in os.environ:
@@ -24,6 +24,7 @@ if "OAUTH_CLIENT_ID" in os.environ:
 # --- 0. CONFIGURATION & DATABASE HELPERS ---
 REPO_ID = "meeralizjoy/ats-usage-logs"  # 👈 UPDATE THIS to your repo name
 FILE_NAME = "usage.json"
+SCAN_LIMIT = 2
 
 try:
     HF_TOKEN = st.secrets["HF_TOKEN"]
@@ -31,32 +32,34 @@ except Exception:
     HF_TOKEN = os.getenv("HF_TOKEN") # Fallback to environment variable
 
 if not HF_TOKEN:
-    st.warning("⚠️ HF_TOKEN not found in Secrets. Usage tracking will be disabled.")
-    api = None
-else:
-    api = HfApi(token=HF_TOKEN)
-
-def load_usage_data():
-    try:
-        # Download the usage file from your private dataset
-        path = hf_hub_download(repo_id=REPO_ID, filename=FILE_NAME, repo_type="dataset", token=HF_TOKEN)
-        with open(path, "r") as f:
-            return json.load(f)
-    except Exception:
-        return {}  # Return empty if file doesn't exist yet
-
-def save_usage_data(data):
-    with open("usage.json", "w") as f:
-        json.dump(data, f)
-    api.upload_file(
-        path_or_fileobj="usage.json",
-        path_in_repo=FILE_NAME,
-        repo_id=REPO_ID,
-        repo_type="dataset"
+    st.warning("⚠️ HF_TOKEN not found in Secrets. Usage is only tracked on this machine.")
+
+@st.cache_resource
+def load_usage_store():
+    """
+    Scan counts live in a local SQLite file; the HF dataset copy is synced in
+    the background (every USAGE_SYNC_SECONDS) instead of on every rerun.
+    Without a token, a JSON file on disk stands in for the hub.
+    """
+    usage_dir = os.getenv("USAGE_DATA_DIR", "./usage_data")
+    hub = HfDatasetHub(REPO_ID, FILE_NAME, token=HF_TOKEN) if HF_TOKEN else LocalHub(os.path.join(usage_dir, FILE_NAME))
+    store = UsageStore(
+        os.path.join(usage_dir, "usage.sqlite"),
+        hub=hub,
+        cache_ttl=float(os.getenv("USAGE_CACHE_TTL", 5)),
+        sync_interval=float(os.getenv("USAGE_SYNC_SECONDS", 60)),
     )
+    store.start()
+    return store
+
+usage_store = load_usage_store()
 
 st.set_page_config(page_title="ATS AI Command Center", layout='wide')
 
+# Stage timings for the sidebar (ATS_TRACING=0 turns them off, ATS_TRACING_MEMORY=1 adds heap
+# peaks, which are only reliable while one session is ranking at a time)
+tracer.configure(enabled=os.getenv("ATS_TRACING", "1") == "1")
+
 # --- 1. INITIALIZE SESSION STATE ---
 if 'candidate_data' not in st.session_state:
     st.session_state.candidate_data = {}
@@ -65,32 +68,106 @@ if 'chat_history' not in st.session_state:
 if 'leaderboard' not in st.session_state:
     st.session_state.leaderboard = None
 
+if 'pending_index' not in st.session_state:
+    st.session_state.pending_index = None
+if 'last_run_trace' not in st.session_state:
+    st.session_state.last_run_trace = None
+if 'session_id' not in st.session_state:
+    # Scopes this browser session's coach collection
+    st.session_state.session_id = uuid.uuid4().hex
+
 @st.cache_resource
 def load_engines():
+    """Ranking stack: built on the first ranking click, shared by every session."""
+    from src.utils.parser import ResumeParser
+    from src.core.ranker import CompositeRanker
+    from src.services.extractor import LocalSkillExtractor
     return (
         ResumeParser(), 
         CompositeRanker(), 
-        GeminiService(), 
-        LocalSkillExtractor(model_path="./output/model-last", skills_json="skills_list.json"),
-        ResumeCoach() 
+        LocalSkillExtractor(
+            model_path="./output/model-last",
+            skills_json="skills_list.json",
+            mode=os.getenv("SKILL_EXTRACTION_MODE", "ner"),
+        ),
     )
 
-if 'engines_ready' not in st.session_state:
-    with st.spinner("🚀 Initializing AI Engines..."):
-        parser, ranker, gemini, extractor, coach = load_engines()
-        st.session_state.parser = parser
-        st.session_state.ranker = ranker
-        st.session_state.gemini = gemini
-        st.session_state.extractor = extractor
-        st.session_state.coach = coach
-        st.session_state.engines_ready = True
-else:
-    parser = st.session_state.parser
-    ranker = st.session_state.ranker
-    gemini = st.session_state.gemini
-    extractor = st.session_state.extractor
+@st.cache_resource(show_spinner=False)
+def load_coach():
+    """Coach stack (Chroma + LLM): built on a background thread once results show."""
+    from src.services.coach_engine import ResumeCoach
+    coach = ResumeCoach()
+    # Idle sessions' collections are dropped in the background
+    coach.start_sweeper(ttl_seconds=int(os.getenv("COACH_SESSION_TTL", 6 * 3600)))
+    return coach
+
+def get_engines():
+    if 'engines_ready' not in st.session_state:
+        with st.spinner("🚀 Initializing AI Engines..."):
+            st.session_state.parser, st.session_state.ranker, st.session_state.extractor = load_engines()
+            st.session_state.engines_ready = True
+    return st.session_state.parser, st.session_state.ranker, st.session_state.extractor
+
+def index_pending(coach, pending, session_id):
+    docs = [{"text": pending["jd"], "filename": "CURRENT_JD", "type": "job_description"}]
+    docs += [{"text": text, "filename": name, "type": "resume"} for name, text in pending["resumes"]]
+    with tracer.span("coach_index", docs=len(docs)):
+        coach.add_documents(docs, session_id=session_id)
+
+def start_coach_warm_up(target_filename):
+    """
+    Builds the coach, indexes the last ranking run and warms `target_filename`
+    on a daemon thread, so the results page never waits for Chroma or the
+    embedding model. The thread only touches the plain dict it is handed:
+    st.session_state isn't available off the script thread.
+    """
+    pending, session_id = st.session_state.pending_index, st.session_state.session_id
+    warm = {"coach": None, "indexed": None}
+
+    def run():
+        try:
+            warm["coach"] = coach = load_coach()
+            if pending:
+                index_pending(coach, pending, session_id)
+                warm["indexed"] = pending
+            coach.warm_up(target_filename, session_id=session_id)
+        except Exception as e:
+            print(f"Coach warm-up error: {e}")
+
+    warm["thread"] = threading.Thread(target=run, name="coach-start", daemon=True)
+    warm["thread"].start()
+    st.session_state.coach_warm_up = warm
+
+def collect_coach_warm_up(wait=False):
+    """Adopts a finished warm-up (waiting for it with `wait`). Returns True while one is still running."""
+    warm = st.session_state.get("coach_warm_up")
+    if warm is None:
+        return False
+    if warm["thread"].is_alive():
+        if not wait:
+            return True
+        with st.spinner("🧠 Starting the Career Coach..."):
+            warm["thread"].join()
+    del st.session_state.coach_warm_up
+    if warm["coach"] is not None:
+        st.session_state.coach = warm["coach"]
+    if warm["indexed"] is not None and warm["indexed"] is st.session_state.pending_index:
+        st.session_state.pending_index = None
+    return False
+
+def get_coach():
+    collect_coach_warm_up(wait=True)
+    if 'coach' not in st.session_state:
+        with st.spinner("🧠 Starting the Career Coach..."):
+            st.session_state.coach = load_coach()
     coach = st.session_state.coach
 
+    # Index whatever the last ranking run left for the coach (if the warm-up didn't)
+    if st.session_state.pending_index:
+        index_pending(coach, st.session_state.pending_index, st.session_state.session_id)
+        st.session_state.pending_index = None
+    return coach
+
 # --- 2. AUTHENTICATION LOGIC ---
 is_logged_in = st.user.get("is_logged_in", False)
 user_email = st.user.get("email") if is_logged_in else None
@@ -109,9 +186,8 @@ with st.sidebar:
     st.header("👤 Account Status")
     if is_logged_in:
         st.success(f"Welcome!")
-        usage_db = load_usage_data()
-        user_count = usage_db.get(user_email, 0)
-        st.write(f"**Lifetime Scans Used:** {user_count} / 2")
+        user_count = usage_store.get(user_email)
+        st.write(f"**Lifetime Scans Used:** {user_count} / {SCAN_LIMIT}")
         if st.button("Log out"):
             st.logout()
     else:
@@ -121,22 +197,67 @@ with st.sidebar:
     
     st.divider()
     st.header("⚙️ System Status")
-    try:
-        status = coach.get_status()
-        ollama_val = status.get('ollama', 'Not Found')
-        device_val = status.get('device', 'CPU')
-    except Exception:
-        ollama_val = "Cloud Mode (Gemini)"
+    coach_starting = collect_coach_warm_up()
+    if 'coach' not in st.session_state:
+        ollama_val = "⏳ Starting in the background" if coach_starting else "💤 Starts in the background after a ranking run"
         device_val = "CPU"
+    else:
+        try:
+            status = st.session_state.coach.get_status()
+            ollama_val = status.get('ollama', 'Not Found')
+            device_val = status.get('device', 'CPU')
+        except Exception:
+            ollama_val = "Cloud Mode (Gemini)"
+            device_val = "CPU"
     
     st.write(f"**Ollama:** {ollama_val}")
     st.write(f"**Hardware:** {device_val}")
-    
+
+    model_memory = registry.memory_report()
+    if model_memory:
+        with st.expander("🧠 Loaded Models"):
+            for row in model_memory:
+                st.write(f"`{row['model']}` — {row['rss_mb']:.0f} MB RSS, "
+                         f"{row['weights_mb']:.0f} MB weights, loaded in {row['load_seconds']:.1f}s")
+
+    cache_stats = st.session_state.ranker.embed_engine.cache_stats() if 'ranker' in st.session_state else {}
+    if cache_stats:
+        st.write(f"**Embedding Cache:** {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+                 f"(~{cache_stats['estimated_seconds_saved']:.1f}s saved)")
+    chunk_stats = st.session_state.ranker.embed_engine.chunk_stats() if 'ranker' in st.session_state else {}
+    if chunk_stats:
+        st.write(f"**Resume Chunks (last run):** {chunk_stats['reused']} reused / "
+                 f"{chunk_stats['recomputed']} re-encoded")
+
+    if st.session_state.last_run_trace:
+        with st.expander("⏱️ Last Ranking Run"):
+            for row in st.session_state.last_run_trace:
+                per_doc = f", {row['wall_s'] / row['docs'] * 1000:.0f} ms/candidate" if row['docs'] else ""
+                peak = f", peak +{row['peak_bytes'] / 2**20:.0f} MB" if row['peak_bytes'] is not None else ""
+                slowest = f", slowest `{row['slowest'][0]}` {row['slowest'][1]:.2f}s" if row['slowest'] else ""
+                cpu = "CPU" if row['slowest'] else "process CPU"  # per-document records carry their own CPU time
+                st.write(f"`{row['stage']}` — {row['wall_s']:.2f}s wall, {row['cpu_s']:.2f}s {cpu}"
+                         f"{per_doc}{slowest}{peak}")
+
+    if 'coach' in st.session_state:
+        with st.expander("🗄️ Coach Collections"):
+            for row in st.session_state.coach.collection_stats():
+                st.write(f"`{row['collection']}` — {row['chunks']} chunks, idle {row['idle_seconds'] / 60:.0f} min")
+
+        chat_metrics = st.session_state.coach.chat_metrics()
+        if chat_metrics:
+            last = chat_metrics[-1]
+            st.write(f"**Last Chat:** retrieval {last['retrieval_seconds']:.2f}s, "
+                     f"first token {last['ttft_seconds']:.2f}s, {last['tokens_per_second']:.1f} tok/s"
+                     f"{' (cached engine)' if last['engine_cached'] else ''}")
+
     if st.button("🗑️ Clear Local Database"):
-        if os.path.exists("./chroma_db"):
-            import shutil
-            shutil.rmtree("./chroma_db")
-            st.rerun()
+        # Only this session's documents: other users' collections are untouched
+        collect_coach_warm_up(wait=True)  # its indexing would land after the drop
+        if 'coach' in st.session_state:
+            st.session_state.coach.drop_session(st.session_state.session_id)
+        st.session_state.pending_index = None
+        st.rerun()
 
 # --- MAIN UI ---
 st.title("🏆 AI Recruitment Leaderboard")
@@ -148,35 +269,56 @@ uploaded_files = st.file_uploader("Upload Resumes (PDF)", type=['pdf'], accept_m
 if st.button("🚀 Rank All Resumes", type="primary", width="stretch"):
     if not is_logged_in:
         st.warning("Please log in to rank your resumes.")
-    elif user_count >= 2:
-        st.error("🚫 You have reached your lifetime limit of 2 scans.")
+    elif user_count >= SCAN_LIMIT:
+        st.error(f"🚫 You have reached your lifetime limit of {SCAN_LIMIT} scans.")
     elif jd_text and uploaded_files:
         results = []
+        parser, ranker, extractor = get_engines()
+        trace_mark = tracer.mark()
         with st.spinner("Analyzing Resumes..."):
-            coach.add_jd_to_index(jd_text)
-            for file in uploaded_files:
-                temp_path = f"temp_{file.name}"
-                with open(temp_path, "wb") as f: 
-                    f.write(file.getbuffer())
-                
-                text = parser.extract_text(temp_path)
-                res_skills = extractor.extract_skills(text)
-                jd_skills = extractor.extract_skills(jd_text)
-                scores = ranker.get_composite_score(text, jd_text, res_skills, jd_skills)
-                coach.add_to_index(text, file.name)
-                
-                st.session_state.candidate_data[file.name] = {"text": text, "scores": scores}
+            n_docs = len(uploaded_files)
+            with tracer.span("skills_jd"):
+                jd_skills = extractor.extract_skills(jd_text)  # once per run, not per resume
+            # Parse straight from the uploaded bytes, across a process pool
+            with tracer.span("parse", docs=n_docs):
+                texts = parser.parse_batch([(file.name, file.getvalue()) for file in uploaded_files])
+            candidates = [{"name": file.name, "text": text} for file, text in zip(uploaded_files, texts)]
+
+            # NER over the whole upload in batches (optionally multi-process)
+            with tracer.span("skills", docs=n_docs):
+                all_res_skills = extractor.extract_skills_batch(
+                    [c["text"] for c in candidates],
+                    n_process=int(os.getenv("NER_PROCESSES", "1")),
+                )
+            for cand, res_skills in zip(candidates, all_res_skills):
+                cand["skills"] = res_skills
+
+            # Indexed for the coach in the background once the results show
+            st.session_state.pending_index = {
+                "jd": jd_text,
+                "resumes": [(c["name"], c["text"]) for c in candidates],
+            }
+            st.session_state.warmed_candidate = None
+
+            # Score the whole upload in one batch: the JD is embedded once
+            with tracer.span("rank", docs=n_docs):
+                all_scores = ranker.rank_batch(jd_text, candidates, jd_skills=jd_skills)
+            for cand, scores in zip(candidates, all_scores):
+                res_skills = cand["skills"]
+                st.session_state.candidate_data[cand["name"]] = {"text": cand["text"], "scores": scores}
                 results.append({
-                    "Candidate": file.name,
+                    "Candidate": cand["name"],
                     "Score": round(scores['total_score']*100, 1),
                     "Skills Match": f"{len(set(res_skills) & set(jd_skills))}/{len(jd_skills)}",
                     "Impact": f"{scores['impact_score']*100:.0f}%",
                 })
-                os.remove(temp_path)
             
-            # Update usage count in Database
-            usage_db[user_email] = user_count + 1
-            save_usage_data(usage_db)
+            # Update usage count: atomic, so a second tab can't slip past the limit
+            with tracer.span("usage_sync"):
+                if usage_store.increment(user_email, limit=SCAN_LIMIT) is None:
+                    st.error(f"🚫 You have reached your lifetime limit of {SCAN_LIMIT} scans.")
+                    st.stop()
+            st.session_state.last_run_trace = tracer.summarize(tracer.spans_since(trace_mark, this_thread=True))
             
             st.session_state.leaderboard = pd.DataFrame(results).sort_values("Score", ascending=False)
             st.rerun()
@@ -202,6 +344,14 @@ if st.session_state.leaderboard is not None:
     if not is_logged_in:
         st.info("Log in to chat with the AI Career Coach.")
     else:
+        # Start (or warm) the coach for this candidate off the script thread while the user types
+        if st.session_state.get("warmed_candidate") != selected_name and not collect_coach_warm_up():
+            if 'coach' in st.session_state and not st.session_state.pending_index:
+                st.session_state.coach.warm_up(selected_name, session_id=st.session_state.session_id)
+            else:
+                start_coach_warm_up(selected_name)
+            st.session_state.warmed_candidate = selected_name
+
         for m in st.session_state.chat_history:
             with st.chat_message(m["role"]):
                 st.markdown(m["content"])
@@ -213,7 +363,9 @@ if st.session_state.leaderboard is not None:
             with st.chat_message("assistant"):
                 response_placeholder = st.empty()
                 full_response = ""
-                for chunk in coach.query_stream(prompt, target_filename=selected_name):
+                coach = get_coach()
+                for chunk in coach.query_stream(prompt, target_filename=selected_name,
+                                                session_id=st.session_state.session_id):
                     full_response += chunk
                     response_placeholder.markdown(full_response + "▌")
                 response_placeholder.markdown(full_response)
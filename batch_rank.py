@@ -0,0 +1,221 @@
+"""
+Headless batch ranking: scores a directory of resumes against one or more JDs
+and streams one row per (JD, resume) pair to JSONL or Parquet.
+
+    python batch_rank.py resumes/ --jd jds/ --out results.jsonl
+    python batch_rank.py resumes/ --jd backend.txt frontend.txt --out results.parquet
+
+Resumes are processed in chunks: each chunk is parsed, run through skill
+extraction once, and scored against every JD, and its rows are written
+before the next chunk is read. Memory stays flat however large the
+directory is.
+
+Progress is checkpointed after every chunk (`<out>.ckpt`). Re-running the
+same command after a crash skips the files already written and drops any
+partial output from the chunk that was interrupted. A checkpoint written
+with different JDs (names or text), skill mode or output format is refused.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+from src.core.main_pipeline import ATSPipeline
+from src.utils.parser import ResumeParser
+
+SUPPORTED = (".pdf", ".docx", ".txt")
+SCORE_KEYS = ("total_score", "semantic_match", "keyword_match", "impact_score", "weighted_overlap")
+
+
+def list_documents(path):
+    """Relative paths of every supported file under `path`, in a stable order."""
+    found = []
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(SUPPORTED):
+                found.append(os.path.relpath(os.path.join(root, name), path))
+    return found
+
+
+def load_jds(paths, parser):
+    """{jd name: text} from JD files and/or directories of JD files."""
+    jds = {}
+    for path in paths:
+        files = [os.path.join(path, f) for f in list_documents(path)] if os.path.isdir(path) else [path]
+        for f in files:
+            text = parser.extract_text(f)
+            if text.startswith("Error"):
+                sys.exit(f"Could not read JD {f}: {text}")
+            jds[os.path.splitext(os.path.basename(f))[0]] = text
+    return jds
+
+
+class Checkpoint:
+    """
+    Append-only log next to the output. The first line pins the run's
+    settings; each later line records a finished chunk: its files and where
+    the output stood once its rows were safely on disk.
+    """
+
+    def __init__(self, path, settings):
+        self.path = path
+        self.done = set()
+        self.position = None  # JSONL byte offset, or number of Parquet parts
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                lines = [json.loads(line) for line in f if line.strip()]
+            if lines and lines[0] != settings:
+                sys.exit(f"{path} belongs to a run with different settings; delete it to start over.")
+            for entry in lines[1:]:
+                self.done.update(entry["files"])
+                self.position = entry["position"]
+        else:
+            with open(path, "w") as f:
+                f.write(json.dumps(settings) + "\n")
+
+    def record(self, files, position):
+        with open(self.path, "a") as f:
+            f.write(json.dumps({"files": files, "position": position}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.done.update(files)
+        self.position = position
+
+
+class JsonlWriter:
+    def __init__(self, path, position):
+        # A checkpoint is only good with the output it describes: truncating a
+        # missing or shorter file would pad it with NUL bytes
+        if position is not None and (not os.path.exists(path) or os.path.getsize(path) < position):
+            sys.exit(f"{path} is missing or shorter than its checkpoint ({position} bytes); "
+                     f"delete {path}.ckpt to start over.")
+        # Anything past the last checkpoint is from an interrupted chunk
+        self.f = open(path, "ab" if position is not None else "wb")
+        self.f.truncate(position or 0)
+        self.f.seek(0, os.SEEK_END)
+
+    def write(self, rows):
+        for row in rows:
+            self.f.write((json.dumps(row) + "\n").encode("utf-8"))
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        return self.f.tell()
+
+    def close(self):
+        self.f.close()
+
+
+class ParquetWriter:
+    """One part file per chunk under the `--out` directory (Parquet files can't be appended to)."""
+
+    def __init__(self, path, position):
+        import pyarrow as pa  # only needed for Parquet output
+        import pyarrow.parquet as pq
+        self.pa, self.pq = pa, pq
+        self.path = path
+        self.parts = position or 0
+        os.makedirs(path, exist_ok=True)
+        missing = [i for i in range(self.parts) if not os.path.exists(os.path.join(path, f"part-{i:05d}.parquet"))]
+        if missing:
+            sys.exit(f"{path} is missing {len(missing)} part file(s) recorded in its checkpoint; "
+                     f"delete {path}.ckpt to start over.")
+        for name in os.listdir(path):
+            # Parts beyond the checkpoint (or half-written ones) are from an interrupted chunk
+            if name.endswith(".tmp") or (name.startswith("part-") and int(name[5:10]) >= self.parts):
+                os.remove(os.path.join(path, name))
+        self.schema = pa.schema(
+            [("jd", pa.string()), ("file", pa.string())]
+            + [(k, pa.float64()) for k in SCORE_KEYS]
+            + [("skills", pa.list_(pa.string())), ("matched_skills", pa.int64()), ("error", pa.string())]
+        )
+
+    def write(self, rows):
+        table = self.pa.Table.from_pylist(rows, schema=self.schema)
+        final = os.path.join(self.path, f"part-{self.parts:05d}.parquet")
+        self.pq.write_table(table, final + ".tmp")
+        os.replace(final + ".tmp", final)
+        self.parts += 1
+        return self.parts
+
+    def close(self):
+        pass
+
+
+def rank_chunk(pipeline, parser, resumes_dir, files, jds, jd_skills, workers):
+    """Rows for every (JD, file) pair of one chunk."""
+    texts = parser.parse_batch([(f, os.path.join(resumes_dir, f)) for f in files], max_workers=workers)
+    ok = [i for i, t in enumerate(texts) if not t.startswith("Error")]
+    skills = pipeline.extract_verified_skills_batch([texts[i] for i in ok])
+    resumes = [{"text": texts[i], "skills": s} for i, s in zip(ok, skills)]
+
+    rows = []
+    for jd_name, jd_text in jds.items():
+        scores = pipeline.ranker.rank_batch(jd_text, resumes, jd_skills=jd_skills[jd_name]) if resumes else []
+        jd_set = set(jd_skills[jd_name])
+        by_index = dict(zip(ok, zip(scores, skills)))
+        for i, f in enumerate(files):
+            row = {"jd": jd_name, "file": f}
+            if i in by_index:
+                result, res_skills = by_index[i]
+                row.update({k: result.get(k) for k in SCORE_KEYS})
+                row.update(skills=res_skills, matched_skills=len(set(res_skills) & jd_set), error=None)
+            else:
+                row.update({k: None for k in SCORE_KEYS})
+                row.update(skills=[], matched_skills=0, error=texts[i])
+            rows.append(row)
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("resumes_dir", help="directory of .pdf/.docx/.txt resumes (searched recursively)")
+    ap.add_argument("--jd", nargs="+", required=True, help="JD files and/or directories of JD files")
+    ap.add_argument("--out", required=True, help="output path: .jsonl, or .parquet (a directory of parts)")
+    ap.add_argument("--chunk-size", type=int, default=256, help="resumes per chunk (bounds memory)")
+    ap.add_argument("--workers", type=int, default=None, help="parser processes (default: all CPUs)")
+    ap.add_argument("--skill-mode", default=os.getenv("SKILL_EXTRACTION_MODE", "ner"), choices=["ner", "matcher"])
+    ap.add_argument("--model-path", default="./output/model-last")
+    args = ap.parse_args()
+
+    fmt = "parquet" if args.out.endswith(".parquet") else "jsonl"
+    parser = ResumeParser()
+    jds = load_jds(args.jd, parser)
+    files = list_documents(args.resumes_dir)
+
+    # JDs are pinned by content, so an edited JD is refused like a changed format
+    settings = {
+        "resumes_dir": os.path.abspath(args.resumes_dir),
+        "jds": {name: hashlib.sha256(text.encode("utf-8")).hexdigest() for name, text in sorted(jds.items())},
+        "skill_mode": args.skill_mode,
+        "format": fmt,
+    }
+    checkpoint = Checkpoint(args.out + ".ckpt", settings)
+    todo = [f for f in files if f not in checkpoint.done]
+    print(f"{len(files)} resumes x {len(jds)} JDs; {len(files) - len(todo)} already done, {len(todo)} to go")
+    if not todo:
+        return
+
+    pipeline = ATSPipeline(model_path=args.model_path, skill_mode=args.skill_mode)
+    jd_skills = {name: pipeline.extract_verified_skills(text) for name, text in jds.items()}
+    writer = (ParquetWriter if fmt == "parquet" else JsonlWriter)(args.out, checkpoint.position)
+
+    start = time.perf_counter()
+    try:
+        for n in range(0, len(todo), args.chunk_size):
+            chunk = todo[n:n + args.chunk_size]
+            rows = rank_chunk(pipeline, parser, args.resumes_dir, chunk, jds, jd_skills, args.workers)
+            checkpoint.record(chunk, writer.write(rows))
+            done = n + len(chunk)
+            rate = done / (time.perf_counter() - start)
+            print(f"[{done}/{len(todo)}] {rate:.1f} resumes/s, ~{(len(todo) - done) / rate:.0f}s left")
+    finally:
+        writer.close()
+        parser.close()
+    print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
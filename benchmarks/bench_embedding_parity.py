@@ -0,0 +1,112 @@
+"""
+Parity and speed of the CPU embedding backends against the fp32 model.
+
+Every JD in a fixed synthetic corpus (benchmarks/corpus.py, same seed every
+run) scores every resume once with fp32 torch and once per candidate
+backend. For each candidate it reports:
+
+    spearman   rank correlation of the scores, per JD, worst JD shown
+    top10      share of fp32's top 10 per JD the candidate also puts there
+    max drift  largest |score - fp32 score| over all pairs (cosine units)
+    docs/s     encode throughput (disk cache off)
+
+Exits non-zero when a backend falls below --min-spearman or above
+--max-drift, or fails to load at all, so it can gate a switch of
+EMBEDDING_BACKEND.
+
+Run from the repo root:
+    python -m benchmarks.bench_embedding_parity --n 500 --backends int8 onnx --float16 --threads 4
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+from scipy.stats import spearmanr
+
+from benchmarks.corpus import make_resume, make_jd, _load_skills
+from src.core.embeddings import EmbeddingEngine, DEFAULT_MODEL
+
+
+def score_matrix(engine, jd_texts, resume_texts, batch_size):
+    """(JDs x resumes) cosine scores and the resume encode throughput."""
+    jd_vectors = engine.get_embeddings_batch(jd_texts, batch_size=batch_size)
+    start = time.perf_counter()
+    resume_vectors = engine.get_embeddings_batch(resume_texts, batch_size=batch_size)
+    docs_per_s = len(resume_texts) / (time.perf_counter() - start)
+    return jd_vectors @ resume_vectors.T, docs_per_s
+
+
+def compare(reference, candidate, k=10):
+    """Parity stats of a candidate score matrix against the fp32 one."""
+    rhos, overlaps = [], []
+    for ref, cand in zip(reference, candidate):
+        rhos.append(spearmanr(ref, cand).statistic)
+        top_ref = set(np.argsort(-ref)[:k])
+        top_cand = set(np.argsort(-cand)[:k])
+        overlaps.append(len(top_ref & top_cand) / len(top_ref))
+    drift = np.abs(candidate - reference)
+    return {
+        "spearman_min": float(np.min(rhos)),
+        "spearman_mean": float(np.mean(rhos)),
+        "top10_overlap": float(np.mean(overlaps)),
+        "max_drift": float(drift.max()),
+        "mean_drift": float(drift.mean()),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--model", default=DEFAULT_MODEL)
+    ap.add_argument("--n", type=int, default=500, help="number of resumes")
+    ap.add_argument("--jds", type=int, default=5, help="number of JDs")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--backends", nargs="+", default=["int8", "onnx"], choices=["torch", "int8", "onnx"])
+    ap.add_argument("--float16", action="store_true", help="also check each backend with float16 vectors")
+    ap.add_argument("--threads", type=int, default=None)
+    ap.add_argument("--batch-size", type=int, default=32)
+    ap.add_argument("--min-spearman", type=float, default=0.99, help="lowest acceptable per-JD rank correlation")
+    ap.add_argument("--max-drift", type=float, default=0.02, help="largest acceptable score change")
+    args = ap.parse_args()
+
+    skills = _load_skills("skills_list.json")
+    resume_texts = [make_resume(i, skills, args.seed)[0] for i in range(args.n)]
+    jd_texts = [make_jd(j, skills, args.seed)[0] for j in range(args.jds)]
+
+    def engine(backend, float16=False):
+        e = EmbeddingEngine(args.model, use_cache=False, backend=backend, threads=args.threads, float16=float16)
+        e.get_embeddings_batch(jd_texts[:1])  # warm-up
+        return e
+
+    reference, ref_speed = score_matrix(engine("torch"), jd_texts, resume_texts, args.batch_size)
+    print(f"corpus:  {args.n} resumes x {args.jds} JDs, model {args.model}, threads {args.threads or 'default'}")
+    print(f"{'backend':<15} {'docs/s':>9} {'speedup':>8} {'spearman min/mean':>18} {'top10':>6} "
+          f"{'max drift':>10} {'mean drift':>11}")
+    print(f"{'torch (fp32)':<15} {ref_speed:9.1f} {1:8.2f}x")
+
+    variants = [(b, False) for b in args.backends]
+    if args.float16:
+        variants += [(b, True) for b in args.backends]
+    failed = []
+    for backend, float16 in variants:
+        label = backend + (" +fp16" if float16 else "")
+        try:
+            scores, speed = score_matrix(engine(backend, float16), jd_texts, resume_texts, args.batch_size)
+        except Exception as e:
+            print(f"{label:<15} failed to load: {e}")
+            failed.append(label)
+            continue
+        s = compare(reference, scores)
+        print(f"{label:<15} {speed:9.1f} {speed / ref_speed:8.2f}x {s['spearman_min']:9.4f}/{s['spearman_mean']:.4f} "
+              f"{s['top10_overlap']:6.0%} {s['max_drift']:10.5f} {s['mean_drift']:11.5f}")
+        if s["spearman_min"] < args.min_spearman or s["max_drift"] > args.max_drift:
+            failed.append(label)
+
+    if failed:
+        print(f"Failed to load or outside tolerance (spearman >= {args.min_spearman}, "
+              f"drift <= {args.max_drift}): {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Shortlist feedback: sequential GeminiService.generate_feedback calls vs. the
+concurrent feedback_batch, against a local stub server standing in for the
+Gemini endpoint (no network, no API key). The stub adds latency and can
+answer a fraction of requests with 429/503 to exercise the retries.
+
+Run from the repo root:
+    python -m benchmarks.bench_feedback_batch --n 40 --latency 0.3 --error-rate 0.1
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.services.gemini_api import GeminiService
+from benchmarks.bench_rank_batch import make_corpus
+
+
+def make_stub_server(latency, error_rate, seed=0):
+    """A ThreadingHTTPServer that answers generateContent like Gemini does."""
+    rng = random.Random(seed)
+    lock = threading.Lock()
+    counts = {"ok": 0, "429": 0, "503": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            time.sleep(latency)
+            with lock:
+                roll = rng.random()
+            if roll < error_rate:
+                code = 429 if roll < error_rate / 2 else 503
+                with lock:
+                    counts[str(code)] += 1
+                self._reply(code, {"error": {"code": code, "message": "stub says slow down", "status": "UNAVAILABLE"}})
+                return
+            prompt = " ".join(p.get("text", "") for c in body.get("contents", []) for p in c.get("parts", []))
+            with lock:
+                counts["ok"] += 1
+            self._reply(200, {
+                "candidates": [{"content": {"role": "model", "parts": [{"text": "1. Quantify. 2. Add skills. 3. Trim."}]},
+                                "finishReason": "STOP"}],
+                "usageMetadata": {"promptTokenCount": len(prompt) // 4, "candidatesTokenCount": 12},
+            })
+
+        def _reply(self, code, payload):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, counts
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--n", type=int, default=40, help="candidates on the shortlist")
+    ap.add_argument("--latency", type=float, default=0.3, help="stub response time in seconds")
+    ap.add_argument("--error-rate", type=float, default=0.1, help="fraction of 429/503 answers")
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--rpm", type=float, default=600, help="requests per minute")
+    args = ap.parse_args()
+
+    server, counts = make_stub_server(args.latency, args.error_rate)
+    os.environ.setdefault("GEMINI_API_KEY", "stub")
+    service = GeminiService(use_cache=False, base_url=f"http://127.0.0.1:{server.server_port}")
+
+    jd_text, jd_skills, resumes = make_corpus(args.n)
+    scores = {"total_score": 0.6, "keyword_match": 0.5, "impact_score": 0.4}
+    candidates = [{"name": f"cand_{i}.pdf", "text": r["text"], "skills": r["skills"], "scores": scores}
+                  for i, r in enumerate(resumes)]
+
+    # Sequential baseline on a clean server (no injected errors: it has no retries)
+    seq_n = min(args.n, 10)
+    seq_server, _ = make_stub_server(args.latency, 0.0)
+    seq_service = GeminiService(use_cache=False, base_url=f"http://127.0.0.1:{seq_server.server_port}")
+    start = time.perf_counter()
+    for c in candidates[:seq_n]:
+        seq_service.generate_feedback(c["scores"], c["text"], jd_text, resume_skills=c["skills"], jd_skills=jd_skills)
+    seq_rate = seq_n / (time.perf_counter() - start)
+
+    async def run_batch():
+        first, done, failed = None, 0, 0
+        start = time.perf_counter()
+        async for name, text, usage in service.feedback_batch(
+            candidates, jd_text, jd_skills=jd_skills, max_concurrency=args.concurrency,
+            requests_per_minute=args.rpm, max_retries=5,
+        ):
+            done += 1
+            failed += text.startswith("⚠️")
+            first = first or time.perf_counter() - start
+        return time.perf_counter() - start, first, done, failed
+
+    elapsed, first, done, failed = asyncio.run(run_batch())
+    batch_rate = done / elapsed
+
+    print(f"sequential:   {seq_rate:8.2f} candidates/s  ({seq_n} candidates, no errors)")
+    print(f"batch:        {batch_rate:8.2f} candidates/s  ({batch_rate / seq_rate:.1f}x), "
+          f"first result after {first:.2f}s")
+    print(f"stub answers: {counts['ok']} ok, {counts['429']} x 429, {counts['503']} x 503 "
+          f"(error rate {args.error_rate:.0%}); failed after retries: {failed}")
+    print(f"usage:        {service.usage_report()}")
+    server.shutdown()
+    seq_server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
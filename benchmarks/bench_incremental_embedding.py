@@ -0,0 +1,64 @@
+"""
+Re-scoring edited resumes: whole-document embedding vs. chunked embedding
+with the chunk-hash cache (EmbeddingEngine(chunked=True)).
+
+Each round edits one bullet point in every resume (as the coach's rewrite
+flow would) and re-scores them against the JD. The whole-document engine
+re-encodes every resume; the chunked engine only the chunks that changed.
+
+Run from the repo root:
+    python -m benchmarks.bench_incremental_embedding --n 200 --rounds 3
+"""
+import argparse
+import random
+import tempfile
+import time
+
+from benchmarks.corpus import make_resume, make_jd, _load_skills
+from src.core.embeddings import EmbeddingEngine, DEFAULT_MODEL
+
+
+def edit_one_bullet(text, rng):
+    """Rewrites one '- ...' line, as a candidate fixing a bullet would."""
+    lines = text.split("\n")
+    bullets = [i for i, line in enumerate(lines) if line.startswith("- ")]
+    if bullets:
+        i = rng.choice(bullets)
+        lines[i] = f"{lines[i].rstrip('.')}, improving reliability by {rng.randint(5, 60)}%."
+    return "\n".join(lines)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--model", default=DEFAULT_MODEL)
+    ap.add_argument("--n", type=int, default=200, help="number of resumes")
+    ap.add_argument("--rounds", type=int, default=3, help="edit + re-score rounds")
+    ap.add_argument("--chunk-chars", type=int, default=300)
+    ap.add_argument("--pooling", default="mean", choices=["mean", "max"])
+    args = ap.parse_args()
+
+    skills = _load_skills("skills_list.json")
+    resumes = [make_resume(i, skills)[0] for i in range(args.n)]
+    jd_text = make_jd(0, skills)[0]
+
+    with tempfile.TemporaryDirectory() as whole_dir, tempfile.TemporaryDirectory() as chunk_dir:
+        whole = EmbeddingEngine(args.model, cache_dir=whole_dir)
+        chunked = EmbeddingEngine(args.model, cache_dir=chunk_dir, chunked=True,
+                                  chunk_chars=args.chunk_chars, pooling=args.pooling)
+        for name, engine in (("whole", whole), ("chunked", chunked)):
+            engine.calculate_similarity_batch(resumes, jd_text)  # initial scoring fills the cache
+            print(f"{name:<8} initial  {engine.chunk_stats() or engine.cache_stats()}")
+
+        rng = random.Random(0)
+        for r in range(args.rounds):
+            resumes = [edit_one_bullet(t, rng) for t in resumes]
+            for name, engine in (("whole", whole), ("chunked", chunked)):
+                start = time.perf_counter()
+                engine.calculate_similarity_batch(resumes, jd_text)
+                elapsed = time.perf_counter() - start
+                detail = engine.chunk_stats() if engine.chunked else {"recomputed": args.n}
+                print(f"{name:<8} round {r + 1}  {elapsed:7.3f}s  {detail}")
+
+
+if __name__ == "__main__":
+    main()
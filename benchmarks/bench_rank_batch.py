@@ -0,0 +1,62 @@
+"""
+Throughput benchmark: per-resume get_composite_score vs. CompositeRanker.rank_batch.
+
+Run from the repo root:
+    python -m benchmarks.bench_rank_batch --n 200
+"""
+import argparse
+import json
+import random
+import time
+
+from src.core.ranker import CompositeRanker
+
+
+def make_corpus(n, seed=42, skills_json="skills_list.json"):
+    """Deterministic synthetic resumes of varying length, built from the skills list."""
+    with open(skills_json, "r") as f:
+        skills = json.load(f)
+    rng = random.Random(seed)
+    resumes = []
+    for i in range(n):
+        picked = rng.sample(skills, k=rng.randint(4, 12))
+        bullets = [
+            f"Built services with {s} and improved latency by {rng.randint(5, 60)}%."
+            for s in picked
+        ]
+        resumes.append({
+            "text": f"Candidate {i}. " + " ".join(bullets * rng.randint(1, 4)),
+            "skills": picked,
+        })
+    jd_skills = rng.sample(skills, k=8)
+    jd_text = "We are hiring an engineer with experience in " + ", ".join(jd_skills) + "."
+    return jd_text, jd_skills, resumes
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--n", type=int, default=200, help="number of resumes")
+    ap.add_argument("--batch-size", type=int, default=32)
+    args = ap.parse_args()
+
+    jd_text, jd_skills, resumes = make_corpus(args.n)
+    ranker = CompositeRanker()
+    ranker.rank_batch(jd_text, resumes[:4], jd_skills=jd_skills)  # warm-up
+
+    start = time.perf_counter()
+    for r in resumes:
+        ranker.get_composite_score(r["text"], jd_text, r["skills"], jd_skills)
+    loop_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ranker.rank_batch(jd_text, resumes, jd_skills=jd_skills, batch_size=args.batch_size)
+    batch_s = time.perf_counter() - start
+
+    print(f"resumes:             {args.n}")
+    print(f"per-resume loop:     {args.n / loop_s:8.1f} resumes/s ({loop_s:.2f}s)")
+    print(f"rank_batch:          {args.n / batch_s:8.1f} resumes/s ({batch_s:.2f}s)")
+    print(f"speed-up:            {loop_s / batch_s:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
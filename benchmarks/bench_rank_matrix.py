@@ -0,0 +1,59 @@
+"""
+Many JDs x many resumes: get_composite_score per pair vs.
+CompositeRanker.rank_matrix (tiled, top-k per JD).
+
+The per-pair path is timed on a sample of pairs and extrapolated.
+
+Run from the repo root:
+    python -m benchmarks.bench_rank_matrix --jds 30 --n 5000 --k 20 --max-memory-mb 64
+"""
+import argparse
+import time
+import tracemalloc
+
+from src.core.ranker import CompositeRanker
+from benchmarks.bench_rank_batch import make_corpus
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--jds", type=int, default=30, help="number of JDs")
+    ap.add_argument("--n", type=int, default=5000, help="number of resumes")
+    ap.add_argument("--k", type=int, default=20, help="candidates kept per JD")
+    ap.add_argument("--max-memory-mb", type=float, default=64)
+    ap.add_argument("--pair-sample", type=int, default=200, help="pairs timed on the per-pair path")
+    args = ap.parse_args()
+
+    _, _, resumes = make_corpus(args.n)
+    jds = []
+    for seed in range(args.jds):
+        jd_text, jd_skills, _ = make_corpus(1, seed=1000 + seed)
+        jds.append({"text": jd_text, "skills": jd_skills})
+
+    ranker = CompositeRanker()
+    ranker.embed_engine.cache = None  # time the encoder, not the disk cache
+    ranker.rank_batch(jds[0]["text"], resumes[:4], jd_skills=jds[0]["skills"])  # warm-up
+
+    start = time.perf_counter()
+    for p in range(args.pair_sample):
+        jd, r = jds[p % args.jds], resumes[p % args.n]
+        ranker.get_composite_score(r["text"], jd["text"], r["skills"], jd["skills"])
+    pair_s = (time.perf_counter() - start) / args.pair_sample * args.jds * args.n
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    top = ranker.rank_matrix(jds, resumes, k=args.k, max_memory_mb=args.max_memory_mb)
+    matrix_s = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    pairs = args.jds * args.n
+    print(f"pairs:             {pairs} ({args.jds} JDs x {args.n} resumes), top {args.k} kept per JD")
+    print(f"per-pair (est.):   {pairs / pair_s:10.1f} pairs/s ({pair_s:.1f}s)")
+    print(f"rank_matrix:       {pairs / matrix_s:10.1f} pairs/s ({matrix_s:.1f}s, {pair_s / matrix_s:.0f}x)")
+    print(f"peak traced alloc: {peak / 2**20:10.1f} MB (ceiling {args.max_memory_mb:.0f} MB per tile)")
+    print(f"best for JD 0:     resume {top[0][0][0]} at {top[0][0][1]['total_score']:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Search latency and recall of ResumePool: exact argpartition vs. IVF.
+
+Run from the repo root:
+    python -m benchmarks.bench_resume_pool --n 20000 --k 50
+"""
+import argparse
+import time
+
+from src.core.embeddings import EmbeddingEngine
+from src.core.resume_index import ResumePool
+from benchmarks.bench_rank_batch import make_corpus
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--n", type=int, default=20000, help="pool size")
+    ap.add_argument("--k", type=int, default=50)
+    ap.add_argument("--queries", type=int, default=20)
+    ap.add_argument("--n-probe", type=int, default=8)
+    args = ap.parse_args()
+
+    engine = EmbeddingEngine()
+    _, _, resumes = make_corpus(args.n)
+    docs = [{"id": f"resume_{i}", "text": r["text"], "skills": r["skills"]} for i, r in enumerate(resumes)]
+
+    start = time.perf_counter()
+    exact = ResumePool(engine, mode="exact")
+    exact.add_many(docs)
+    print(f"pool build:  {time.perf_counter() - start:.1f}s for {args.n} resumes")
+
+    # Second pool over the same documents (served from the embedding cache)
+    ivf = ResumePool(engine, mode="ivf", n_probe=args.n_probe, ivf_min_size=0)
+    ivf.add_many(docs)
+    start = time.perf_counter()
+    ivf.train()
+    print(f"ivf train:   {time.perf_counter() - start:.1f}s")
+
+    queries = [make_corpus(1, seed=1000 + q)[0] for q in range(args.queries)]
+    for q in queries:
+        engine.get_embeddings(q)  # keep query encoding out of the timings
+
+    timings = {"exact": 0.0, "ivf": 0.0}
+    recall = 0.0
+    for q in queries:
+        start = time.perf_counter()
+        truth = exact.search(q, k=args.k)
+        timings["exact"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        approx = ivf.search(q, k=args.k)
+        timings["ivf"] += time.perf_counter() - start
+
+        recall += len({d for d, _ in truth} & {d for d, _ in approx}) / max(len(truth), 1)
+
+    for mode, total in timings.items():
+        print(f"{mode:6s} top-{args.k}: {1000 * total / args.queries:7.2f} ms/query")
+    print(f"ivf recall@{args.k}: {recall / args.queries:.3f}")
+
+
+if __name__ == "__main__":
+    main()
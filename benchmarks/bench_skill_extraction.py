@@ -0,0 +1,50 @@
+"""
+Skill extraction throughput (docs/sec): spaCy NER path vs. compiled matcher,
+one document at a time and through extract_skills_batch.
+
+Run from the repo root:
+    python -m benchmarks.bench_skill_extraction --n 500 --n-process 4
+"""
+import argparse
+import time
+
+from src.services.extractor import LocalSkillExtractor
+from benchmarks.bench_rank_batch import make_corpus
+
+
+def time_mode(extractor, texts):
+    start = time.perf_counter()
+    found = sum(len(extractor.extract_skills(t)) for t in texts)
+    return len(texts) / (time.perf_counter() - start), found
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--n", type=int, default=500, help="number of resumes")
+    ap.add_argument("--model-path", default="./output/model-last")
+    ap.add_argument("--batch-size", type=int, default=64)
+    ap.add_argument("--n-process", type=int, default=1)
+    args = ap.parse_args()
+
+    _, _, resumes = make_corpus(args.n)
+    texts = [r["text"] for r in resumes]
+
+    for mode in ("matcher", "ner"):
+        try:
+            extractor = LocalSkillExtractor(model_path=args.model_path, mode=mode)
+        except Exception as e:
+            print(f"{mode:14s} skipped: {e}")
+            continue
+        extractor.extract_skills(texts[0])  # warm-up
+        docs_per_s, found = time_mode(extractor, texts)
+        print(f"{mode:14s} {docs_per_s:10.1f} docs/s  ({found} skills found)")
+
+        start = time.perf_counter()
+        batches = extractor.extract_skills_batch(texts, batch_size=args.batch_size, n_process=args.n_process)
+        docs_per_s = len(texts) / (time.perf_counter() - start)
+        found = sum(len(b) for b in batches)
+        print(f"{mode + '-batch':14s} {docs_per_s:10.1f} docs/s  ({found} skills found, n_process={args.n_process})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Startup benchmark: import cost of the modules app.py loads at the top, and
+wall time from a cold interpreter to the first ranking result.
+
+Each measurement runs in a fresh interpreter so nothing is pre-imported.
+Exits non-zero if a heavy stack leaks into the startup imports or a budget
+is exceeded, so it can guard against regressions in CI.
+
+Run from the repo root:
+    python -m benchmarks.bench_startup --max-import-s 2 --max-first-rank-s 60
+"""
+import argparse
+import ast
+import json
+import subprocess
+import sys
+
+
+def app_imports(path="app.py"):
+    """The repo modules app.py imports at module level, i.e. before the first page renders."""
+    with open(path, "r") as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.ImportFrom) and node.module:
+            modules.append(node.module)
+        elif isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+    return [m for m in dict.fromkeys(modules) if m.split(".")[0] == "src"]
+
+
+APP_IMPORTS = app_imports()
+
+# None of these may be imported just to render the page
+HEAVY_MODULES = ["torch", "sentence_transformers", "spacy", "chromadb", "llama_index", "google.genai"]
+
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+FIRST_RANK_PROBE = """
+import json, time
+start = time.perf_counter()
+from src.utils.parser import ResumeParser
+from src.core.ranker import CompositeRanker
+from src.services.extractor import LocalSkillExtractor
+imported = time.perf_counter()
+ranker = CompositeRanker()
+extractor = LocalSkillExtractor(mode={mode!r})
+built = time.perf_counter()
+jd = "Looking for a Senior Developer with Python, AWS, and SQL experience."
+resume = "I am a Senior Developer with 5 years experience in Python. I also know SQL."
+ranker.rank_batch(jd, [{{"text": resume, "skills": extractor.extract_skills(resume)}}],
+                  jd_skills=extractor.extract_skills(jd))
+done = time.perf_counter()
+print(json.dumps({{"import_s": imported - start, "build_s": built - imported,
+                  "first_rank_s": done - built, "total_s": done - start}}))
+"""
+
+
+def run_probe(code):
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if out.returncode != 0:
+        sys.exit(f"probe failed:\n{out.stderr}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--mode", default="ner", choices=["ner", "matcher"])
+    ap.add_argument("--max-import-s", type=float, default=None)
+    ap.add_argument("--max-first-rank-s", type=float, default=None)
+    args = ap.parse_args()
+
+    failures = []
+
+    imports = run_probe(IMPORT_PROBE.format(modules=APP_IMPORTS, heavy=HEAVY_MODULES))
+    print(f"app import time:      {imports['seconds']:.2f}s")
+    if imports["heavy"]:
+        failures.append(f"heavy modules imported at startup: {', '.join(imports['heavy'])}")
+    if args.max_import_s is not None and imports["seconds"] > args.max_import_s:
+        failures.append(f"import time {imports['seconds']:.2f}s > {args.max_import_s}s")
+
+    first = run_probe(FIRST_RANK_PROBE.format(mode=args.mode))
+    print(f"ranking imports:      {first['import_s']:.2f}s")
+    print(f"engine construction:  {first['build_s']:.2f}s")
+    print(f"first rank_batch:     {first['first_rank_s']:.2f}s")
+    print(f"time to first rank:   {first['total_s']:.2f}s")
+    if args.max_first_rank_s is not None and first["total_s"] > args.max_first_rank_s:
+        failures.append(f"time to first ranking {first['total_s']:.2f}s > {args.max_first_rank_s}s")
+
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
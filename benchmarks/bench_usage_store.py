@@ -0,0 +1,70 @@
+"""
+Usage quota: the old download-on-every-rerun / upload-on-every-scan pattern
+vs. UsageStore, against a LocalHub standing in for the HF dataset repo
+(`--latency` simulates the hub round-trip). The correctness checks (atomic
+limited increments, replicas merging, retry after a failed sync) live in
+tests/test_usage_store.py.
+
+Run from the repo root:
+    python -m benchmarks.bench_usage_store --users 50 --reruns 20 --latency 0.2
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from src.services.usage_store import UsageStore, LocalHub
+
+LIMIT = 2
+
+
+def old_pattern(hub, users, reruns):
+    """app.py before: every rerun downloads usage.json, every scan re-uploads it."""
+    for user in users:
+        for r in range(reruns):
+            usage = hub.download()
+            if r < LIMIT and usage.get(user, 0) < LIMIT:
+                usage[user] = usage.get(user, 0) + 1
+                hub.upload(usage)
+
+
+def store_pattern(store, users, reruns):
+    for user in users:
+        for r in range(reruns):
+            if r < LIMIT and store.get(user) < LIMIT:
+                store.increment(user, limit=LIMIT)
+    store.sync()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--users", type=int, default=50)
+    ap.add_argument("--reruns", type=int, default=20, help="page reruns per user (the first 2 spend a scan)")
+    ap.add_argument("--latency", type=float, default=0.2, help="seconds per simulated hub call")
+    args = ap.parse_args()
+    users = [f"user{i}@example.com" for i in range(args.users)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Latency and hub traffic
+        old_hub = LocalHub(os.path.join(tmp, "old", "usage.json"), latency=args.latency)
+        start = time.perf_counter()
+        old_pattern(old_hub, users, args.reruns)
+        old_s = time.perf_counter() - start
+
+        hub = LocalHub(os.path.join(tmp, "new", "usage.json"), latency=args.latency)
+        store = UsageStore(os.path.join(tmp, "new", "usage.sqlite"), hub=hub)
+        start = time.perf_counter()
+        store_pattern(store, users, args.reruns)
+        new_s = time.perf_counter() - start
+
+        reruns = args.users * args.reruns
+        print(f"old pattern:  {old_s:7.2f}s for {reruns} reruns "
+              f"({old_hub.downloads} downloads, {old_hub.uploads} uploads)")
+        print(f"UsageStore:   {new_s:7.2f}s for {reruns} reruns "
+              f"({hub.downloads} downloads, {hub.uploads} uploads), {store.stats()}")
+        if hub.download() != old_hub.download():
+            print("WARNING: hub contents differ between the two patterns")
+
+
+if __name__ == "__main__":
+    main()
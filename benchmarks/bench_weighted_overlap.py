@@ -0,0 +1,66 @@
+"""
+Weighted overlap throughput: the old per-pair refit + toarray() approach vs.
+StatisticalAnalyzer.weighted_overlap_batch without an IDF model (same
+scores, computed in closed form) and with a corpus-level IDF model.
+
+Run from the repo root:
+    python -m benchmarks.bench_weighted_overlap --n 5000
+"""
+import argparse
+import time
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from src.core.stats import StatisticalAnalyzer
+from benchmarks.bench_rank_batch import make_corpus
+
+
+def legacy_overlap(resume_text, jd_text):
+    """The pre-batch implementation: refit on two documents, densify twice."""
+    vectorizer = TfidfVectorizer(stop_words='english', sublinear_tf=True)
+    vectors = vectorizer.fit_transform([jd_text, resume_text])
+    jd_vector = vectors.toarray()[0]
+    resume_vector = vectors.toarray()[1]
+    important_indices = np.where(jd_vector > 0)[0]
+    return float(np.dot(resume_vector[important_indices], jd_vector[important_indices]))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--n", type=int, default=5000, help="number of resumes")
+    ap.add_argument("--legacy-n", type=int, default=500, help="resumes timed on the legacy path")
+    args = ap.parse_args()
+
+    jd_text, _, resumes = make_corpus(args.n)
+    texts = [r["text"] for r in resumes]
+
+    analyzer = StatisticalAnalyzer()
+    start = time.perf_counter()
+    analyzer.fit_idf(texts + [jd_text])
+    print(f"fit_idf on {args.n + 1} docs:  {time.perf_counter() - start:.2f}s (one-off)")
+
+    legacy = texts[:args.legacy_n]
+    start = time.perf_counter()
+    for t in legacy:
+        legacy_overlap(t, jd_text)
+    legacy_rate = len(legacy) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    analyzer.weighted_overlap_batch(jd_text, texts)
+    batch_rate = len(texts) / (time.perf_counter() - start)
+
+    fallback = StatisticalAnalyzer()  # no IDF model: closed-form per-pair scores
+    start = time.perf_counter()
+    pairwise = fallback.weighted_overlap_batch(jd_text, texts)
+    pairwise_rate = len(texts) / (time.perf_counter() - start)
+    drift = max(abs(p - legacy_overlap(t, jd_text)) for p, t in zip(pairwise, legacy))
+
+    print(f"legacy per-pair:  {legacy_rate:10.1f} resumes/s")
+    print(f"no-IDF fallback:  {pairwise_rate:10.1f} resumes/s  ({pairwise_rate / legacy_rate:.1f}x, "
+          f"max diff vs legacy {drift:.1e})")
+    print(f"sparse batch:     {batch_rate:10.1f} resumes/s  ({batch_rate / legacy_rate:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
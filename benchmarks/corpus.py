@@ -0,0 +1,144 @@
+"""
+Deterministic synthetic corpus: resumes and JDs built from skills_list.json,
+written as .txt, .docx and .pdf files so the parser is exercised on every
+format the app accepts.
+
+The same seed always gives the same documents, and document i is the same
+whatever `n` is, so a corpus of 10,000 also contains the corpus of 100.
+
+    python -m benchmarks.corpus /tmp/corpus --n 1000
+"""
+import argparse
+import json
+import os
+import random
+
+FIRST_NAMES = ["Asha", "Ben", "Chen", "Dana", "Elif", "Farid", "Grace", "Hugo", "Ines", "Jonas", "Kemi", "Luca"]
+LAST_NAMES = ["Okafor", "Schmidt", "Nair", "Garcia", "Kowalski", "Tanaka", "Haddad", "Moreau", "Silva", "Berg"]
+TITLES = ["Software Engineer", "Data Scientist", "Backend Developer", "ML Engineer", "DevOps Engineer",
+          "Full Stack Developer", "Data Engineer", "Platform Engineer"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Stark Industries", "Wayne Tech", "Hooli"]
+VERBS = ["Built", "Designed", "Migrated", "Led", "Automated", "Optimized", "Shipped", "Maintained"]
+OBJECTS = ["a billing service", "the data pipeline", "an internal dashboard", "the search API",
+           "a recommendation model", "CI/CD workflows", "the customer portal", "a reporting system"]
+RESULTS = ["reducing latency by {p}%", "cutting cloud costs by ${k}k per year", "serving {n}+ daily users",
+           "improving conversion by {p}%", "saving {h} engineering hours a month", "with a team of {t} engineers"]
+FORMATS = ("txt", "docx", "pdf")
+
+
+def _load_skills(skills_json):
+    with open(skills_json, "r") as f:
+        return json.load(f)
+
+
+def make_resume(i, skills, seed=42):
+    """Resume number `i` as plain text (sections, bullets with metrics, a skills line)."""
+    rng = random.Random(f"{seed}-resume-{i}")
+    picked = rng.sample(skills, k=rng.randint(5, 14))
+    lines = [
+        f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        f"{rng.choice(TITLES)} | candidate{i}@example.com",
+        "",
+        "SUMMARY",
+        f"{rng.choice(TITLES)} with {rng.randint(1, 15)} years of experience in {', '.join(picked[:3])}.",
+        "",
+        "EXPERIENCE",
+    ]
+    for _ in range(rng.randint(1, 4)):
+        lines.append(f"{rng.choice(TITLES)} - {rng.choice(COMPANIES)} ({rng.randint(2008, 2022)} - present)")
+        for _ in range(rng.randint(2, 6)):
+            bullet = f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)} using {rng.choice(picked)}"
+            if rng.random() < 0.6:
+                bullet += ", " + rng.choice(RESULTS).format(
+                    p=rng.randint(5, 80), k=rng.randint(10, 500), n=rng.randint(1, 900) * 100,
+                    h=rng.randint(5, 120), t=rng.randint(2, 15))
+            lines.append(bullet + ".")
+        lines.append("")
+    lines += ["SKILLS", ", ".join(picked), "", "EDUCATION",
+              f"B.Sc. Computer Science, University {rng.randint(1, 50)}"]
+    return "\n".join(lines), picked
+
+
+def make_jd(j, skills, seed=42):
+    """JD number `j` as plain text, and the skills it asks for."""
+    rng = random.Random(f"{seed}-jd-{j}")
+    required = rng.sample(skills, k=rng.randint(4, 10))
+    title = rng.choice(TITLES)
+    text = "\n".join([
+        f"{title} at {rng.choice(COMPANIES)}",
+        "",
+        "Responsibilities:",
+        *(f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)}." for _ in range(rng.randint(3, 6))),
+        "",
+        "Requirements:",
+        *(f"- Experience with {s}." for s in required),
+        f"- {rng.randint(2, 8)}+ years as a {title}.",
+    ])
+    return text, required
+
+
+def write_document(path, text):
+    """Writes `text` as .txt, .docx or .pdf depending on the extension."""
+    ext = os.path.splitext(path)[1]
+    if ext == ".txt":
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    elif ext == ".docx":
+        from docx import Document
+        doc = Document()
+        for line in text.splitlines():
+            doc.add_paragraph(line)
+        doc.save(path)
+    elif ext == ".pdf":
+        from fpdf import FPDF
+        pdf = FPDF()
+        pdf.add_page()
+        pdf.set_font("Arial", size=10)
+        for line in text.splitlines():
+            # The core PDF fonts are latin-1 only
+            pdf.multi_cell(0, 5, txt=line.encode("latin-1", "replace").decode("latin-1") or " ")
+        pdf.output(path)
+    else:
+        raise ValueError(f"Unsupported format {ext}")
+
+
+def generate_corpus(out_dir, n, n_jds=5, formats=FORMATS, seed=42, skills_json="skills_list.json"):
+    """
+    Writes resumes 0..n-1 (formats in rotation) and `n_jds` JDs (as .txt) under
+    `out_dir`, skipping files that already exist. Returns a manifest:
+    {"resumes": [{"path", "text", "skills"}], "jds": [{"path", "text", "skills"}]}.
+    """
+    skills = _load_skills(skills_json)
+    os.makedirs(os.path.join(out_dir, "resumes"), exist_ok=True)
+    os.makedirs(os.path.join(out_dir, "jds"), exist_ok=True)
+
+    manifest = {"resumes": [], "jds": []}
+    for i in range(n):
+        text, picked = make_resume(i, skills, seed)
+        path = os.path.join(out_dir, "resumes", f"resume_{i:05d}.{formats[i % len(formats)]}")
+        if not os.path.exists(path):
+            write_document(path, text)
+        manifest["resumes"].append({"path": path, "text": text, "skills": picked})
+    for j in range(n_jds):
+        text, required = make_jd(j, skills, seed)
+        path = os.path.join(out_dir, "jds", f"jd_{j:02d}.txt")
+        if not os.path.exists(path):
+            write_document(path, text)
+        manifest["jds"].append({"path": path, "text": text, "skills": required})
+    return manifest
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("out_dir")
+    ap.add_argument("--n", type=int, default=100, help="number of resumes")
+    ap.add_argument("--jds", type=int, default=5, help="number of JDs")
+    ap.add_argument("--formats", nargs="+", default=list(FORMATS), choices=FORMATS)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+    generate_corpus(args.out_dir, args.n, args.jds, tuple(args.formats), args.seed)
+    print(f"Wrote {args.n} resumes and {args.jds} JDs to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Load test for the HTTP scoring service (api.py): fires /score requests from
+a fixed number of concurrent clients and reports throughput and latency
+percentiles, plus the service's micro-batching stats.
+
+Start the service, then run from the repo root:
+    uvicorn api:app --port 8000
+    python -m benchmarks.load_test_api --url http://127.0.0.1:8000 --requests 1000 --concurrency 64
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter
+
+import httpx
+import numpy as np
+
+from benchmarks.bench_rank_batch import make_corpus
+
+
+async def run(url, n_requests, concurrency, n_jds):
+    _, _, resumes = make_corpus(max(n_requests // 4, 1))
+    jds = [make_corpus(1, seed=100 + s)[0] for s in range(n_jds)]
+    payloads = [
+        {"resume_text": resumes[i % len(resumes)]["text"], "jd_text": jds[i % n_jds]}
+        for i in range(n_requests)
+    ]
+
+    latencies, statuses = [], Counter()
+    queue = asyncio.Queue()
+    for p in payloads:
+        queue.put_nowait(p)
+
+    async def client(http):
+        while True:
+            try:
+                payload = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            start = time.perf_counter()
+            try:
+                response = await http.post(f"{url}/score", json=payload)
+                statuses[response.status_code] += 1
+                if response.status_code == 200:
+                    latencies.append(time.perf_counter() - start)
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=120, limits=limits) as http:
+        start = time.perf_counter()
+        await asyncio.gather(*(client(http) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        server_stats = (await http.get(f"{url}/stats")).json()
+    return latencies, statuses, elapsed, server_stats
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--url", default="http://127.0.0.1:8000")
+    ap.add_argument("--requests", type=int, default=1000)
+    ap.add_argument("--concurrency", type=int, default=64)
+    ap.add_argument("--jds", type=int, default=5, help="distinct JDs in the request mix")
+    args = ap.parse_args()
+
+    latencies, statuses, elapsed, server_stats = asyncio.run(
+        run(args.url.rstrip("/"), args.requests, args.concurrency, args.jds)
+    )
+    print(f"requests:    {args.requests} at concurrency {args.concurrency} in {elapsed:.2f}s")
+    print(f"throughput:  {len(latencies) / elapsed:.1f} successful requests/s")
+    print(f"statuses:    {dict(statuses)}")
+    if latencies:
+        p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+        print(f"latency ms:  p50 {p50:.1f}  p95 {p95:.1f}  p99 {p99:.1f}")
+    print(f"server:      {server_stats}")
+
+
+if __name__ == "__main__":
+    main()
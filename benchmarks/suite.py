@@ -0,0 +1,178 @@
+"""
+Stage-level benchmark suite. Times each stage of the ranking pipeline on its
+own, over a synthetic corpus (see benchmarks/corpus.py) at several sizes:
+
+    parse       ResumeParser.parse_batch over the .txt/.docx/.pdf files
+    skills      LocalSkillExtractor.extract_skills_batch
+    embed       EmbeddingEngine.get_embeddings_batch (disk cache off)
+    stats       StatisticalAnalyzer metrics + weighted overlap
+    rank        CompositeRanker.rank_batch, one JD (cache off)
+    end_to_end  parse -> skills -> rank_batch
+
+Results are saved as a JSON baseline. Compare mode re-runs the suite at the
+baseline's sizes (or reads --current) and exits non-zero when any stage's
+throughput drops by more than --threshold.
+
+Run from the repo root:
+    python -m benchmarks.suite run --sizes 10 100 1000 10000 --out benchmarks/baseline.json
+    python -m benchmarks.suite compare --baseline benchmarks/baseline.json --threshold 0.2
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import generate_corpus
+
+STAGES = ["parse", "skills", "embed", "stats", "rank", "end_to_end"]
+
+
+def _timed(fn, repeat):
+    """Best wall time of `repeat` runs (the least noisy estimate) and the last result."""
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run_suite(sizes, corpus_dir, skill_mode="matcher", stages=STAGES, repeat=1, workers=None):
+    from src.utils.parser import ResumeParser
+    from src.services.extractor import LocalSkillExtractor
+    from src.core.embeddings import EmbeddingEngine
+    from src.core.stats import StatisticalAnalyzer
+    from src.core.ranker import CompositeRanker
+
+    manifest = generate_corpus(corpus_dir, max(sizes))
+    jd = manifest["jds"][0]
+
+    parser = ResumeParser(use_cache=False)
+    extractor = LocalSkillExtractor(mode=skill_mode)
+    engine = EmbeddingEngine(use_cache=False)
+    analyzer = StatisticalAnalyzer()
+    ranker = CompositeRanker()
+    ranker.embed_engine.cache = None  # time the encoder, not the disk cache
+
+    # Warm-up: first calls pay for lazy model init and allocator growth
+    engine.get_embeddings_batch([jd["text"]])
+    extractor.extract_skills(jd["text"])
+
+    results = {}
+    for n in sorted(sizes):
+        docs = manifest["resumes"][:n]
+        files = [(os.path.basename(d["path"]), d["path"]) for d in docs]
+        texts = [d["text"] for d in docs]
+        resumes = [{"text": d["text"], "skills": d["skills"]} for d in docs]
+        jd_skills = extractor.extract_skills(jd["text"])
+
+        def end_to_end():
+            parsed = parser.parse_batch(files, max_workers=workers)
+            skills = extractor.extract_skills_batch(parsed)
+            return ranker.rank_batch(jd["text"], [{"text": t, "skills": s} for t, s in zip(parsed, skills)],
+                                     jd_skills=jd_skills)
+
+        bench = {
+            "parse": lambda: parser.parse_batch(files, max_workers=workers),
+            "skills": lambda: extractor.extract_skills_batch(texts),
+            "embed": lambda: engine.get_embeddings_batch(texts),
+            "stats": lambda: (analyzer.detect_metrics_batch(texts), analyzer.weighted_overlap_batch(jd["text"], texts)),
+            "rank": lambda: ranker.rank_batch(jd["text"], resumes, jd_skills=jd_skills),
+            "end_to_end": end_to_end,
+        }
+        results[str(n)] = {}
+        for stage in stages:
+            seconds, _ = _timed(bench[stage], repeat)
+            results[str(n)][stage] = {"seconds": seconds, "docs_per_s": n / seconds if seconds else None}
+            print(f"n={n:<6} {stage:<11} {seconds:9.3f}s  {n / seconds:10.1f} docs/s", flush=True)
+    parser.close()
+
+    return {
+        "meta": {
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "embedding_model": engine.model_name,
+            "skill_mode": skill_mode,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold):
+    """(report lines, regressions): throughput changes per size and stage."""
+    lines, regressions = [], []
+    for size, stages in baseline["results"].items():
+        for stage, base in stages.items():
+            cur = current["results"].get(size, {}).get(stage)
+            if cur is None or not base.get("docs_per_s") or not cur.get("docs_per_s"):
+                continue
+            change = cur["docs_per_s"] / base["docs_per_s"] - 1
+            flag = ""
+            if change < -threshold:
+                flag = "  REGRESSION"
+                regressions.append((size, stage, change))
+            lines.append(f"n={size:<6} {stage:<11} {base['docs_per_s']:10.1f} -> {cur['docs_per_s']:10.1f} docs/s "
+                         f"({change:+.0%}){flag}")
+    return lines, regressions
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    def common(p):
+        p.add_argument("--corpus-dir", default=None, help="where to generate the corpus (default: a temp dir)")
+        p.add_argument("--skill-mode", default=os.getenv("SKILL_EXTRACTION_MODE", "matcher"), choices=["ner", "matcher"])
+        p.add_argument("--stages", nargs="+", default=STAGES, choices=STAGES)
+        p.add_argument("--repeat", type=int, default=1, help="runs per stage; the best is kept")
+        p.add_argument("--workers", type=int, default=None, help="parser processes")
+
+    run_p = sub.add_parser("run", help="run the suite and write a baseline")
+    run_p.add_argument("--sizes", nargs="+", type=int, default=[10, 100, 1000, 10000])
+    run_p.add_argument("--out", default="benchmarks/baseline.json")
+    common(run_p)
+
+    cmp_p = sub.add_parser("compare", help="compare against a baseline")
+    cmp_p.add_argument("--baseline", default="benchmarks/baseline.json")
+    cmp_p.add_argument("--current", default=None, help="a results file to compare (default: run the suite now)")
+    cmp_p.add_argument("--threshold", type=float, default=0.2, help="allowed throughput drop (0.2 = 20%%)")
+    common(cmp_p)
+    args = ap.parse_args()
+
+    if args.command == "compare":
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+    if args.command == "compare" and args.current:
+        with open(args.current, "r") as f:
+            current = json.load(f)
+    else:
+        sizes = args.sizes if args.command == "run" else [int(s) for s in baseline["results"]]
+        with tempfile.TemporaryDirectory() as tmp:
+            current = run_suite(sizes, args.corpus_dir or tmp, args.skill_mode, args.stages,
+                                args.repeat, args.workers)
+
+    if args.command == "run":
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"Baseline written to {args.out}")
+        return
+
+    lines, regressions = compare(baseline, current, args.threshold)
+    print("\n".join(lines))
+    if regressions:
+        print(f"{len(regressions)} stage(s) regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+    print("No regressions")
+
+
+if __name__ == "__main__":
+    main()
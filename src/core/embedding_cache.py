@@ -0,0 +1,207 @@
+import os
+import json
+import time
+import atexit
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """
+    Persistent, content-addressed store for document embeddings.
+
+    Vectors live in a memory-mapped float32 matrix (`vectors.f32`) with one
+    row per cached text; `index.sqlite` maps each content key to its row.
+    When the matrix is full the least recently used row is overwritten.
+    With dtype="float16" the matrix (`vectors.f16`) takes half the disk and
+    page cache; lookups still return float32.
+
+    Several processes (the app, batch_rank.py, api.py) can share one
+    directory: rows are handed out and reclaimed inside SQLite write
+    transactions, so two writers never get the same row, and a put only
+    writes the rows it touched instead of rewriting the whole index.
+    Processes sharing a directory should use the same `max_entries`.
+    """
+
+    INDEX_FILE = "index.sqlite"
+    VECTORS_FILES = {"float32": "vectors.f32", "float16": "vectors.f16"}
+
+    def __init__(self, cache_dir, model_name, dim, max_entries=50000, dtype="float32"):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.model_name = model_name
+        self.dim = int(dim)
+        self.max_entries = int(max_entries)
+        self.dtype = np.dtype(dtype)
+        self.vectors_file = self.VECTORS_FILES[self.dtype.name]
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(self.cache_dir, self.INDEX_FILE),
+                                     check_same_thread=False, timeout=60, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+
+        # Counters (reset with reset_stats)
+        self.hits = 0
+        self.misses = 0
+        self.encode_seconds = 0.0
+        self.encoded = 0
+
+        self._open()
+        # Dirty vector pages are written by the OS anyway; this just makes it prompt at exit
+        atexit.register(self.flush)
+
+    # --- Keys ---
+    @staticmethod
+    def normalize(text):
+        """Collapses whitespace so re-extracted copies of a document share a key."""
+        return " ".join(text.split())
+
+    def key(self, text):
+        payload = f"{self.model_name}\n{self.normalize(text)}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    # --- Storage ---
+    @contextmanager
+    def _transaction(self):
+        """This thread and, via SQLite's write lock, every other process wait their turn."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _meta(self, conn, name, default=None):
+        row = conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def _set_meta(self, conn, name, value):
+        conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, json.dumps(value)))
+
+    def _open(self):
+        vectors_path = os.path.join(self.cache_dir, self.vectors_file)
+        with self._transaction() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    row INTEGER NOT NULL UNIQUE,
+                    last_access REAL NOT NULL
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_access)")
+
+            # A different model, vector size or storage type makes the old cache useless
+            layout = {"model": self.model_name, "dim": self.dim, "dtype": self.dtype.name}
+            fresh = self._meta(conn, "layout") != layout or not os.path.exists(vectors_path)
+            if fresh:
+                conn.execute("DELETE FROM entries")
+                self._set_meta(conn, "layout", layout)
+                self._set_meta(conn, "next_row", 0)
+                with open(vectors_path, "wb"):
+                    pass
+
+            # Capacity changed: rows past the new end are dropped
+            capacity = self._meta(conn, "capacity")
+            if capacity is not None and capacity > self.max_entries:
+                conn.execute("DELETE FROM entries WHERE row >= ?", (self.max_entries,))
+                self._set_meta(conn, "next_row", min(self._meta(conn, "next_row", 0), self.max_entries))
+            self._set_meta(conn, "capacity", self.max_entries)
+
+            size = self.max_entries * self.dim * self.dtype.itemsize
+            if os.path.getsize(vectors_path) != size:
+                os.truncate(vectors_path, size)
+            self._vectors = np.memmap(vectors_path, dtype=self.dtype, mode="r+",
+                                      shape=(self.max_entries, self.dim))
+
+        # The JSON index of older versions is superseded by index.sqlite
+        old_index = os.path.join(self.cache_dir, "index.json")
+        if os.path.exists(old_index):
+            os.remove(old_index)
+
+    def flush(self):
+        """Writes dirty vector pages to disk (the index is committed on every put)."""
+        self._vectors.flush()
+
+    # --- Lookups ---
+    def get_many(self, keys):
+        """
+        Returns (vectors, missing): a dict of key -> vector copy for cache
+        hits, and the list of positions in `keys` that were not cached.
+        """
+        found, missing = {}, []
+        now = time.time()
+        # A write transaction: marks the hits as recently used, and no other
+        # process can recycle a row between reading its number and its vector
+        with self._transaction() as conn:
+            for i, k in enumerate(keys):
+                row = conn.execute("SELECT row FROM entries WHERE key = ?", (k,)).fetchone()
+                if row is None or row[0] >= self.max_entries:
+                    missing.append(i)
+                    continue
+                found[k] = np.array(self._vectors[row[0]], dtype=np.float32)
+            if found:
+                conn.executemany("UPDATE entries SET last_access = ? WHERE key = ?", [(now, k) for k in found])
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+        return found, missing
+
+    def put_many(self, keys, vectors):
+        now = time.time()
+        with self._transaction() as conn:
+            next_row = self._meta(conn, "next_row", 0)
+            for k, vec in zip(keys, vectors):
+                row = conn.execute("SELECT row FROM entries WHERE key = ?", (k,)).fetchone()
+                if row is not None:
+                    row = row[0]
+                elif next_row < self.max_entries:
+                    row = next_row
+                    next_row += 1
+                else:
+                    # LRU eviction: recycle the oldest row (the unary + keeps SQLite on the LRU index)
+                    row = conn.execute(
+                        "SELECT row FROM entries WHERE +row < ? ORDER BY last_access LIMIT 1", (self.max_entries,)
+                    ).fetchone()[0]
+                    conn.execute("DELETE FROM entries WHERE row = ?", (row,))
+                self._vectors[row] = vec
+                conn.execute("INSERT OR REPLACE INTO entries (key, row, last_access) VALUES (?, ?, ?)", (k, row, now))
+            self._set_meta(conn, "next_row", next_row)
+
+    def clear(self):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM entries")
+            self._set_meta(conn, "next_row", 0)
+
+    # --- Metrics ---
+    def record_encode(self, n_texts, seconds):
+        self.encoded += n_texts
+        self.encode_seconds += seconds
+
+    def reset_stats(self):
+        self.hits = self.misses = self.encoded = 0
+        self.encode_seconds = 0.0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        per_text = self.encode_seconds / self.encoded if self.encoded else 0.0
+        return {
+            "entries": len(self),
+            "capacity": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "encode_seconds": self.encode_seconds,
+            # Estimate: every hit would have cost one average encode
+            "estimated_seconds_saved": self.hits * per_text,
+        }
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
@@ -1,34 +1,279 @@
+import os
+import re
+import time
+import threading
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+from src.core.embedding_cache import EmbeddingCache
+from src.core.model_registry import registry
+from src.utils.tracing import tracer
+
+# The model shared by the ranker (and, when configured, the coach)
+DEFAULT_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+
+def resolve_backend(backend=None, threads=None):
+    """(backend, threads) after the EMBEDDING_BACKEND / EMBEDDING_THREADS overrides."""
+    return os.getenv("EMBEDDING_BACKEND", backend or "torch"), int(os.getenv("EMBEDDING_THREADS", threads or 0)) or None
+
+# One EmbeddingCache per (directory, model, dtype), shared by every engine in
+# the process: two writers would clobber each other's index. Kept out of the
+# model registry so caches don't show up in its memory report.
+_caches = {}
+_caches_lock = threading.Lock()
+
+def _shared_cache(key, loader):
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = loader()
+        return cache
+
+_BLOCKS = re.compile(r"\n\s*\n")
+_SENTENCES = re.compile(r"(?<=[.!?])\s+|\n")
+
+def split_chunks(text, max_chars=800):
+    """
+    Cuts a document into chunks of at most `max_chars`, along its own seams:
+    blank-line sections first, then lines/sentences, then a hard cut for
+    anything still too long. Short neighbours (a heading and its bullets)
+    are packed together. Unchanged sections give identical chunks, so an
+    edit only produces new chunks where the text actually changed.
+    """
+    pieces = []
+    for block in _BLOCKS.split(text):
+        block = block.strip()
+        if len(block) <= max_chars:
+            pieces.append(block)
+            continue
+        for sentence in _SENTENCES.split(block):
+            sentence = sentence.strip()
+            pieces.extend(sentence[i:i + max_chars] for i in range(0, len(sentence), max_chars))
+
+    chunks, current = [], ""
+    for piece in pieces:
+        if not piece:
+            continue
+        if current and len(current) + 1 + len(piece) > max_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current}\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks or [text]
 
 class EmbeddingEngine:
-    def __init__(self, model_name: str = 'all-MiniLM-L6-v2'):
+    def __init__(self, model_name: str = DEFAULT_MODEL, cache_dir: str = None,
+                 use_cache: bool = True, cache_size: int = 50000,
+                 backend: str = None, threads: int = None, float16: bool = None,
+                 chunked: bool = None, chunk_chars: int = None, pooling: str = None):
         """
         Initializes the Transformer model.
         'all-MiniLM-L6-v2' is fast, balanced model mapping text to 38f dimentions.
+        The model comes from the process-wide registry, so every engine built
+        with the same name shares one SentenceTransformer.
+
+        Embeddings are memoized on disk (see EmbeddingCache) so re-ranking the
+        same resumes against a tweaked JD skips the encoder.
+        Priority for the cache location: Env Var > Argument > Default Local Path.
+
+        CPU speed-ups (Env Var > Argument > Default):
+        - backend (EMBEDDING_BACKEND): "torch" (fp32, default), "int8" (dynamic
+          quantization) or "onnx" (onnxruntime). Check the drift against fp32
+          with `python -m benchmarks.bench_embedding_parity` before switching.
+        - threads (EMBEDDING_THREADS): intra-op threads for the encoder.
+        - float16 (EMBEDDING_FLOAT16=1): vectors are rounded to half precision
+          and cached as float16, halving the cache's disk and page-cache use.
+
+        Long documents (Env Var > Argument > Default):
+        - chunked (EMBEDDING_CHUNKED=1): resumes are split into sections (see
+          split_chunks) and each chunk is embedded, so nothing is lost to the
+          model's 256-token limit. Chunks are cached by content hash, so
+          re-scoring an edited resume only encodes the chunks that changed.
+        - chunk_chars (EMBEDDING_CHUNK_CHARS): chunk size, default 800 (about
+          200 tokens).
+        - pooling (EMBEDDING_POOLING): "mean" scores the length-weighted mean
+          of the chunk vectors (default), "max" the best-matching chunk.
         """
-        self.model = SentenceTransformer(model_name)
+        self.model_name = model_name
+        self.backend, threads = resolve_backend(backend, threads)
+        self.float16 = os.getenv("EMBEDDING_FLOAT16", "1" if float16 else "0") == "1"
+        self.chunked = os.getenv("EMBEDDING_CHUNKED", "1" if chunked else "0") == "1"
+        self.chunk_chars = int(os.getenv("EMBEDDING_CHUNK_CHARS", chunk_chars or 800))
+        self.pooling = os.getenv("EMBEDDING_POOLING", pooling or "mean")
+        if self.pooling not in ("mean", "max"):
+            raise ValueError(f"Unknown pooling: {self.pooling}")
+        self.last_chunk_stats = {}
+        if threads and self.backend != "onnx":
+            # torch's thread pool is shared by the whole process
+            import torch
+            torch.set_num_threads(threads)
+        self.model = registry.sentence_transformer(model_name, backend=self.backend, threads=threads)
+
+        self.cache = None
+        if use_cache:
+            cache_dir = os.path.abspath(os.getenv("EMBEDDING_CACHE_DIR", cache_dir or "./embedding_cache"))
+            # Quantized backends and float16 give slightly different vectors, so each gets its own cache
+            cache_model = model_name if self.backend == "torch" else f"{model_name}@{self.backend}"
+            dtype = "float16" if self.float16 else "float32"
+            variant = [v for v in (self.backend, dtype) if v not in ("torch", "float32")]
+            if variant:
+                cache_dir = os.path.join(cache_dir, "-".join(variant))
+            self.cache = _shared_cache(
+                (cache_dir, cache_model, dtype),
+                lambda: EmbeddingCache(
+                    cache_dir,
+                    model_name=cache_model,
+                    dim=self.model.get_sentence_embedding_dimension(),
+                    max_entries=cache_size,
+                    dtype=dtype,
+                ),
+            )
+
+    def _encode(self, texts, batch_size: int = 32) -> np.ndarray:
+        start = time.perf_counter()
+        vectors = self.model.encode(
+            texts,
+            batch_size=batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+        )
+        if self.float16:
+            # Same values whether they came from the encoder or the cache
+            vectors = vectors.astype(np.float16).astype(np.float32)
+        if self.cache is not None:
+            self.cache.record_encode(len(texts), time.perf_counter() - start)
+        return vectors
 
     def get_embeddings(self, text: str):
         """
         Converts text into a numerical vector (Embedding).
         """
-        return self.model.encode(text)
+        return self.get_embeddings_batch([text])[0]
+
+    def get_embeddings_batch(self, texts, batch_size: int = 32) -> np.ndarray:
+        """
+        Encodes many texts in one pass and returns an (N, dim) matrix of
+        L2-normalized float32 vectors, in the same order as `texts`.
+
+        Texts are sorted by length before being cut into mini-batches so each
+        batch pads to a similar sequence length (less wasted CPU on padding).
+        Texts already in the cache are not re-encoded.
+        """
+        return self._embed(list(texts), batch_size)[0]
+
+    def _embed(self, texts, batch_size=32):
+        """get_embeddings_batch, plus how many texts went through the encoder."""
+        vectors = np.empty((len(texts), self.model.get_sentence_embedding_dimension()), dtype=np.float32)
+        if not texts:
+            return vectors, 0
+
+        # 1. Serve what we can from the cache
+        todo = list(range(len(texts)))
+        if self.cache is not None:
+            keys = [self.cache.key(t) for t in texts]
+            found, todo = self.cache.get_many(keys)
+            for i, k in enumerate(keys):
+                if k in found:
+                    vectors[i] = found[k]
+            if not todo:
+                return vectors, 0
+
+        # 2. Longest first, so the slowest batches run while the CPU is warm
+        order = sorted(todo, key=lambda i: len(texts[i]), reverse=True)
+
+        # 3. Encode each length-homogeneous mini-batch
+        for start in range(0, len(order), batch_size):
+            idx = order[start:start + batch_size]
+            vectors[idx] = self._encode([texts[i] for i in idx], batch_size=batch_size)
+
+        if self.cache is not None:
+            self.cache.put_many([keys[i] for i in order], vectors[order])
+        return vectors, len(order)
+
+    # --- Chunked documents ---
+    def _embed_chunks(self, texts, batch_size=32):
+        """
+        Chunk vectors for every document, grouped by document.
+        Returns (vectors, starts, weights): rows starts[d]:starts[d+1] belong
+        to document d, weights are chunk lengths. Repeated chunks are
+        embedded once.
+        """
+        doc_chunks = [split_chunks(t, self.chunk_chars) for t in texts]
+        flat = [c for chunks in doc_chunks for c in chunks]
+        unique = list(dict.fromkeys(flat))
+        with tracer.span("embed_chunks", docs=len(texts)) as span:
+            unique_vectors, encoded = self._embed(unique, batch_size)
+            self.last_chunk_stats = {
+                "documents": len(texts),
+                "chunks": len(flat),
+                "recomputed": encoded,
+                "reused": len(flat) - encoded,
+            }
+            span.set(chunks=len(flat), recomputed=encoded)
+        row = {c: i for i, c in enumerate(unique)}
+        vectors = unique_vectors[[row[c] for c in flat]] if flat else unique_vectors
+        starts = np.cumsum([0] + [len(chunks) for chunks in doc_chunks])
+        weights = np.array([len(c) for c in flat], dtype=np.float32)
+        return vectors, starts, weights
+
+    def embed_documents(self, texts, batch_size: int = 32) -> np.ndarray:
+        """
+        One unit vector per document: get_embeddings_batch, or with chunking
+        on, the length-weighted mean of each document's chunk vectors.
+        """
+        texts = list(texts)
+        if not self.chunked or not texts:
+            return self.get_embeddings_batch(texts, batch_size=batch_size)
+        vectors, starts, weights = self._embed_chunks(texts, batch_size)
+        pooled = np.add.reduceat(vectors * weights[:, None], starts[:-1], axis=0)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled / np.where(norms > 0, norms, 1)
+
+    def score_documents(self, texts, queries, batch_size: int = 32) -> np.ndarray:
+        """
+        Cosine scores of documents (resumes) against query vectors (JDs):
+        an (N, M) matrix for `queries` of shape (M, dim). With chunking on,
+        chunk scores are pooled per document as set by `pooling`.
+        """
+        texts = list(texts)
+        if not self.chunked or not texts or self.pooling == "mean":
+            return self.embed_documents(texts, batch_size=batch_size) @ queries.T
+        vectors, starts, _ = self._embed_chunks(texts, batch_size)
+        return np.maximum.reduceat(vectors @ queries.T, starts[:-1], axis=0)
+
+    def chunk_stats(self):
+        """Chunks reused (cache or repeats) vs. re-encoded by the last chunked call."""
+        return dict(self.last_chunk_stats)
 
     def calculate_similarity(self, resume_text: str, jd_text: str) -> float:
         """
         The mathematical core: Calculates the Cosine Similarity between two vectors.
         """
-        # 1. Generate Vectors
-        resume_vector = self.get_embeddings(resume_text).reshape(1, -1)
-        jd_vector = self.get_embeddings(jd_text).reshape(1, -1)
+        if self.chunked:
+            jd_vector = self.get_embeddings_batch([jd_text])
+            return float(self.score_documents([resume_text], jd_vector)[0, 0])
+
+        # 1. Generate Vectors (unit length, cache-aware)
+        resume_vector, jd_vector = self.get_embeddings_batch([resume_text, jd_text])
 
         # 2. Compute Cosine Similarity
-        # Formula: cos(theta) = (A . B) / (||A|| * ||B||)
-        similarity_score = cosine_similarity(resume_vector, jd_vector)[0][0]
+        # Formula: cos(theta) = (A . B) / (||A|| * ||B||), and ||A|| = ||B|| = 1
+        similarity_score = np.dot(resume_vector, jd_vector)
 
         return float(similarity_score)
-        
-        
-        
\ No newline at end of file
+
+    def calculate_similarity_batch(self, resume_texts, jd_text: str, batch_size: int = 32) -> np.ndarray:
+        """
+        Cosine Similarity of one JD against many resumes.
+        The JD is encoded once; because every vector is already unit length,
+        all scores come out of a single matrix-vector product.
+        """
+        jd_vector = self.get_embeddings_batch([jd_text])[0]
+        if self.chunked:
+            return self.score_documents(resume_texts, jd_vector[None, :], batch_size=batch_size)[:, 0]
+        resume_matrix = self.get_embeddings_batch(resume_texts, batch_size=batch_size)
+        return resume_matrix @ jd_vector
+
+    def cache_stats(self):
+        """Hit/miss counters and estimated encode time saved by the cache."""
+        return self.cache.stats() if self.cache is not None else {}
@@ -1,37 +1,62 @@
-import spacy
 import json
+from src.core.model_registry import registry
 from src.core.ranker import CompositeRanker
+from src.services.skill_matcher import SkillMatcher
+from src.utils.tracing import tracer
 
 class ATSPipeline:
-    def __init__(self, model_path="./output/model-last", skills_json="skills_list.json"):
-        # 1. Load the "First Model" we refined
-        self.nlp = spacy.load(model_path)
+    def __init__(self, model_path="./output/model-last", skills_json="skills_list.json",
+                 skill_mode="ner", aliases_json="skill_aliases.json"):
+        # skill_mode: "ner" (AI extracts, JSON verifies) or "matcher" (compiled skills dictionary)
+        if skill_mode not in ("ner", "matcher"):
+            raise ValueError(f"Unknown extraction mode: {skill_mode}")
+        self.skill_mode = skill_mode
+
+        # 1. Load the "First Model" we refined (only the NER path needs it)
+        self.nlp = registry.spacy(model_path) if skill_mode == "ner" else None
         
         # 2. Load the Verified Skills List
         with open(skills_json, "r") as f:
             self.verified_skills = set(json.load(f))
+        self.matcher = SkillMatcher.from_files(skills_json, aliases_json) if skill_mode == "matcher" else None
             
         # 3. Initialize your sophisticated Ranker
         self.ranker = CompositeRanker()
 
     def extract_verified_skills(self, text):
         """Uses the Hybrid approach: AI extracts, JSON verifies."""
+        if self.matcher is not None:
+            return self.matcher.extract(text)
+
         doc = self.nlp(text)
         # Only keep it if it's in our master list (Filter out 'I', '5', etc.)
         return [ent.text for ent in doc.ents if ent.text in self.verified_skills]
 
+    def extract_verified_skills_batch(self, texts, batch_size=64, n_process=1):
+        """Batched extract_verified_skills via nlp.pipe (NER components only)."""
+        texts = list(texts)
+        if self.matcher is not None:
+            return [self.matcher.extract(t) for t in texts]
+
+        keep = {"ner", "tok2vec", "transformer"}
+        disable = [name for name in self.nlp.pipe_names if name not in keep]
+        docs = self.nlp.pipe(texts, batch_size=batch_size, n_process=n_process, disable=disable)
+        return [[ent.text for ent in doc.ents if ent.text in self.verified_skills] for doc in docs]
+
     def process_candidate(self, resume_text, jd_text):
         # Step A: Extract clean skills from both texts
-        resume_skills = self.extract_verified_skills(resume_text)
-        jd_skills = self.extract_verified_skills(jd_text)
+        with tracer.span("skills", docs=1):
+            resume_skills = self.extract_verified_skills(resume_text)
+            jd_skills = self.extract_verified_skills(jd_text)
         
         # Step B: Pass clean data into your CompositeRanker
-        results = self.ranker.get_composite_score(
-            resume_text=resume_text,
-            jd_text=jd_text,
-            resume_skills=resume_skills,
-            jd_skills=jd_skills
-        )
+        with tracer.span("rank", docs=1):
+            results = self.ranker.get_composite_score(
+                resume_text=resume_text,
+                jd_text=jd_text,
+                resume_skills=resume_skills,
+                jd_skills=jd_skills
+            )
         
         # Add the extracted skills to the output for transparency
         results["extracted_resume_skills"] = resume_skills
@@ -39,6 +64,44 @@ class ATSPipeline:
         
         return results
 
+    def process_candidates(self, resume_texts, jd_text, batch_size=64, n_process=1):
+        """
+        Batch version of process_candidate: the JD goes through NER and the
+        embedder once, resumes go through both in batches.
+        """
+        resume_texts = list(resume_texts)
+        with tracer.span("skills", docs=len(resume_texts)):
+            jd_skills = self.extract_verified_skills(jd_text)
+            all_resume_skills = self.extract_verified_skills_batch(resume_texts, batch_size, n_process)
+
+        resumes = [{"text": t, "skills": s} for t, s in zip(resume_texts, all_resume_skills)]
+        with tracer.span("rank", docs=len(resumes)):
+            all_results = self.ranker.rank_batch(jd_text, resumes, jd_skills=jd_skills)
+        for results, resume_skills in zip(all_results, all_resume_skills):
+            results["extracted_resume_skills"] = resume_skills
+            results["extracted_jd_skills"] = jd_skills
+        return all_results
+
+    def process_pairs(self, pairs, batch_size=64):
+        """
+        process_candidate for many (resume_text, jd_text) pairs with possibly
+        different JDs (e.g. concurrent API requests). Each distinct text goes
+        through NER and the embedder once.
+        """
+        pairs = list(pairs)
+        unique = list(dict.fromkeys(text for pair in pairs for text in pair))
+        with tracer.span("skills", docs=len(unique)):
+            skills = dict(zip(unique, self.extract_verified_skills_batch(unique, batch_size)))
+
+        with tracer.span("rank", docs=len(pairs)):
+            all_results = self.ranker.score_pairs(
+                [({"text": r, "skills": skills[r]}, {"text": j, "skills": skills[j]}) for r, j in pairs]
+            )
+        for results, (resume_text, jd_text) in zip(all_results, pairs):
+            results["extracted_resume_skills"] = skills[resume_text]
+            results["extracted_jd_skills"] = skills[jd_text]
+        return all_results
+
 # --- QUICK TEST ---
 if __name__ == "__main__":
     pipeline = ATSPipeline()
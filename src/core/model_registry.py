@@ -0,0 +1,131 @@
+import os
+import sys
+import time
+import threading
+
+def _rss_bytes():
+    """Current resident set size of this process (0 if it can't be read)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        # Peak, not current, RSS; kilobytes on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except Exception:
+        return 0
+
+def _param_bytes(model):
+    """Size of a torch module's weights, if it is one."""
+    try:
+        return sum(p.numel() * p.element_size() for p in model.parameters())
+    except Exception:
+        return None
+
+class ModelRegistry:
+    """
+    Process-wide home for heavy models. Each model is loaded lazily the first
+    time it is asked for and the same instance is handed to every caller, so
+    the ranker, extractor, pipeline and coach never hold duplicate copies.
+
+    Loads are serialized under one lock, which also keeps the per-model RSS
+    deltas in memory_report() from bleeding into each other.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._models = {}
+        self._stats = {}
+
+    def get(self, key, loader):
+        """Returns the instance stored under `key`, calling loader() on first use."""
+        model = self._models.get(key)
+        if model is not None:
+            return model
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                rss_before = _rss_bytes()
+                start = time.perf_counter()
+                model = loader()
+                self._stats[key] = {
+                    "load_seconds": time.perf_counter() - start,
+                    "rss_mb": max(_rss_bytes() - rss_before, 0) / 2**20,
+                    "weights_mb": (_param_bytes(model) or 0) / 2**20,
+                }
+                self._models[key] = model
+        return model
+
+    # --- Typed loaders ---
+    def spacy(self, model_path):
+        def load():
+            import spacy
+            return spacy.load(model_path)
+        return self.get(("spacy", os.path.abspath(model_path) if os.path.exists(model_path) else model_path), load)
+
+    def sentence_transformer(self, model_name, backend="torch", threads=None, onnx_file=None, **kwargs):
+        """
+        - backend: "torch" (fp32), "int8" (torch dynamic int8 quantization of
+          the Linear layers, CPU only) or "onnx" (onnxruntime; needs
+          `pip install sentence-transformers[onnx]`).
+        - threads: intra-op threads for the onnxruntime session (torch's
+          thread pool is process-wide; see EmbeddingEngine).
+        - onnx_file: which exported graph to run, e.g. the pre-quantized
+          "onnx/model_qint8_avx512_vnni.onnx" shipped with the MiniLM repo.
+        """
+        def load():
+            from sentence_transformers import SentenceTransformer
+            if backend == "onnx":
+                import onnxruntime
+                model_kwargs = dict(kwargs.pop("model_kwargs", None) or {}, provider="CPUExecutionProvider")
+                if onnx_file:
+                    model_kwargs["file_name"] = onnx_file
+                if threads:
+                    options = onnxruntime.SessionOptions()
+                    options.intra_op_num_threads = threads
+                    model_kwargs["session_options"] = options
+                return SentenceTransformer(model_name, backend="onnx", model_kwargs=model_kwargs, **kwargs)
+            model = SentenceTransformer(model_name, **kwargs)
+            if backend == "int8":
+                import torch
+                model = torch.quantization.quantize_dynamic(model.cpu(), {torch.nn.Linear}, dtype=torch.qint8)
+            elif backend != "torch":
+                raise ValueError(f"Unknown embedding backend: {backend}")
+            return model
+
+        label = model_name if backend == "torch" else f"{model_name} ({backend})"
+        key = ("sentence_transformer", label, tuple(sorted((k, repr(v)) for k, v in kwargs.items())))
+        if backend == "onnx":
+            key += (threads, onnx_file)
+        return self.get(key, load)
+
+    def hf_embedding(self, model_name, device=None):
+        """LlamaIndex HuggingFaceEmbedding (used by the coach's vector index)."""
+        def load():
+            from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+            if device:
+                return HuggingFaceEmbedding(model_name=model_name, device=device)
+            return HuggingFaceEmbedding(model_name=model_name)
+        return self.get(("hf_embedding", model_name, device), load)
+
+    # --- Introspection ---
+    def loaded(self):
+        return list(self._models)
+
+    def memory_report(self):
+        """One row per loaded model: load time, RSS growth while loading, weight size."""
+        return [
+            {"model": " / ".join(str(part) for part in key[:2]), **stats}
+            for key, stats in self._stats.items()
+        ]
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+            self._stats.clear()
+
+# The shared instance everything in the app should use
+registry = ModelRegistry()
@@ -1,15 +1,24 @@
+import heapq
 import numpy as np
 from src.core.embeddings import EmbeddingEngine
 from src.core.stats import StatisticalAnalyzer
 
 class CompositeRanker:
     # Change default weights here for a more stable score
-    def __init__(self, semantic_weight=0.5, keyword_weight=0.3, impact_weight=0.2):
+    def __init__(self, semantic_weight=0.5, keyword_weight=0.3, impact_weight=0.2,
+                 overlap_weight=0.0, idf_path=None):
+        """
+        - overlap_weight: optional 4th component, the IDF-weighted term overlap
+          from StatisticalAnalyzer (off by default). Reduce the other weights
+          when enabling it so they still sum to 1.
+        - idf_path: reference-corpus IDF model for that component.
+        """
         self.embed_engine = EmbeddingEngine()
-        self.stats_engine = StatisticalAnalyzer()
+        self.stats_engine = StatisticalAnalyzer(idf_path=idf_path)
         self.w1 = semantic_weight # 50%
         self.w2 = keyword_weight # 30% 
         self.w3 = impact_weight # 20%
+        self.w4 = overlap_weight # 0% (opt-in)
 
     def get_semantic_match(self, resume_text, jd_text):
         """
@@ -55,10 +64,197 @@ class CompositeRanker:
 
         # Weighting logic
         total_score = (semantic_score * self.w1) + (keyword_score * self.w2) + (impact_score * self.w3)
-    
-        return {
+        results = {
             "total_score": total_score,
             "semantic_match": semantic_score,
             "keyword_match": keyword_score,
             "impact_score": impact_score
-        }
\ No newline at end of file
+        }
+
+        # 4. (Optional) IDF-weighted term overlap
+        if self.w4:
+            overlap_score = self.stats_engine.calculate_weighted_overlap(resume_text, jd_text)
+            results["weighted_overlap"] = overlap_score
+            results["total_score"] += overlap_score * self.w4
+    
+        return results
+
+    def rank_batch(self, jd_text, resumes, jd_skills=None, batch_size=32):
+        """
+        Scores many resumes against one JD in a single pass.
+        - resumes: list of resume texts, or dicts with a 'text' key and an
+          optional 'skills' key (the NER output for that resume).
+        Returns one score dict per resume (same keys as get_composite_score),
+        in the same order as `resumes`.
+        """
+        texts = [r if isinstance(r, str) else r["text"] for r in resumes]
+        skills = [None if isinstance(r, str) else r.get("skills") for r in resumes]
+
+        # 1. Semantic Vibe: JD encoded once, resumes in length-sorted batches
+        semantic_scores = self.embed_engine.calculate_similarity_batch(texts, jd_text, batch_size=batch_size)
+
+        # 4. (Optional) IDF-weighted overlap: one sparse matrix-vector product
+        overlap_scores = self.stats_engine.weighted_overlap_batch(jd_text, texts) if self.w4 else None
+
+        # 3. Quantifiable Impact: one scanner pass per resume
+        impact_scores = [score for _, score in self.stats_engine.detect_metrics_batch(texts)]
+
+        results = []
+        for i, (res_skills, semantic_score, impact_score) in enumerate(zip(skills, semantic_scores, impact_scores)):
+            # 2. Keyword Accuracy
+            keyword_score = self.get_keyword_match(res_skills, jd_skills)
+
+            semantic_score = float(semantic_score)
+            total_score = (semantic_score * self.w1) + (keyword_score * self.w2) + (impact_score * self.w3)
+            scores = {
+                "total_score": total_score,
+                "semantic_match": semantic_score,
+                "keyword_match": keyword_score,
+                "impact_score": impact_score
+            }
+            if overlap_scores is not None:
+                scores["weighted_overlap"] = float(overlap_scores[i])
+                scores["total_score"] += scores["weighted_overlap"] * self.w4
+            results.append(scores)
+        return results
+
+    def score_pairs(self, pairs, batch_size=32):
+        """
+        Scores (resume, JD) pairs that don't necessarily share a JD, e.g. one
+        micro-batch of API requests.
+        - pairs: (resume, jd) tuples; each side is a text or a dict with a
+          'text' key and an optional 'skills' key.
+        Every distinct text is embedded once, every distinct resume scanned
+        for metrics once. Returns score dicts like get_composite_score's.
+        """
+        pairs = [
+            tuple(side if isinstance(side, dict) else {"text": side} for side in pair)
+            for pair in pairs
+        ]
+        resume_texts = list(dict.fromkeys(resume["text"] for resume, _ in pairs))
+        jd_texts = list(dict.fromkeys(jd["text"] for _, jd in pairs))
+        resume_row = {t: i for i, t in enumerate(resume_texts)}
+        jd_row = {t: i for i, t in enumerate(jd_texts)}
+        # Resumes x JDs; the few JDs in a micro-batch keep this small
+        jd_matrix = self.embed_engine.get_embeddings_batch(jd_texts, batch_size=batch_size)
+        semantic = self.embed_engine.score_documents(resume_texts, jd_matrix, batch_size=batch_size)
+        impact = {t: score for t, (_, score) in zip(resume_texts, self.stats_engine.detect_metrics_batch(resume_texts))}
+
+        results = []
+        for resume, jd in pairs:
+            semantic_score = float(semantic[resume_row[resume["text"]], jd_row[jd["text"]]])
+            keyword_score = self.get_keyword_match(resume.get("skills"), jd.get("skills"))
+            impact_score = impact[resume["text"]]
+            scores = {
+                "total_score": (semantic_score * self.w1) + (keyword_score * self.w2) + (impact_score * self.w3),
+                "semantic_match": semantic_score,
+                "keyword_match": keyword_score,
+                "impact_score": impact_score
+            }
+            if self.w4:
+                scores["weighted_overlap"] = self.stats_engine.calculate_weighted_overlap(resume["text"], jd["text"])
+                scores["total_score"] += scores["weighted_overlap"] * self.w4
+            results.append(scores)
+        return results
+
+    def rank_matrix(self, jds, resumes, k=10, max_memory_mb=256, batch_size=32):
+        """
+        Scores M JDs against N resumes and keeps only the best `k` resumes per JD.
+        - jds / resumes: texts, or dicts with a 'text' key and an optional
+          'skills' key (as in rank_batch).
+        - max_memory_mb: ceiling for the per-tile working set; resumes are
+          processed in tiles sized to fit it.
+        Every document is embedded and scanned for metrics exactly once; the
+        M x tile score blocks are plain matrix products.
+        Returns one list per JD of (resume index, score dict) pairs, best
+        first. Score dicts match rank_batch's.
+        """
+        jd_texts = [j if isinstance(j, str) else j["text"] for j in jds]
+        jd_skills = [None if isinstance(j, str) else j.get("skills") for j in jds]
+        texts = [r if isinstance(r, str) else r["text"] for r in resumes]
+        skills = [None if isinstance(r, str) else r.get("skills") for r in resumes]
+        m, n = len(jd_texts), len(texts)
+        if k <= 0:
+            return [[] for _ in range(m)]
+
+        # 1. JD side, once: embeddings, skill vocabulary, TF-IDF rows
+        jd_matrix = self.embed_engine.get_embeddings_batch(jd_texts, batch_size=batch_size)
+        vocab = {}
+        jd_sets = [set(s.lower() for s in js) if js else set() for js in jd_skills]
+        for js in jd_sets:
+            for skill in js:
+                vocab.setdefault(skill, len(vocab))
+        jd_skill_matrix = np.zeros((m, len(vocab)), dtype=np.float32)
+        for row, js in enumerate(jd_sets):
+            jd_skill_matrix[row, [vocab[s] for s in js]] = 1.0
+        jd_sizes = jd_skill_matrix.sum(axis=1)
+        no_jd_skills = jd_sizes == 0  # get_keyword_match scores these 1.0
+
+        overlap_model = None
+        if self.w4:
+            overlap_model = self.stats_engine.idf_model
+            if overlap_model is not None:
+                jd_tfidf = overlap_model.transform(jd_texts)
+
+        # 2. Tile size: embeddings + skill rows + ~6 float64 M-wide score arrays per resume
+        dim = jd_matrix.shape[1]
+        row_bytes = dim * 4 + len(vocab) * 4 + m * 8 * 6
+        tile = int(max(batch_size, min(n, max_memory_mb * 2**20 // row_bytes))) if n else 0
+
+        heaps = [[] for _ in range(m)]  # per-JD min-heaps, worst of the top k on top
+        for start in range(0, n, tile or 1):
+            idx = np.arange(start, min(start + tile, n))
+
+            # 3. Resume side, once per resume
+            semantic = self.embed_engine.score_documents(
+                [texts[i] for i in idx], jd_matrix, batch_size=batch_size
+            )  # (tile, M)
+            impact = np.array([score for _, score in self.stats_engine.detect_metrics_batch(texts[i] for i in idx)])
+
+            res_skill_matrix = np.zeros((len(idx), len(vocab)), dtype=np.float32)
+            for row, i in enumerate(idx):
+                if skills[i]:
+                    cols = [vocab[s] for s in {s.lower() for s in skills[i]} if s in vocab]
+                    res_skill_matrix[row, cols] = 1.0
+            with np.errstate(divide="ignore", invalid="ignore"):
+                keyword = np.sqrt((res_skill_matrix @ jd_skill_matrix.T) / jd_sizes)
+            keyword[:, no_jd_skills] = 1.0
+
+            total = semantic * self.w1 + keyword * self.w2 + impact[:, None] * self.w3
+            overlap = None
+            if overlap_model is not None:
+                overlap = np.asarray((overlap_model.transform([texts[i] for i in idx]) @ jd_tfidf.T).todense())
+            elif self.w4:
+                # No IDF model: the same per-pair fallback as rank_batch and get_composite_score
+                overlap = self.stats_engine.pairwise_overlap(jd_texts, [texts[i] for i in idx])
+            if overlap is not None:
+                total = total + overlap * self.w4
+
+            # 4. Per JD: only this tile's own top k can enter the heap
+            for j in range(m):
+                column = total[:, j]
+                rows = np.argpartition(-column, k - 1)[:k] if len(column) > k else range(len(column))
+                for row in rows:
+                    # (total, -index) orders ties by input position; the components ride along
+                    item = (float(column[row]), -int(idx[row]), float(semantic[row, j]), float(keyword[row, j]),
+                            float(impact[row]), float(overlap[row, j]) if overlap is not None else None)
+                    if len(heaps[j]) < k:
+                        heapq.heappush(heaps[j], item)
+                    elif item > heaps[j][0]:
+                        heapq.heapreplace(heaps[j], item)
+
+        results = []
+        for heap in heaps:
+            ranked = []
+            for total_score, neg_index, semantic_score, keyword_score, impact_score, overlap_score in sorted(heap, reverse=True):
+                scores = {
+                    "total_score": total_score,
+                    "semantic_match": semantic_score,
+                    "keyword_match": keyword_score,
+                    "impact_score": impact_score
+                }
+                if overlap_score is not None:
+                    scores["weighted_overlap"] = overlap_score
+                ranked.append((-neg_index, scores))
+            results.append(ranked)
+        return results
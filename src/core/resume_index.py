@@ -0,0 +1,211 @@
+import os
+import json
+import numpy as np
+from src.core.embeddings import EmbeddingEngine
+
+class ResumePool:
+    """
+    A growing pool of resumes held as one contiguous matrix of unit-length
+    embeddings, so "top k for this JD" is a single matrix-vector product.
+
+    - mode="exact": scores every resume, picks the top k with argpartition.
+    - mode="ivf":   inverted-file approximation. Resumes are bucketed around
+      k-means centroids and a query only scores the `n_probe` nearest buckets.
+      Falls back to exact search while the pool is small.
+    """
+
+    def __init__(self, embed_engine=None, mode="exact", n_lists=None, n_probe=8,
+                 ivf_min_size=5000):
+        if mode not in ("exact", "ivf"):
+            raise ValueError(f"Unknown search mode: {mode}")
+        self.embed_engine = embed_engine or EmbeddingEngine()
+        self.mode = mode
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.ivf_min_size = ivf_min_size
+
+        dim = self.embed_engine.model.get_sentence_embedding_dimension()
+        self._matrix = np.zeros((1024, dim), dtype=np.float32)
+        self._size = 0
+        self.ids = []       # row -> doc_id
+        self._rows = {}     # doc_id -> row
+        self.texts = []
+        self.skills = []
+
+        # IVF state
+        self._centroids = None
+        self._assign = np.zeros(1024, dtype=np.int32)
+        self._trained_size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, doc_id):
+        return doc_id in self._rows
+
+    # --- Updates ---
+    def _grow(self, needed):
+        capacity = self._matrix.shape[0]
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        matrix = np.zeros((capacity, self._matrix.shape[1]), dtype=np.float32)
+        matrix[:self._size] = self._matrix[:self._size]
+        self._matrix = matrix
+        assign = np.zeros(capacity, dtype=np.int32)
+        assign[:self._size] = self._assign[:self._size]
+        self._assign = assign
+
+    def add(self, doc_id, text, skills=None):
+        self.add_many([{"id": doc_id, "text": text, "skills": skills}])
+
+    def add_many(self, docs, batch_size=32):
+        """
+        Adds (or replaces) resumes. `docs` is a list of dicts with 'id',
+        'text' and optional 'skills'. Embeddings are computed in one batch.
+        An id repeated within `docs` is added once (the last copy wins).
+        """
+        docs = list({doc["id"]: doc for doc in docs}.values())
+        if not docs:
+            return
+        for doc in docs:
+            if doc["id"] in self._rows:
+                self.remove(doc["id"])
+
+        # Pooled chunk vectors when the engine is chunked (the index stores one row per resume)
+        vectors = self.embed_engine.embed_documents([d["text"] for d in docs], batch_size=batch_size)
+        start = self._size
+        self._grow(start + len(docs))
+        self._matrix[start:start + len(docs)] = vectors
+        for i, doc in enumerate(docs):
+            self._rows[doc["id"]] = start + i
+            self.ids.append(doc["id"])
+            self.texts.append(doc["text"])
+            self.skills.append(doc.get("skills"))
+        self._size += len(docs)
+
+        if self._centroids is not None:
+            self._assign[start:self._size] = np.argmax(vectors @ self._centroids.T, axis=1)
+
+    def remove(self, doc_id):
+        """Removes a resume in O(1) by moving the last row into its slot."""
+        row = self._rows.pop(doc_id, None)
+        if row is None:
+            return False
+        last = self._size - 1
+        if row != last:
+            self._matrix[row] = self._matrix[last]
+            self._assign[row] = self._assign[last]
+            self.ids[row] = self.ids[last]
+            self.texts[row] = self.texts[last]
+            self.skills[row] = self.skills[last]
+            self._rows[self.ids[row]] = row
+        self.ids.pop()
+        self.texts.pop()
+        self.skills.pop()
+        self._size = last
+        return True
+
+    # --- IVF ---
+    def train(self, n_lists=None, iters=10, seed=0):
+        """
+        Spherical k-means over the pool: centroids are unit vectors and each
+        resume is assigned to the centroid with the highest cosine similarity.
+        """
+        n = self._size
+        if n == 0:
+            return
+        n_lists = n_lists or self.n_lists or max(1, int(np.sqrt(n)))
+        n_lists = min(n_lists, n)
+        data = self._matrix[:n]
+
+        rng = np.random.default_rng(seed)
+        centroids = data[rng.choice(n, size=n_lists, replace=False)].copy()
+        for _ in range(iters):
+            assign = np.argmax(data @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, data)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            empty = norms[:, 0] == 0
+            # Keep the old centroid for buckets that lost all their members
+            sums[empty] = centroids[empty]
+            norms[empty] = 1.0
+            centroids = sums / norms
+
+        self._centroids = centroids.astype(np.float32)
+        self._assign[:n] = np.argmax(data @ self._centroids.T, axis=1)
+        self._trained_size = n
+
+    def _use_ivf(self):
+        if self.mode != "ivf" or self._size < self.ivf_min_size:
+            return False
+        # Re-train once the pool has grown well past what the centroids saw
+        if self._centroids is None or self._size > 4 * self._trained_size:
+            self.train()
+        return True
+
+    # --- Search ---
+    def search(self, jd_text, k=50):
+        """Returns the top-k (doc_id, cosine score) pairs, best first."""
+        if self._size == 0 or k <= 0:
+            return []
+        query = self.embed_engine.get_embeddings(jd_text)
+
+        if self._use_ivf():
+            n_probe = min(self.n_probe, self._centroids.shape[0])
+            probe = np.argpartition(-(self._centroids @ query), n_probe - 1)[:n_probe]
+            rows = np.flatnonzero(np.isin(self._assign[:self._size], probe))
+        else:
+            rows = None
+
+        candidates = self._matrix[:self._size] if rows is None else self._matrix[rows]
+        scores = candidates @ query
+        k = min(k, scores.shape[0])
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        if rows is not None:
+            return [(self.ids[rows[i]], float(scores[i])) for i in top]
+        return [(self.ids[i], float(scores[i])) for i in top]
+
+    def rank_top_k(self, jd_text, ranker, k=50, jd_skills=None):
+        """
+        Shortlists the k nearest resumes, then runs full composite scoring
+        (CompositeRanker.rank_batch) on just that shortlist.
+        Returns score dicts with an added 'id', sorted by total_score.
+        """
+        shortlist = self.search(jd_text, k=k)
+        resumes = []
+        for doc_id, _ in shortlist:
+            row = self._rows[doc_id]
+            resumes.append({"text": self.texts[row], "skills": self.skills[row]})
+
+        results = ranker.rank_batch(jd_text, resumes, jd_skills=jd_skills)
+        for (doc_id, _), scores in zip(shortlist, results):
+            scores["id"] = doc_id
+        return sorted(results, key=lambda r: r["total_score"], reverse=True)
+
+    # --- Persistence ---
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "vectors.npy"), self._matrix[:self._size])
+        with open(os.path.join(path, "pool.json"), "w") as f:
+            json.dump({"ids": self.ids, "texts": self.texts, "skills": self.skills}, f)
+
+    def load(self, path):
+        """Restores a pool written by save() without re-encoding anything."""
+        vectors = np.load(os.path.join(path, "vectors.npy"))
+        with open(os.path.join(path, "pool.json"), "r") as f:
+            meta = json.load(f)
+        self._size = 0
+        self._grow(max(len(vectors), 1))
+        self._matrix[:len(vectors)] = vectors
+        self._size = len(vectors)
+        self.ids = meta["ids"]
+        self.texts = meta["texts"]
+        self.skills = meta["skills"]
+        self._rows = {doc_id: i for i, doc_id in enumerate(self.ids)}
+        self._centroids = None
+        self._trained_size = 0
@@ -1,20 +1,78 @@
+import os
+import math
 import numpy as np
 import re
+import joblib
+from collections import namedtuple, Counter
 from sklearn.feature_extraction.text import TfidfVectorizer
 
+# A quantifiable achievement found in text; start/end are character offsets
+MetricMatch = namedtuple("MetricMatch", ["kind", "text", "start", "end"])
+
+# All metric patterns in one alternation, compiled once at import.
+# Order matters: at a given position the first branch wins, so an impact
+# phrase swallows the number it ends with, and "$1,000" is one currency hit
+# rather than a currency plus a count.
+# The leading lookahead rejects most positions on their first character, and
+# case-insensitivity is scoped to the words that need it; both keep the single
+# pass faster than the old four separate findall passes.
+METRIC_PATTERN = re.compile(r"""
+    (?=[\d$iIrRsS])
+    (?:
+        (?P<impact>(?i:increased|reduced|saved|improved)\s+\w+\s+(?i:by)\s+
+            \$?\d+(?:,\d{3})*(?:\.\d+)?(?:%|[kKmMbB]\b)?)            # Impact phrases (e.g., increased sales by 20%)
+      | (?P<currency>\$\d+(?:,\d{3})*(?:\.\d+)?[kKmMbB]?)           # Currency (e.g., $50k, $1,000)
+      | (?P<percent>\d{1,3}(?:,\d{3})*(?:\.\d+)?%|\d+(?:\.\d+)?%)    # Percentages (e.g., 20%, 12.5%)
+      | (?P<count>\b\d{1,3}(?:,\d{3})+\b)                          # Large numbers (e.g., 1,200)
+    )
+""", re.VERBOSE)
+
 class StatisticalAnalyzer:
     """
     Module for mathematical keyword weighting and Information Entropy.
     """
-    def __init__(self):
+    def __init__(self, idf_path=None):
+        """
+        - idf_path: a TF-IDF model fitted once on a reference corpus (see
+          fit_idf / save_idf). Priority: Env Var > Argument. Without one,
+          weighted overlap scores each (resume, JD) pair as if TF-IDF were
+          fitted on those two documents alone, whichever path computes it.
+        """
         # We use sublinear_tf to scale word counts logarithmatically.
         # This prevents a resume with 'Python' written 50 times from
         # unfairly dominating a resume with 'Python' written 5 times.
-        self.vectorizer = TfidfVectorizer(
+        self.vectorizer = self._new_vectorizer()
+
+        # Corpus-level IDF model used for weighted overlap
+        self.idf_model = None
+        idf_path = os.getenv("IDF_MODEL_PATH", idf_path)
+        if idf_path and os.path.exists(idf_path):
+            self.load_idf(idf_path)
+
+    @staticmethod
+    def _new_vectorizer():
+        return TfidfVectorizer(
             stop_words='english',
             sublinear_tf=True
         )
 
+    def fit_idf(self, corpus):
+        """
+        Learns IDF weights once from a reference corpus (e.g. past resumes and
+        JDs), so a term's weight reflects how rare it is across the market
+        rather than across the two documents being compared.
+        """
+        self.idf_model = self._new_vectorizer().fit(corpus)
+        return self
+
+    def save_idf(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        joblib.dump(self.idf_model, path)
+
+    def load_idf(self, path):
+        self.idf_model = joblib.load(path)
+        return self
+
     def extract_top_keywords(self, texts, top_n = 20):
         """
         Use TF-IDF to identify the most 'Information-Rich' terms in a corpus.
@@ -35,42 +93,115 @@ class StatisticalAnalyzer:
         Calculates a similarity score weighted by word importance (IDF).
         This is much more accurate than simple keyword counting.
         """
-        vectors = self.vectorizer.fit_transform([jd_text, resume_text])
+        return float(self.weighted_overlap_batch(jd_text, [resume_text])[0])
 
-        # The First vector is out 'Ideal' (the Job DEscription)
-        # The second vector is our 'Subject' (the Resume)
-        jd_vector = vectors.toarray()[0]
-        resume_vector = vectors.toarray()[1]
+    def weighted_overlap_batch(self, jd_text, resume_texts):
+        """
+        Weighted overlap of one JD against N resumes as a single sparse
+        matrix-vector product. Nothing is densified except the N scores.
+        """
+        resume_texts = list(resume_texts)
+        if not resume_texts:
+            return np.zeros(0)
 
-        # Calculate overlap only for terms that actually matter in the JD
-        important_indices = np.where(jd_vector > 0)[0]
+        model = self.idf_model
+        if model is None:
+            # No reference corpus: per-pair fallback, so a score never depends on the rest of the batch
+            return self.pairwise_overlap([jd_text], resume_texts)[:, 0]
 
-        # Math: Sum of (Resume_Weight * JD_Weight) for important terms
-        score = np.dot(resume_vector[important_indices], jd_vector[important_indices]) 
+        # The JD vector is our 'Ideal', the resume rows are our 'Subjects'
+        jd_vector = model.transform([jd_text])
+        resume_matrix = model.transform(resume_texts)
 
-        return float(score)
+        # Math: Sum of (Resume_Weight * JD_Weight); terms absent from the JD contribute 0
+        scores = resume_matrix @ jd_vector.T
+        return np.asarray(scores.todense()).ravel()
     
+    def pairwise_overlap(self, jd_texts, resume_texts):
+        """
+        (N resumes, M JDs) overlap scores, each equal to fitting a fresh TF-IDF
+        model on that resume and JD alone (the fallback without an IDF model),
+        without fitting N x M models. With two documents, sklearn's smoothed
+        IDF is 1 for a term both contain and 1 + ln(1.5) for the rest, so
+        every pair only needs each document's term counts.
+        """
+        analyze = self._new_vectorizer().build_analyzer()
+
+        def sublinear_tf(text):
+            return {term: 1 + math.log(count) for term, count in Counter(analyze(text)).items()}
+
+        jd_tfs = [sublinear_tf(t) for t in jd_texts]
+        resume_tfs = [sublinear_tf(t) for t in resume_texts]
+        resume_sq = [sum(w * w for w in tf.values()) for tf in resume_tfs]
+        rare_sq = (1 + math.log(1.5)) ** 2
+
+        scores = np.zeros((len(resume_tfs), len(jd_tfs)))
+        for j, jd_tf in enumerate(jd_tfs):
+            jd_sq = sum(w * w for w in jd_tf.values())
+            for i, resume_tf in enumerate(resume_tfs):
+                shared = jd_tf.keys() & resume_tf.keys()
+                if not shared:
+                    continue
+                dot = sum(jd_tf[t] * resume_tf[t] for t in shared)
+                shared_jd = sum(jd_tf[t] ** 2 for t in shared)
+                shared_resume = sum(resume_tf[t] ** 2 for t in shared)
+                # L2 norms: shared terms keep IDF 1, the others are scaled by 1 + ln(1.5)
+                jd_norm = math.sqrt(shared_jd + rare_sq * (jd_sq - shared_jd))
+                resume_norm = math.sqrt(shared_resume + rare_sq * (resume_sq[i] - shared_resume))
+                scores[i, j] = dot / (jd_norm * resume_norm)
+        return scores
+
     def detect_metrics(self, text):
         """
         NEW: Detects quantifiable impact (metrics) in text.
         Returns a list of found metrics and a normalized 'Impact Score'.
         """
-        patterns = [
-            r'\d+%',                                     # Percentages (e.g., 20%)
-            r'\$\d+(?:,\d{3})*(?:\.\d+)?(?:[kKmMbB])?',  # Currency (e.g., $50k, $1,000)
-            r'\b\d{1,3}(?:,\d{3})+\b',                   # Large numbers (e.g., 1,200)
-            r'(?:increased|reduced|saved|improved)\s+\w+\s+by\s+\d+' # Impact phrases
+        return self._score_metrics([m.group() for m in METRIC_PATTERN.finditer(text)])
+
+    def detect_metrics_batch(self, texts):
+        """detect_metrics over many texts: one (metrics, impact_score) pair per text."""
+        return [self.detect_metrics(t) for t in texts]
+
+    def scan_metrics(self, text):
+        """
+        Single pass of the combined metric scanner over `text`.
+        Returns non-overlapping MetricMatch(kind, text, start, end) tuples in
+        reading order; kind is one of 'impact', 'currency', 'percent', 'count'.
+        The offsets let the UI highlight each hit.
+        """
+        return [
+            MetricMatch(m.lastgroup, m.group(), m.start(), m.end())
+            for m in METRIC_PATTERN.finditer(text)
         ]
-        
-        found_metrics = []
-        for p in patterns:
-            found_metrics.extend(re.findall(p, text, re.IGNORECASE))
-        
+
+    def scan_metrics_batch(self, texts):
+        return [self.scan_metrics(t) for t in texts]
+
+    @staticmethod
+    def _score_metrics(found_metrics):
         # Calculate impact score (0.0 to 1.0) based on how many metrics are found
         # 5+ metrics is considered a 'High Impact' resume
         impact_score = min(len(found_metrics) / 5, 1.0)
         
         return found_metrics, impact_score
-            
-        
-    
\ No newline at end of file
+
+# --- FIT A REFERENCE IDF MODEL ---
+# python -m src.core.stats <corpus_dir> <out_path>
+if __name__ == "__main__":
+    import sys
+    from src.utils.parser import ResumeParser
+
+    corpus_dir, out_path = sys.argv[1], sys.argv[2]
+    parser = ResumeParser()
+    paths = [
+        os.path.join(root, name)
+        for root, _, files in os.walk(corpus_dir)
+        for name in files
+        if name.lower().endswith((".pdf", ".docx", ".txt"))
+    ]
+    corpus = [t for t in (parser.extract_text(p) for p in paths) if not t.startswith("Error")]
+
+    analyzer = StatisticalAnalyzer().fit_idf(corpus)
+    analyzer.save_idf(out_path)
+    print(f"✅ IDF model fitted on {len(corpus)} documents "
+          f"({len(analyzer.idf_model.vocabulary_)} terms) -> {out_path}")
@@ -1,36 +1,154 @@
 import os
+import time
+import hashlib
+import threading
+from collections import deque
 import torch
 import chromadb
 import requests
-from llama_index.core import StorageContext, VectorStoreIndex, Document
+from llama_index.core import StorageContext, VectorStoreIndex, Document, QueryBundle
+from llama_index.core.node_parser import SentenceSplitter
 from llama_index.vector_stores.chroma import ChromaVectorStore
 from llama_index.llms.ollama import Ollama
 from llama_index.llms.gemini import Gemini
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+from llama_index.core.embeddings import BaseEmbedding
+from llama_index.core.bridge.pydantic import PrivateAttr
 from llama_index.core.vector_stores import MetadataFilters, ExactMatchFilter
+from src.core.model_registry import registry
+from src.core.embeddings import DEFAULT_MODEL, resolve_backend
+
+class SharedSentenceTransformerEmbedding(BaseEmbedding):
+    """
+    LlamaIndex embedding backed by the registry's SentenceTransformer, i.e. the
+    very same model instance the ranker's EmbeddingEngine uses. `backend` and
+    `threads` resolve like EmbeddingEngine's (EMBEDDING_BACKEND,
+    EMBEDDING_THREADS), so both land on the same registry entry.
+    """
+    _model = PrivateAttr()
+
+    def __init__(self, model_name=DEFAULT_MODEL, backend=None, threads=None, **kwargs):
+        super().__init__(model_name=model_name, **kwargs)
+        backend, threads = resolve_backend(backend, threads)
+        self._model = registry.sentence_transformer(model_name, backend=backend, threads=threads)
+
+    @classmethod
+    def class_name(cls):
+        return "SharedSentenceTransformerEmbedding"
+
+    def _get_query_embedding(self, query):
+        return self._model.encode(query, normalize_embeddings=True).tolist()
+
+    async def _aget_query_embedding(self, query):
+        return self._get_query_embedding(query)
+
+    def _get_text_embedding(self, text):
+        return self._model.encode(text, normalize_embeddings=True).tolist()
+
+    def _get_text_embeddings(self, texts):
+        return self._model.encode(texts, normalize_embeddings=True).tolist()
+
+class CollectionStore:
+    """One Chroma collection plus the LlamaIndex objects layered on top of it."""
+
+    def __init__(self, collection, embed_model):
+        self.collection = collection
+        self.vector_store = ChromaVectorStore(chroma_collection=collection)
+        self.storage_context = StorageContext.from_defaults(vector_store=self.vector_store)
+        self.embed_model = embed_model
+        self.last_access = (collection.metadata or {}).get("last_access", time.time())
+        self._persisted_access = self.last_access
+        self.version = 0  # bumped on every write; cached query engines are keyed on it
+        self._engines = {}
+
+        # Reattach to what a previous process already persisted instead of starting empty
+        self.index = None
+        if collection.count() > 0:
+            self.attach_index()
+
+    def attach_index(self):
+        if self.index is None:
+            self.index = VectorStoreIndex.from_vector_store(self.vector_store, embed_model=self.embed_model)
+        return self.index
+
+    def touch(self, persist_every=60.0):
+        """Records an access; written to Chroma at most once a minute."""
+        self.last_access = time.time()
+        if self.last_access - self._persisted_access >= persist_every:
+            metadata = dict(self.collection.metadata or {}, last_access=self.last_access)
+            self.collection.modify(metadata=metadata)
+            self._persisted_access = self.last_access
+
+    def invalidate(self):
+        """Called after the collection changes: cached query engines are rebuilt on next use."""
+        self.version += 1
+        self._engines.clear()
+
+    def query_engine(self, llm, target_filename=None, similarity_top_k=5):
+        """
+        Streaming query engine that sees `target_filename` and the JD, cached per
+        filename until the index changes.
+        Returns (engine, cached).
+        """
+        cached = self._engines.get(target_filename)
+        if cached is not None and cached[0] == self.version:
+            return cached[1], True
+
+        # Filter to see BOTH the specific resume and the JD
+        filters = None
+        if target_filename:
+            filters = MetadataFilters(filters=[
+                ExactMatchFilter(key="filename", value=target_filename),
+                ExactMatchFilter(key="filename", value="CURRENT_JD")
+            ], condition="or")
+
+        version = self.version
+        engine = self.attach_index().as_query_engine(
+            llm=llm,
+            streaming=True,
+            filters=filters,
+            similarity_top_k=similarity_top_k # Grab more context chunks
+        )
+        self._engines[target_filename] = (version, engine)
+        return engine, False
 
 class ResumeCoach:
-    def __init__(self, db_path=None, collection_name="resume_vault_v2"):
+    SESSION_SEPARATOR = "__"
+
+    def __init__(self, db_path=None, collection_name="resume_vault_v2", share_embeddings=None):
+        """
+        - share_embeddings: index with the ranker's embedding model instead of
+          loading a second one (env COACH_SHARE_EMBEDDINGS=1). Vectors already
+          stored in the collection must come from the same model.
+
+        Every method takes an optional `session_id`. Each session gets its own
+        collection (`<collection_name>__<hash>`) that the TTL sweeper can drop
+        once idle; without one, the shared `collection_name` is used.
+        """
         # Priority: Env Var > Argument > Default Local Path
         self.db_path = os.getenv("CHROMA_DB_PATH", db_path or "./chroma_db")
         self.db_path = os.path.abspath(self.db_path)
         os.makedirs(self.db_path, exist_ok=True)
             
         self.db = chromadb.PersistentClient(path=self.db_path)
-        self.chroma_collection = self.db.get_or_create_collection(collection_name)
-        self.vector_store = ChromaVectorStore(chroma_collection=self.chroma_collection)
-        self.storage_context = StorageContext.from_defaults(vector_store=self.vector_store)
+        self.collection_name = collection_name
+        self._sessions = {}
+        self._sessions_lock = threading.RLock()
+        self._sweeper = None
+        self._stop_sweeper = threading.Event()
+        self._chat_metrics = deque(maxlen=200)
         
         self.device = "mps" if torch.backends.mps.is_available() else "cpu"
 
         # --- CORRECT SWITCH LOGIC ---
         self.is_cloud = os.getenv("RENDER") or os.getenv("SPACE_ID") or os.getenv("RAILWAY_STATIC_URL")
+        if share_embeddings is None:
+            share_embeddings = os.getenv("COACH_SHARE_EMBEDDINGS", "0") == "1"
         
         if self.is_cloud:
             # Use the "Secret" name you will set in HF Settings
             api_key = os.getenv("GEMINI_API_KEY") 
             self.llm = Gemini(model_name="models/gemini-2.0-flash", api_key=api_key)
-            self.embed_model = HuggingFaceEmbedding(model_name="./models/all-MiniLM-L6-v2")
+            embed_name, embed_device = "./models/all-MiniLM-L6-v2", None
             
         else:
             # Local Deployment: Use Ollama
@@ -46,12 +164,116 @@ class ResumeCoach:
                 }
             )
             # Local uses the standard download or GPU-accelerated version
-            self.embed_model = HuggingFaceEmbedding(
-                model_name="BAAI/bge-small-en-v1.5", 
-                device=self.device
-            )
-        
-        self.index = None
+            embed_name, embed_device = "BAAI/bge-small-en-v1.5", self.device
+
+        if share_embeddings:
+            # One embedding model for ranker and coach
+            self.embed_model = SharedSentenceTransformerEmbedding(DEFAULT_MODEL)
+        else:
+            self.embed_model = registry.hf_embedding(embed_name, device=embed_device)
+
+        self._default = CollectionStore(self.db.get_or_create_collection(collection_name), self.embed_model)
+
+    # --- Collections ---
+    @property
+    def chroma_collection(self):
+        return self._default.collection
+
+    @property
+    def index(self):
+        return self._default.index
+
+    def _session_collection_name(self, session_id):
+        digest = hashlib.sha256(str(session_id).encode("utf-8")).hexdigest()[:16]
+        return f"{self.collection_name}{self.SESSION_SEPARATOR}{digest}"
+
+    def _store(self, session_id=None):
+        if session_id is None:
+            return self._default
+        name = self._session_collection_name(session_id)
+        with self._sessions_lock:
+            store = self._sessions.get(name)
+            if store is None:
+                collection = self.db.get_or_create_collection(
+                    name, metadata={"session": True, "last_access": time.time()}
+                )
+                store = CollectionStore(collection, self.embed_model)
+                self._sessions[name] = store
+        store.touch()
+        return store
+
+    def drop_session(self, session_id):
+        """Deletes a session's collection (its resumes, JD and vectors)."""
+        name = self._session_collection_name(session_id)
+        with self._sessions_lock:
+            self._sessions.pop(name, None)
+            try:
+                self.db.delete_collection(name)
+            except Exception:
+                pass  # already gone
+
+    def _session_collections(self):
+        prefix = self.collection_name + self.SESSION_SEPARATOR
+        for c in self.db.list_collections():
+            name = c if isinstance(c, str) else c.name  # names only on newer chromadb
+            if name.startswith(prefix):
+                yield name
+
+    def sweep(self, ttl_seconds, now=None):
+        """
+        Drops session collections idle for longer than `ttl_seconds`.
+        Returns the names of the collections that were deleted.
+        """
+        now = now or time.time()
+        dropped = []
+        with self._sessions_lock:
+            for name in list(self._session_collections()):
+                store = self._sessions.get(name)
+                if store is not None:
+                    last_access = store.last_access
+                else:
+                    metadata = self.db.get_collection(name).metadata or {}
+                    last_access = metadata.get("last_access", 0)
+                if now - last_access > ttl_seconds:
+                    self._sessions.pop(name, None)
+                    self.db.delete_collection(name)
+                    dropped.append(name)
+        return dropped
+
+    def start_sweeper(self, ttl_seconds=6 * 3600, interval_seconds=600):
+        """Runs sweep() every `interval_seconds` on a daemon thread."""
+        if self._sweeper is not None and self._sweeper.is_alive():
+            return
+
+        def loop():
+            while not self._stop_sweeper.wait(interval_seconds):
+                try:
+                    self.sweep(ttl_seconds)
+                except Exception as e:
+                    print(f"Coach sweeper error: {e}")
+
+        self._stop_sweeper.clear()
+        self._sweeper = threading.Thread(target=loop, name="coach-ttl-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self):
+        self._stop_sweeper.set()
+
+    def collection_stats(self):
+        """Chunk count and idle time for the shared collection and every session collection."""
+        now = time.time()
+        stats = []
+        names = [self.collection_name] + list(self._session_collections())
+        for name in names:
+            store = self._default if name == self.collection_name else self._sessions.get(name)
+            collection = store.collection if store else self.db.get_collection(name)
+            last_access = store.last_access if store else (collection.metadata or {}).get("last_access", 0)
+            stats.append({
+                "collection": name,
+                "chunks": collection.count(),
+                "idle_seconds": now - last_access,
+            })
+        return stats
 
     def get_status(self):
         if self.is_cloud:
@@ -69,41 +291,107 @@ class ResumeCoach:
             "model": "Llama 3.2 (3B)"
         }
 
-    def add_jd_to_index(self, jd_text):
-        """Specifically indexes the Job Description."""
-        doc = Document(text=jd_text, metadata={"filename": "CURRENT_JD", "type": "job_description"})
-        if not self.index:
-            self.index = VectorStoreIndex.from_documents([doc], storage_context=self.storage_context, embed_model=self.embed_model)
-        else:
-            self.index.insert(doc)
+    def add_jd_to_index(self, jd_text, session_id=None):
+        """Specifically indexes the Job Description (replacing the previous one)."""
+        return self.add_documents([{"text": jd_text, "filename": "CURRENT_JD", "type": "job_description"}], session_id)
 
-    def add_to_index(self, text, filename):
-        doc = Document(text=text, metadata={"filename": filename, "type": "resume"})
-        if not self.index:
-            self.index = VectorStoreIndex.from_documents([doc], storage_context=self.storage_context, embed_model=self.embed_model)
-        else:
-            self.index.insert(doc)
+    def add_to_index(self, text, filename, session_id=None):
+        return self.add_documents([{"text": text, "filename": filename, "type": "resume"}], session_id)
+
+    def add_documents(self, docs, session_id=None):
+        """
+        Batched, deduplicated upsert.
+        - docs: dicts with 'text', 'filename' and 'type' ("resume" / "job_description").
+        A document whose filename is already stored with the same content hash
+        is skipped; one stored with different content is replaced. Everything
+        new is chunked and embedded in a single insert.
+        Returns the number of documents actually (re)indexed.
+        """
+        store = self._store(session_id)
+
+        # 1. Hash the incoming documents (last one wins if a filename repeats)
+        incoming = {}
+        for d in docs:
+            content_hash = hashlib.sha256(d["text"].encode("utf-8")).hexdigest()
+            incoming[d["filename"]] = dict(d, content_hash=content_hash)
+        if not incoming:
+            return 0
+
+        # 2. What is already stored under those filenames?
+        stored = {}
+        existing = store.collection.get(
+            where={"filename": {"$in": list(incoming)}}, include=["metadatas"]
+        )
+        for meta in existing["metadatas"] or []:
+            stored.setdefault(meta.get("filename"), set()).add(meta.get("content_hash"))
+
+        # 3. Skip unchanged, drop stale versions of changed ones
+        changed = [d for name, d in incoming.items() if stored.get(name) != {d["content_hash"]}]
+        stale = [d["filename"] for d in changed if d["filename"] in stored]
+        if stale:
+            store.collection.delete(where={"filename": {"$in": stale}})
+            store.invalidate()
+        if not changed:
+            return 0
 
-    def query_stream(self, user_query, target_filename=None):
-        if not self.index:
+        # 4. Chunk + embed everything new in one pass
+        documents = [
+            Document(
+                text=d["text"],
+                id_=f"{d['filename']}:{d['content_hash'][:16]}",
+                metadata={"filename": d["filename"], "type": d["type"], "content_hash": d["content_hash"]},
+                # The hash is bookkeeping, not content: keep it out of embeddings and prompts
+                excluded_embed_metadata_keys=["content_hash"],
+                excluded_llm_metadata_keys=["content_hash"],
+            )
+            for d in changed
+        ]
+        nodes = SentenceSplitter().get_nodes_from_documents(documents)
+        store.attach_index().insert_nodes(nodes)
+        store.invalidate()
+        return len(changed)
+
+    def warm_up(self, target_filename=None, session_id=None):
+        """
+        Gets the slow parts of the next question out of the way on a daemon
+        thread: builds (and caches) the query engine for `target_filename`,
+        runs the embedding model once and, locally, has Ollama load llama3.2
+        into memory. Returns the thread.
+        """
+        def run():
+            try:
+                store = self._store(session_id)
+                if store.index is not None:
+                    store.query_engine(self.llm, target_filename)
+                self.embed_model.get_query_embedding("warm-up")
+                if not self.is_cloud:
+                    # A generate call without a prompt only loads the model
+                    requests.post(
+                        f"{self.llm.base_url}/api/generate",
+                        json={"model": self.llm.model, "keep_alive": os.getenv("OLLAMA_KEEP_ALIVE", "30m")},
+                        timeout=self.llm.request_timeout,
+                    )
+            except Exception as e:
+                print(f"Coach warm-up error: {e}")
+
+        thread = threading.Thread(target=run, name="coach-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def query_stream(self, user_query, target_filename=None, session_id=None):
+        """
+        Streams the answer chunk by chunk. Each call also appends one record to
+        chat_metrics(): retrieval latency, time to first token, and generation
+        speed (tokens estimated at ~4 characters each, since Gemini streams
+        multi-token chunks).
+        """
+        store = self._store(session_id)
+        if not store.index:
             yield "Please upload resumes and a JD first."
             return
-        
-        # Filter to see BOTH the specific resume and the JD
-        filters = None
-        if target_filename:
-            filters = MetadataFilters(filters=[
-                ExactMatchFilter(key="filename", value=target_filename),
-                ExactMatchFilter(key="filename", value="CURRENT_JD")
-            ], condition="or")
 
-        # Create a focused query engine
-        streaming_engine = self.index.as_query_engine(
-            llm=self.llm, 
-            streaming=True,
-            filters=filters,
-            similarity_top_k=5 # Grab more context chunks
-        )
+        start = time.perf_counter()
+        streaming_engine, engine_cached = store.query_engine(self.llm, target_filename)
         
         # System Prompt to prevent generic "Entry Level" summaries
         enriched_prompt = (
@@ -114,6 +402,37 @@ class ResumeCoach:
             f"If rewriting projects, maintain technical accuracy but align keywords with the JD."
         )
         
-        response = streaming_engine.query(enriched_prompt)
-        for text in response.response_gen:
-            yield text
\ No newline at end of file
+        # Retrieve and generate as separate steps so each can be timed
+        query_bundle = QueryBundle(enriched_prompt)
+        nodes = streaming_engine.retrieve(query_bundle)
+        retrieved = time.perf_counter()
+        response = streaming_engine.synthesize(query_bundle, nodes)
+
+        first_token, chars = None, 0
+        try:
+            for text in response.response_gen:
+                if first_token is None:
+                    first_token = time.perf_counter()
+                chars += len(text)
+                yield text
+        finally:
+            # Also runs when the caller stops reading early
+            self._record_chat(target_filename, engine_cached, start, retrieved, first_token, chars)
+
+    def _record_chat(self, target_filename, engine_cached, start, retrieved, first_token, chars):
+        end = time.perf_counter()
+        tokens = chars / 4
+        generating = end - first_token if first_token is not None else 0.0
+        self._chat_metrics.append({
+            "filename": target_filename,
+            "engine_cached": engine_cached,
+            "retrieval_seconds": retrieved - start,
+            "ttft_seconds": (first_token or end) - start,
+            "total_seconds": end - start,
+            "tokens": round(tokens),
+            "tokens_per_second": tokens / generating if generating > 0 else 0.0,
+        })
+
+    def chat_metrics(self):
+        """Latency records of recent chat requests, oldest first."""
+        return list(self._chat_metrics)
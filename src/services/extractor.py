@@ -1,36 +1,77 @@
-import spacy
 import json
 import os
+from src.core.model_registry import registry
+from src.services.skill_matcher import SkillMatcher
 
 class LocalSkillExtractor:
-    def __init__(self, model_path="./output/model-last", skills_json="skills_list.json"):
+    def __init__(self, model_path="./output/model-last", skills_json="skills_list.json",
+                 mode="ner", aliases_json="skill_aliases.json"):
         """
         Initializes the Hybrid Extractor.
         - model_path: Path to your trained spaCy NER model.
         - skills_json: Path to the JSON file containing the verified skills list.
+        - mode: "ner" (AI extracts, JSON verifies) or "matcher" (compiled
+          dictionary scan with alias canonicalization; no model is loaded).
+        - aliases_json: Alias -> canonical skill map used by the matcher.
         """
+        if mode not in ("ner", "matcher"):
+            raise ValueError(f"Unknown extraction mode: {mode}")
+        self.mode = mode
+        self.nlp = None
+        self.matcher = None
+
         # 1. Load the Custom NER Model
-        try:
-            self.nlp = spacy.load(model_path)
-        except Exception as e:
-            print(f"Error loading NER model: {e}. Falling back to blank model.")
-            self.nlp = spacy.blank("en")
+        if mode == "ner":
+            try:
+                self.nlp = registry.spacy(model_path)
+            except Exception as e:
+                print(f"Error loading NER model: {e}. Falling back to blank model.")
+                import spacy
+                self.nlp = spacy.blank("en")
 
         # 2. Load the Verified Skills List (The Security Guard)
         if os.path.exists(skills_json):
             with open(skills_json, "r") as f:
                 self.verified_skills = set(json.load(f))
+            if mode == "matcher":
+                self.matcher = SkillMatcher.from_files(skills_json, aliases_json)
         else:
             print(f"Warning: {skills_json} not found. Filter disabled.")
             self.verified_skills = None
+            if mode == "matcher":
+                raise FileNotFoundError(f"{skills_json} is required for matcher mode")
 
     def extract_skills(self, text):
         """
         Uses NER to find potential skills, then filters them against 
         the verified JSON list to ensure 100% accuracy.
+        In matcher mode the compiled skills dictionary is used instead.
         """
-        doc = self.nlp(text)
-        
+        if self.matcher is not None:
+            return self.matcher.extract(text)
+
+        return self._filter_entities(self.nlp(text))
+
+    def extract_skills_batch(self, texts, batch_size=64, n_process=1):
+        """
+        Batched version of extract_skills, built on nlp.pipe.
+        - batch_size: documents per batch handed to the model.
+        - n_process: worker processes for NER (each loads its own copy of the model,
+          so this only pays off for large batches).
+        Pipeline components the skill filter doesn't read are disabled.
+        Returns one skill list per input text, in order.
+        """
+        texts = list(texts)
+        if self.matcher is not None:
+            return [self.matcher.extract(t) for t in texts]
+
+        # NER plus whatever embedding layer it listens to; everything else is dead weight
+        keep = {"ner", "tok2vec", "transformer"}
+        disable = [name for name in self.nlp.pipe_names if name not in keep]
+        docs = self.nlp.pipe(texts, batch_size=batch_size, n_process=n_process, disable=disable)
+        return [self._filter_entities(doc) for doc in docs]
+
+    def _filter_entities(self, doc):
         # Get raw entities from AI
         extracted = [ent.text for ent in doc.ents]
         
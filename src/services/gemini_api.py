@@ -1,59 +1,193 @@
 import os
-from google import genai # The new unified 2026 SDK
+import random
+import asyncio
+import threading
 from dotenv import load_dotenv
+from src.services.response_cache import ResponseCache
+from src.services.prompt_builder import PromptBuilder
+from src.services.rate_limit import AsyncTokenBucket
 
 load_dotenv()
 
 class GeminiService:
-    def __init__(self, model_name='gemini-2.0-flash'): 
-        # The new SDK uses a centralized Client object
-        self.client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
-        self.model_id = model_name
-
-    def generate_feedback(self, scores, resume_text, jd_text):
+    def __init__(self, model_name='gemini-2.0-flash', client=None, cache_path=None,
+                 use_cache=True, cache_ttl=7 * 24 * 3600, cache_max_entries=5000,
+                 prompt_builder=None, base_url=None):
         """
-        Generates data-driven improvement suggestions using the new Client syntax.
+        - client: anything with `models.generate_content(model=..., contents=...)`;
+          defaults to a real genai.Client (pass a stub to run offline).
+        - Responses are cached on disk by model + normalized prompt (see
+          ResponseCache). Every call returns a `usage` dict: "input"/"output"
+          are the tokens actually billed, "cached_input"/"cached_output" the
+          tokens a cache hit saved.
+        - prompt_builder: fits prompts to a token budget (see PromptBuilder);
+          "tokens_saved" in `usage` is what that trimmed off the naive prompt.
+        - base_url: a different Gemini endpoint (e.g. a local stub server).
+        Priority for the cache location and base_url: Env Var > Argument > Default.
         """
-        prompt = f"""
-        You are an expert Career Coach and ATS Specialist.
-        Analyze these scores:
-        - Overall Match: {scores['total_score']*100:.1f}%
-        - Keyword Match: {scores['keyword_match']*100:.1f}%
-        - Impact Score: {scores['impact_score']*100:.1f}%
+        if client is None:
+            # The new unified 2026 SDK (imported here: it is slow to import and only
+            # needed once a Gemini call is actually made)
+            from google import genai
+            from google.genai import types
+            base_url = os.getenv("GEMINI_BASE_URL", base_url)
+            http_options = types.HttpOptions(base_url=base_url) if base_url else None
+            # The new SDK uses a centralized Client object
+            client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"), http_options=http_options)
+        self.client = client
+        self.model_id = model_name
+        self.prompt_builder = prompt_builder or PromptBuilder()
+
+        self.cache = None
+        if use_cache:
+            cache_path = os.getenv("GEMINI_CACHE_PATH", cache_path or "./llm_cache/responses.sqlite")
+            self.cache = ResponseCache(cache_path, ttl_seconds=cache_ttl, max_entries=cache_max_entries)
+
+        self._usage_lock = threading.Lock()
+        self._usage_totals = {"input": 0, "output": 0, "cached_input": 0, "cached_output": 0,
+                              "tokens_saved": 0}
+
+    def _lookup(self, prompt, report):
+        """Returns (cache key, cached (text, usage) or None)."""
+        if self.cache is None:
+            return None, None
+        key = self.cache.key(self.model_id, prompt)
+        hit = self.cache.get(key)
+        if hit is None:
+            return key, None
+        text, saved = hit
+        return key, (text, self._record_usage({"input": 0, "output": 0,
+                                                "cached_input": saved["input"], "cached_output": saved["output"],
+                                                "tokens_saved": report["tokens_saved"]}))
+
+    def _finish(self, key, response, report):
+        usage = {
+            "input": response.usage_metadata.prompt_token_count,
+            "output": response.usage_metadata.candidates_token_count
+        }
+        if key is not None and response.text:
+            self.cache.put(key, self.model_id, response.text, usage)
+        return response.text, self._record_usage(
+            dict(usage, cached_input=0, cached_output=0, tokens_saved=report["tokens_saved"])
+        )
 
-        RESUME: {resume_text}
-        JOB DESCRIPTION: {jd_text}
-        
-        Provide 3 actionable steps to improve these scores."""
+    def _generate(self, prompt, report):
+        """One model call, served from the cache when the same prompt was seen before."""
+        key, hit = self._lookup(prompt, report)
+        if hit is not None:
+            return hit
 
         # Updated syntax for 2026: client.models.generate_content
         response = self.client.models.generate_content(
             model=self.model_id,
             contents=prompt
         )
-        
-        usage = {
-            "input": response.usage_metadata.prompt_token_count,
-            "output": response.usage_metadata.candidates_token_count
-        }
-        return response.text, usage
+        return self._finish(key, response, report)
+
+    async def _agenerate(self, prompt, report, limiter=None, max_retries=4, base_delay=1.0, max_delay=30.0):
+        """
+        Async _generate. Each attempt first takes a token from `limiter`;
+        429 and 5xx responses are retried with exponential backoff and jitter.
+        """
+        key, hit = self._lookup(prompt, report)
+        if hit is not None:
+            return hit
+
+        for attempt in range(max_retries + 1):
+            if limiter is not None:
+                await limiter.acquire()
+            try:
+                response = await self.client.aio.models.generate_content(
+                    model=self.model_id,
+                    contents=prompt
+                )
+                return self._finish(key, response, report)
+            except Exception as e:
+                code = getattr(e, "code", None) or getattr(e, "status_code", None)
+                retryable = code == 429 or (isinstance(code, int) and 500 <= code < 600)
+                if not retryable or attempt == max_retries:
+                    raise
+                delay = min(max_delay, base_delay * 2 ** attempt)
+                await asyncio.sleep(delay + random.uniform(0, base_delay))
+
+    def _record_usage(self, usage):
+        with self._usage_lock:
+            for k in self._usage_totals:
+                self._usage_totals[k] += usage[k] or 0
+        return usage
+
+    def usage_report(self):
+        """Totals since start-up: live (billed) vs cached (saved) tokens, plus cache hit rate."""
+        with self._usage_lock:
+            report = dict(self._usage_totals)
+        if self.cache is not None:
+            report["cache"] = self.cache.stats()
+        return report
+
+    def generate_feedback(self, scores, resume_text, jd_text, resume_skills=None, jd_skills=None):
+        """
+        Generates data-driven improvement suggestions using the new Client syntax.
+        Skills (if already extracted) save the prompt builder an extraction.
+        """
+        prompt, report = self.prompt_builder.build_feedback(
+            scores, resume_text, jd_text, resume_skills=resume_skills, jd_skills=jd_skills
+        )
+        return self._generate(prompt, report)
+
+    async def agenerate_feedback(self, scores, resume_text, jd_text, resume_skills=None, jd_skills=None,
+                                 limiter=None, max_retries=4):
+        """Async generate_feedback (see _agenerate for rate limiting and retries)."""
+        prompt, report = self.prompt_builder.build_feedback(
+            scores, resume_text, jd_text, resume_skills=resume_skills, jd_skills=jd_skills
+        )
+        return await self._agenerate(prompt, report, limiter=limiter, max_retries=max_retries)
+
+    async def feedback_batch(self, candidates, jd_text, jd_skills=None, max_concurrency=4,
+                             requests_per_minute=60, max_retries=4):
+        """
+        Feedback for a whole shortlist, generated concurrently.
+        - candidates: dicts with 'name', 'text', 'scores' and optionally 'skills'
+          (the shape app.py already builds for ranking).
+        - max_concurrency: requests in flight at once.
+        - requests_per_minute: token-bucket limit shared by all requests,
+          retries included. Bursts are capped at one second's worth of
+          requests (at least one), not `max_concurrency`.
+        Async generator: yields (name, feedback, usage) as each one completes.
+        A candidate that still fails after the retries yields an error string.
+        """
+        rate = requests_per_minute / 60.0
+        limiter = AsyncTokenBucket(rate, capacity=min(max_concurrency, max(1.0, rate)))
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run(cand):
+            async with semaphore:
+                try:
+                    text, usage = await self.agenerate_feedback(
+                        cand["scores"], cand["text"], jd_text,
+                        resume_skills=cand.get("skills"), jd_skills=jd_skills,
+                        limiter=limiter, max_retries=max_retries,
+                    )
+                except Exception as e:
+                    text, usage = f"⚠️ Feedback Error: {str(e)}", {"input": 0, "output": 0, "cached_input": 0,
+                                                                  "cached_output": 0, "tokens_saved": 0}
+            return cand["name"], text, usage
+
+        tasks = [asyncio.ensure_future(run(c)) for c in candidates]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
 
-    def chat_with_resume(self, user_query, resume_text, history):
+    def chat_with_resume(self, user_query, resume_text, history, jd_text=None):
         """
-        Handles chat using the new SDK's chat session management.
+        Answers a question about the resume. Recent turns of `history`
+        ({"role", "content"} dicts) go in verbatim, older ones summarized.
         """
         try:
-            # Note: The new SDK handles history slightly differently within the generate_content call
-            # or through a dedicated chat object if preferred.
-            chat_response = self.client.models.generate_content(
-                model=self.model_id,
-                contents=f"Context: {resume_text}\n\nQuestion: {user_query}"
-            )
-            
-            usage = {
-                "input": chat_response.usage_metadata.prompt_token_count,
-                "output": chat_response.usage_metadata.candidates_token_count
-            }
-            return chat_response.text, usage
+            prompt, report = self.prompt_builder.build_chat(user_query, resume_text, history, jd_text=jd_text)
+            return self._generate(prompt, report)
         except Exception as e:
-            return f"⚠️ Chat Error: {str(e)}", {"input": 0, "output": 0}
\ No newline at end of file
+            return f"⚠️ Chat Error: {str(e)}", {"input": 0, "output": 0, "cached_input": 0, "cached_output": 0,
+                                                "tokens_saved": 0}
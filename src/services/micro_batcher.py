@@ -0,0 +1,115 @@
+import time
+import asyncio
+
+class Overloaded(Exception):
+    """Raised by MicroBatcher.submit when the queue is full (the caller should back off)."""
+    pass
+
+class MicroBatcher:
+    """
+    Collects concurrent requests into batches for a batch-friendly model call.
+
+    submit() queues one item and waits for its result. A single worker takes
+    the first waiting item, then keeps collecting until it has
+    `max_batch_size` items or `max_wait_ms` have passed, and hands the whole
+    batch to `process_batch` (a plain function, run in a worker thread so the
+    event loop keeps accepting requests meanwhile).
+
+    Backpressure: once `max_queue` items are waiting, submit() raises
+    Overloaded instead of queueing more work than we can finish. stop() fails
+    whatever is still queued or in flight with Overloaded as well, so no
+    request is left waiting on a worker that is gone.
+    """
+
+    def __init__(self, process_batch, max_batch_size=32, max_wait_ms=10.0, max_queue=256):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_queue = max_queue
+        self._queue = None
+        self._worker = None
+        self._batch = []  # taken off the queue, not yet answered
+        self.batches = 0
+        self.items = 0
+        self.rejected = 0
+        self.busy_seconds = 0.0
+
+    def start(self):
+        """Starts the worker on the running event loop."""
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+            pending, self._batch = self._batch, []
+            while not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+            error = Overloaded("shutting down")
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(error)
+
+    async def submit(self, item):
+        if self._worker is None:
+            raise Overloaded("not running")
+        if self._queue.qsize() >= self.max_queue:
+            self.rejected += 1
+            raise Overloaded(f"{self._queue.qsize()} requests already queued")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self):
+        self._batch = batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            # Requests whose client already went away don't need computing
+            batch = [(item, future) for item, future in batch if not future.cancelled()]
+            if not batch:
+                self._batch = []
+                continue
+            start = time.perf_counter()
+            try:
+                results = await asyncio.to_thread(self.process_batch, [item for item, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for (_, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+            self._batch = []
+            self.busy_seconds += time.perf_counter() - start
+            self.batches += 1
+            self.items += len(batch)
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "rejected": self.rejected,
+            "busy_seconds": self.busy_seconds,
+        }
@@ -0,0 +1,238 @@
+import os
+import re
+from src.core.stats import StatisticalAnalyzer
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token), good enough for budgeting."""
+    return (len(text) + 3) // 4
+
+class PromptBuilder:
+    """
+    Builds LLM prompts that fit a token budget. Instead of pasting the whole
+    resume and JD, a prompt carries the extracted skills, the skill gaps, the
+    detected metrics and only the resume chunks most relevant to the JD (or
+    to the chat question). Older chat turns are folded into a short summary.
+
+    Every build_* method returns (prompt, report), where report compares the
+    prompt against the naive "paste everything" version:
+    {"budget", "prompt_tokens", "full_tokens", "tokens_saved", "over_budget"}.
+    Recent chat turns are trimmed to fit; "over_budget" > 0 means the fixed
+    sections alone (profile, summary, question) didn't.
+    Priority for the budget: Env Var > Argument > Default.
+    """
+
+    _SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+    def __init__(self, token_budget=1500, chunk_chars=600, jd_share=0.25, keep_turns=4,
+                 max_metrics=10, extractor=None, analyzer=None, skills_json="skills_list.json"):
+        """
+        - jd_share: at most this fraction of the budget left after the fixed
+          sections goes to the JD excerpt; resume chunks get the rest.
+        - keep_turns: the most recent chat turns are sent verbatim (trimmed
+          if they don't fit the budget).
+        - extractor: a LocalSkillExtractor, used when skills aren't passed in.
+          Defaults to the dictionary matcher over `skills_json`, built on first
+          use. Without either, skills are left out of the prompt rather than
+          reported as missing.
+        """
+        self.token_budget = int(os.getenv("LLM_PROMPT_TOKEN_BUDGET", token_budget))
+        self.chunk_chars = chunk_chars
+        self.jd_share = jd_share
+        self.keep_turns = keep_turns
+        self.max_metrics = max_metrics
+        self.extractor = extractor
+        self.skills_json = skills_json
+        self.analyzer = analyzer or StatisticalAnalyzer()
+
+    # --- Pieces ---
+    def chunk(self, text):
+        """Greedily packs lines into chunks of at most `chunk_chars` characters."""
+        chunks, current = [], ""
+        for line in text.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            while len(line) > self.chunk_chars:  # one huge line (e.g. a PDF without breaks)
+                if current:
+                    chunks.append(current)
+                    current = ""
+                chunks.append(line[:self.chunk_chars])
+                line = line[self.chunk_chars:]
+            if current and len(current) + 1 + len(line) > self.chunk_chars:
+                chunks.append(current)
+                current = line
+            else:
+                current = f"{current}\n{line}" if current else line
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def relevant_chunks(self, text, reference, token_budget):
+        """The chunks of `text` that best match `reference`, in reading order, within budget."""
+        chunks = self.chunk(text)
+        if not chunks or token_budget <= 0:
+            return []
+        scores = self.analyzer.weighted_overlap_batch(reference, chunks)
+        chosen, used = [], 0
+        for i in sorted(range(len(chunks)), key=lambda i: -scores[i]):
+            cost = estimate_tokens(chunks[i]) + 2  # + separator
+            if used + cost > token_budget:
+                continue
+            chosen.append(i)
+            used += cost
+        return [chunks[i] for i in sorted(chosen)]
+
+    def summarize_history(self, history):
+        """
+        Splits chat history into (summary of older turns, recent turns).
+        Older turns keep only their first sentence, capped at 25 words.
+        """
+        history = history or []
+        older = history[:-self.keep_turns] if self.keep_turns else history
+        recent = history[len(older):]
+        return self._summarize(older), recent
+
+    def _summarize(self, turns):
+        lines = []
+        for turn in turns:
+            first = self._SENTENCE_END.split(turn["content"].strip(), maxsplit=1)[0]
+            words = first.split()
+            lines.append(f"- {turn['role']}: {' '.join(words[:25])}{' ...' if len(words) > 25 else ''}")
+        return "\n".join(lines)
+
+    def fit_turns(self, turns, token_budget):
+        """
+        The newest turns that fit `token_budget`, oldest first. The oldest
+        turn that only partly fits is cut short; anything older is returned
+        separately so it can be summarized instead.
+        """
+        kept, used = [], 0
+        for n, turn in enumerate(reversed(turns)):
+            line = f"{turn['role']}: {turn['content']}"
+            cost = estimate_tokens(line) + 1
+            if used + cost > token_budget:
+                room = (token_budget - used - 1) * 4 - len(turn["role"]) - 6
+                if room > 0:
+                    kept.append(dict(turn, content=turn["content"][:room] + " ..."))
+                    n += 1
+                return list(reversed(kept)), turns[:len(turns) - n]
+            kept.append(turn)
+            used += cost
+        return list(reversed(kept)), []
+
+    def _get_extractor(self):
+        if self.extractor is None and self.skills_json and os.path.exists(self.skills_json):
+            from src.services.extractor import LocalSkillExtractor
+            self.extractor = LocalSkillExtractor(skills_json=self.skills_json, mode="matcher")
+        return self.extractor
+
+    def _skills(self, text, skills):
+        """The given skills, else extracted ones; None when there is no way to know."""
+        if skills is not None:
+            return list(skills)
+        extractor = self._get_extractor()
+        return extractor.extract_skills(text) if extractor else None
+
+    def _gaps(self, jd_skills, resume_skills):
+        if self.extractor:
+            return self.extractor.identify_gaps(jd_skills, resume_skills)
+        return [s for s in jd_skills if s not in resume_skills]
+
+    def _report(self, prompt, full_prompt):
+        prompt_tokens, full_tokens = estimate_tokens(prompt), estimate_tokens(full_prompt)
+        over_budget = max(prompt_tokens - self.token_budget, 0)
+        if over_budget:
+            print(f"Warning: prompt is {over_budget} tokens over the {self.token_budget}-token budget")
+        return {
+            "budget": self.token_budget,
+            "prompt_tokens": prompt_tokens,
+            "full_tokens": full_tokens,
+            "tokens_saved": max(full_tokens - prompt_tokens, 0),
+            "over_budget": over_budget,
+        }
+
+    def _profile(self, resume_text, jd_text, resume_skills, jd_skills):
+        """Skills, gaps and metrics: the compact facts every prompt starts from."""
+        resume_skills = self._skills(resume_text, resume_skills)
+        jd_skills = self._skills(jd_text, jd_skills) if jd_text else (list(jd_skills) if jd_skills else None)
+        metrics, _ = self.analyzer.detect_metrics(resume_text)
+        lines = []
+        # Unknown skills are left out: "none detected" would tell the model something false
+        if resume_skills is not None:
+            lines.append(f"CANDIDATE SKILLS: {', '.join(resume_skills) or 'none detected'}")
+        if jd_skills and resume_skills is not None:
+            gaps = self._gaps(jd_skills, resume_skills)
+            lines.append(f"SKILLS THE JD ASKS FOR BUT THE RESUME LACKS: {', '.join(gaps) or 'none'}")
+        lines.append(f"QUANTIFIED RESULTS IN THE RESUME: {', '.join(metrics[:self.max_metrics]) or 'none'}")
+        return "\n".join(lines)
+
+    def _fill(self, fixed, resume_text, jd_text, resume_reference, jd_reference):
+        """Splits what the fixed sections leave over between a JD excerpt and resume chunks."""
+        remaining = self.token_budget - estimate_tokens(fixed)
+        jd_excerpt = ""
+        if jd_text:
+            jd_budget = int(max(remaining, 0) * self.jd_share)
+            jd_excerpt = "\n".join(self.relevant_chunks(jd_text, jd_reference, jd_budget))
+            remaining -= estimate_tokens(jd_excerpt)
+        resume_excerpt = "\n...\n".join(self.relevant_chunks(resume_text, resume_reference, remaining))
+        return jd_excerpt, resume_excerpt
+
+    # --- Prompts ---
+    def build_feedback(self, scores, resume_text, jd_text, resume_skills=None, jd_skills=None):
+        header = f"""You are an expert Career Coach and ATS Specialist.
+Analyze these scores:
+- Overall Match: {scores['total_score']*100:.1f}%
+- Keyword Match: {scores['keyword_match']*100:.1f}%
+- Impact Score: {scores['impact_score']*100:.1f}%
+"""
+        task = "Provide 3 actionable steps to improve these scores."
+        profile = self._profile(resume_text, jd_text, resume_skills, jd_skills)
+
+        # The JD chunks densest in the JD's own key terms, the resume chunks closest to the JD
+        jd_excerpt, resume_excerpt = self._fill(header + profile + task, resume_text, jd_text,
+                                                resume_reference=jd_text, jd_reference=jd_text)
+        prompt = (
+            f"{header}\n{profile}\n\n"
+            f"MOST RELEVANT RESUME EXCERPTS:\n{resume_excerpt}\n\n"
+            f"JOB DESCRIPTION (KEY PARTS):\n{jd_excerpt}\n\n{task}"
+        )
+        full_prompt = f"{header}\nRESUME: {resume_text}\nJOB DESCRIPTION: {jd_text}\n\n{task}"
+        return prompt, self._report(prompt, full_prompt)
+
+    def build_chat(self, user_query, resume_text, history=None, jd_text=None,
+                   resume_skills=None, jd_skills=None):
+        summary, recent = self.summarize_history(history)
+        profile = self._profile(resume_text, jd_text, resume_skills, jd_skills)
+
+        # Verbatim turns get what the profile, summary and question leave over;
+        # turns that don't fit join the summary, which shrinks what is left
+        overflow = []
+        while True:
+            full_summary = "\n".join(filter(None, [summary, self._summarize(overflow)]))
+            turn_budget = self.token_budget - estimate_tokens(profile + full_summary + user_query) - 20
+            kept, more = self.fit_turns(recent[len(overflow):], turn_budget)
+            if not more:
+                break
+            overflow += more
+        summary, recent = full_summary, kept
+        conversation = "\n".join(f"{t['role']}: {t['content']}" for t in recent)
+
+        # For chat the question decides which chunks matter
+        fixed = profile + summary + conversation + user_query
+        jd_excerpt, resume_excerpt = self._fill(fixed, resume_text, jd_text,
+                                                resume_reference=f"{user_query}\n{jd_text or ''}",
+                                                jd_reference=user_query)
+
+        sections = [profile, f"RESUME EXCERPTS:\n{resume_excerpt}"]
+        if jd_excerpt:
+            sections.append(f"JOB DESCRIPTION (KEY PARTS):\n{jd_excerpt}")
+        if summary:
+            sections.append(f"EARLIER IN THIS CONVERSATION:\n{summary}")
+        if conversation:
+            sections.append(f"RECENT MESSAGES:\n{conversation}")
+        sections.append(f"Question: {user_query}")
+        prompt = "\n\n".join(sections)
+
+        full_history = "\n".join(f"{t['role']}: {t['content']}" for t in history or [])
+        full_prompt = f"Context: {resume_text}\n\n{full_history}\n\nQuestion: {user_query}"
+        return prompt, self._report(prompt, full_prompt)
@@ -0,0 +1,30 @@
+import time
+import asyncio
+
+class AsyncTokenBucket:
+    """
+    Token-bucket rate limiter for asyncio code: `rate` tokens are added per
+    second, up to `capacity` (the largest burst allowed). acquire() waits
+    until enough tokens are available.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1.0))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens=1.0):
+        # One waiter at a time, so requests are served in arrival order
+        async with self._lock:
+            self._refill()
+            while self._tokens < tokens:
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= tokens
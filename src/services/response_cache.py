@@ -0,0 +1,112 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+
+class ResponseCache:
+    """
+    Persistent cache of LLM responses, keyed by model ID plus a hash of the
+    whitespace-normalized prompt, so asking the same question about the same
+    resume twice costs one API call.
+
+    - Backed by a single SQLite file; safe to share between threads.
+    - Entries older than `ttl_seconds` are treated as misses and deleted.
+    - Past `max_entries`, the least recently used entries are evicted
+      (down to 90%, so we don't evict on every put).
+    """
+
+    _WHITESPACE = re.compile(r"\s+")
+
+    def __init__(self, db_path, ttl_seconds=7 * 24 * 3600, max_entries=5000):
+        self.db_path = os.path.abspath(db_path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                input_tokens INTEGER NOT NULL,
+                output_tokens INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)")
+        self._conn.commit()
+
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def normalize(cls, prompt):
+        return cls._WHITESPACE.sub(" ", prompt).strip()
+
+    @classmethod
+    def key(cls, model_id, prompt):
+        data = f"{model_id}\0{cls.normalize(prompt)}".encode("utf-8")
+        return hashlib.sha256(data).hexdigest()
+
+    def get(self, key, now=None):
+        """Returns (response, usage) or None. `usage` holds the original token counts."""
+        now = now or time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, input_tokens, output_tokens, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[3] > self.ttl_seconds:
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return row[0], {"input": row[1], "output": row[2]}
+
+    def put(self, key, model_id, response, usage, now=None):
+        now = now or time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, model_id, response, usage.get("input") or 0, usage.get("output") or 0, now, now),
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            if count > self.max_entries:
+                self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        # Expired entries go first, then the least recently used
+        self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+        target = int(self.max_entries * 0.9)
+        self._conn.execute(
+            "DELETE FROM responses WHERE key IN "
+            "(SELECT key FROM responses ORDER BY last_access ASC LIMIT MAX(0, (SELECT COUNT(*) FROM responses) - ?))",
+            (target,),
+        )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
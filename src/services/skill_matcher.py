@@ -0,0 +1,145 @@
+import re
+import json
+import os
+import itertools
+from collections import deque
+
+class SkillMatcher:
+    """
+    Dictionary-based skill extraction: the verified skills list (plus aliases)
+    is compiled into one Aho-Corasick automaton, so a document is scanned in a
+    single linear pass regardless of how many skills we know about.
+
+    - Matching is case-insensitive and tolerant of spacing/punctuation
+      variants ("React.js", "ReactJS", "React JS").
+    - Only forms whose lowercase is an ordinary word or letter ("Go", "R",
+      "C", "TS", see AMBIGUOUS) stay case-sensitive; "aws" and "sql" match
+      like "AWS" and "SQL". Matches are whole words either way, and a dot
+      between two alphanumerics joins a word ("Node.js" doesn't contain "JS").
+    - Every hit is reported under its canonical name ("K8s" -> "Kubernetes").
+    """
+
+    # Lowercased forms that are only a skill when written as such ("go" vs "Go"/"GO")
+    AMBIGUOUS = frozenset({"go", "r", "c", "d", "as", "it", "ml", "dl", "ts"})
+
+    _SEPARATORS = re.compile(r"[ .\-]")
+    _WHITESPACE = re.compile(r"\s+")
+
+    def __init__(self, skills, aliases=None):
+        aliases = aliases or {}
+
+        # 1. Every surface form we accept, mapped to its canonical skill
+        surface_forms = {s: aliases.get(s, s) for s in skills}
+        surface_forms.update(aliases)
+
+        # 2. Compile the automaton
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]  # per state: (length, canonical, case-sensitive form or None)
+        for form, canonical in surface_forms.items():
+            case_sensitive = form if form.lower() in self.AMBIGUOUS else None
+            for variant in self._variants(form):
+                self._add(variant, canonical, case_sensitive)
+        self._build_failure_links()
+
+    @classmethod
+    def from_files(cls, skills_json="skills_list.json", aliases_json="skill_aliases.json"):
+        with open(skills_json, "r") as f:
+            skills = json.load(f)
+        aliases = {}
+        if aliases_json and os.path.exists(aliases_json):
+            with open(aliases_json, "r") as f:
+                aliases = json.load(f)
+        return cls(skills, aliases)
+
+    # --- Compilation ---
+    @classmethod
+    def _variants(cls, form):
+        """'Vue.js' -> {'vue.js', 'vuejs', 'vue js', 'vue-js'}"""
+        parts = cls._SEPARATORS.split(form.lower())
+        parts = [p for p in parts if p] or [form.lower()]
+        if len(parts) == 1:
+            return {form.lower()}
+        joins = itertools.product(["", " ", ".", "-"], repeat=len(parts) - 1)
+        variants = set()
+        for seps in joins:
+            variants.add(parts[0] + "".join(s + p for s, p in zip(seps, parts[1:])))
+        return variants
+
+    def _add(self, pattern, canonical, case_sensitive):
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        entry = (len(pattern), canonical, case_sensitive)
+        if entry not in self._out[state]:
+            self._out[state].append(entry)
+
+    def _build_failure_links(self):
+        # Breadth-first, so a state's failure target is always finished first
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    # --- Matching ---
+    def find(self, text):
+        """
+        Returns non-overlapping (start, end, canonical) spans over the
+        whitespace-normalized text, preferring the longest match at each start.
+        """
+        norm = self._WHITESPACE.sub(" ", text)
+        low = norm.lower()
+        if len(low) != len(norm):  # rare unicode case folds change length
+            low = "".join(c if len(c.lower()) != 1 else c.lower() for c in norm)
+
+        goto, fail, out = self._goto, self._fail, self._out
+        hits = []
+        state = 0
+        for i, ch in enumerate(low):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, canonical, case_sensitive in out[state]:
+                start = i - length + 1
+                end = i + 1
+                # Whole-word matches only
+                if self._joined(low, start - 1, -1) or self._joined(low, end, 1):
+                    continue
+                if case_sensitive and norm[start:end] not in (case_sensitive, case_sensitive.upper()):
+                    continue
+                hits.append((start, end, canonical))
+
+        # Leftmost-longest, non-overlapping
+        hits.sort(key=lambda h: (h[0], h[0] - h[1]))
+        spans, last_end = [], 0
+        for start, end, canonical in hits:
+            if start >= last_end:
+                spans.append((start, end, canonical))
+                last_end = end
+        return spans
+
+    @staticmethod
+    def _joined(low, i, step):
+        """Whether low[i], next to a match, continues the word: alphanumeric, or a '.' before one."""
+        if not 0 <= i < len(low):
+            return False
+        if low[i].isalnum():
+            return True
+        return low[i] == "." and 0 <= i + step < len(low) and low[i + step].isalnum()
+
+    def extract(self, text):
+        """Canonical skills in order of first appearance, without duplicates."""
+        return list(dict.fromkeys(canonical for _, _, canonical in self.find(text)))
@@ -0,0 +1,223 @@
+import os
+import json
+import time
+import atexit
+import sqlite3
+import threading
+
+class HfDatasetHub:
+    """The usage file in a Hugging Face dataset repo: {user: count}."""
+
+    def __init__(self, repo_id, filename="usage.json", token=None):
+        from huggingface_hub import HfApi
+        self.repo_id = repo_id
+        self.filename = filename
+        self.token = token
+        self.api = HfApi(token=token)
+
+    def download(self):
+        """Current counts; {} if the file doesn't exist yet. Network errors are raised."""
+        from huggingface_hub import hf_hub_download
+        from huggingface_hub.errors import EntryNotFoundError
+        try:
+            path = hf_hub_download(repo_id=self.repo_id, filename=self.filename,
+                                   repo_type="dataset", token=self.token)
+        except EntryNotFoundError:
+            return {}
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def upload(self, counts):
+        self.api.upload_file(
+            path_or_fileobj=json.dumps(counts).encode("utf-8"),
+            path_in_repo=self.filename,
+            repo_id=self.repo_id,
+            repo_type="dataset",
+            commit_message=f"Usage sync ({len(counts)} users)",
+        )
+
+class LocalHub:
+    """
+    Stand-in for HfDatasetHub backed by a JSON file: for local runs without
+    an HF token, and for exercising the sync logic without the network.
+    `latency` simulates the hub round-trip.
+    """
+
+    def __init__(self, path, latency=0.0):
+        self.path = os.path.abspath(path)
+        self.latency = latency
+        self.downloads = 0
+        self.uploads = 0
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+    def download(self):
+        time.sleep(self.latency)
+        self.downloads += 1
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, "r") as f:
+            return json.load(f)
+
+    def upload(self, counts):
+        time.sleep(self.latency)
+        self.uploads += 1
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(counts, f)
+        os.replace(tmp_path, self.path)
+
+class UsageStore:
+    """
+    Per-user scan counts, kept in a local SQLite file and synced to a hub
+    (HfDatasetHub or LocalHub) in the background.
+
+    - increment() is one transaction, so two sessions can't both spend the
+      user's last scan; with `limit` it refuses instead of going over.
+    - get() answers from an in-memory cache for `cache_ttl` seconds.
+    - sync() (every `sync_interval` seconds once start() is called, and at
+      exit) downloads the hub file, adds the increments made here since the
+      last sync and uploads the result in one commit. Counts added by other
+      replicas in between are kept rather than overwritten. Nothing is
+      uploaded when there are no new increments.
+
+    Several processes may share the SQLite file, but only one of them should
+    sync it (each would push the same pending increments).
+    """
+
+    def __init__(self, db_path, hub=None, cache_ttl=5.0, sync_interval=60.0):
+        self.db_path = os.path.abspath(db_path)
+        self.hub = hub
+        self.cache_ttl = cache_ttl
+        self.sync_interval = sync_interval
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # base: the hub's count at the last sync, so count - base is what we still owe it
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS usage (
+                user TEXT PRIMARY KEY,
+                count INTEGER NOT NULL,
+                base INTEGER NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+        self._cache = {}  # user -> (count, expires)
+        self._stop = threading.Event()
+        self._syncer = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.syncs = 0
+        self.uploads = 0
+        self.sync_errors = 0
+        self.last_sync = None
+
+    # --- Counts ---
+    def get(self, user, now=None):
+        now = now or time.time()
+        cached = self._cache.get(user)
+        if cached and cached[1] > now:
+            self.cache_hits += 1
+            return cached[0]
+        self.cache_misses += 1
+        with self._lock:
+            row = self._conn.execute("SELECT count FROM usage WHERE user = ?", (user,)).fetchone()
+        count = row[0] if row else 0
+        self._cache[user] = (count, now + self.cache_ttl)
+        return count
+
+    def increment(self, user, n=1, limit=None):
+        """Adds `n` and returns the new count, or None if that would exceed `limit`."""
+        with self._lock:
+            with self._conn:
+                self._conn.execute("INSERT OR IGNORE INTO usage (user, count, base) VALUES (?, 0, 0)", (user,))
+                updated = self._conn.execute(
+                    "UPDATE usage SET count = count + ? WHERE user = ? AND (? IS NULL OR count + ? <= ?)",
+                    (n, user, limit, n, limit),
+                ).rowcount
+                count = self._conn.execute("SELECT count FROM usage WHERE user = ?", (user,)).fetchone()[0]
+        self._cache[user] = (count, time.time() + self.cache_ttl)
+        return count if updated else None
+
+    def all_counts(self):
+        with self._lock:
+            return dict(self._conn.execute("SELECT user, count FROM usage").fetchall())
+
+    # --- Hub sync ---
+    def sync(self):
+        """
+        Pulls the hub's counts and pushes ours. Returns True if it uploaded.
+        A failed download or upload leaves the local state as it was, so the
+        increments are retried on the next sync.
+        """
+        if self.hub is None:
+            return False
+        with self._sync_lock:
+            with self._lock:
+                snapshot = {user: (count, base) for user, count, base in
+                            self._conn.execute("SELECT user, count, base FROM usage")}
+            try:
+                remote = self.hub.download()
+                merged = dict(remote)
+                pending = False
+                for user, (count, base) in snapshot.items():
+                    delta = count - base
+                    pending = pending or delta != 0
+                    merged[user] = max(remote.get(user, 0), base) + delta
+                if pending:
+                    self.hub.upload(merged)
+                    self.uploads += 1
+            except Exception as e:
+                self.sync_errors += 1
+                print(f"Usage sync error: {e}")
+                return False
+
+            with self._lock:
+                with self._conn:
+                    # Increments made while we were talking to the hub stay pending
+                    self._conn.executemany(
+                        """INSERT INTO usage (user, count, base) VALUES (?, ?, ?)
+                           ON CONFLICT(user) DO UPDATE SET count = count + excluded.base - ?, base = excluded.base""",
+                        [(user, total, total, snapshot.get(user, (0, 0))[0]) for user, total in merged.items()],
+                    )
+            self._cache.clear()
+            self.syncs += 1
+            self.last_sync = time.time()
+            return pending
+
+    def start(self):
+        """Initial pull, then sync() every `sync_interval` seconds on a daemon thread."""
+        if self._syncer is not None and self._syncer.is_alive():
+            return
+        self.sync()
+
+        def loop():
+            while not self._stop.wait(self.sync_interval):
+                self.sync()
+
+        self._stop.clear()
+        self._syncer = threading.Thread(target=loop, name="usage-sync", daemon=True)
+        self._syncer.start()
+        # Push whatever is still pending when the process exits
+        atexit.register(self.stop)
+
+    def stop(self):
+        self._stop.set()
+        self.sync()
+
+    def stats(self):
+        with self._lock:
+            pending = self._conn.execute("SELECT COUNT(*) FROM usage WHERE count != base").fetchone()[0]
+        return {
+            "users": len(self.all_counts()),
+            "pending_users": pending,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "syncs": self.syncs,
+            "uploads": self.uploads,
+            "sync_errors": self.sync_errors,
+            "last_sync": self.last_sync,
+        }
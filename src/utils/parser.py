@@ -1,54 +1,419 @@
+import io
 import os
+import time
+import signal
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import pdfplumber # Upgraded from PyPDF2 for better accuracy
 from docx import Document
+from src.utils.text_cache import ParsedTextCache
+from src.utils.tracing import tracer
+
+class ParseTimeout(BaseException):
+    # BaseException so the "except Exception" handlers in the extractors can't swallow it
+    pass
+
+def _raise_timeout(signum, frame):
+    raise ParseTimeout()
+
+def _parse_job(source, filename, page_range, timeout, max_pages, max_bytes):
+    """
+    Process-pool entry point: parses one document (or one page range of a
+    PDF). The timeout is enforced inside the worker with an interval timer,
+    so a pathological file frees its worker instead of blocking it.
+    Returns (text, wall seconds, CPU seconds); a worker runs one job at a
+    time, so its process CPU time is this job's alone.
+    """
+    wall, cpu = time.perf_counter(), time.process_time()
+    use_timer = timeout and hasattr(signal, "setitimer")
+    if use_timer:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        parser = ResumeParser(max_pages=max_pages, max_bytes=max_bytes, use_cache=False)
+        if page_range is not None:
+            text = parser.extract_pdf_pages(source, *page_range)
+        else:
+            text = parser.extract_text(source, filename)
+    except ParseTimeout:
+        kind = os.path.splitext(filename)[1].lstrip(".").upper() or "file"
+        text = f"Error parsing {kind}: timed out after {timeout}s"
+    finally:
+        if use_timer:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    return text, time.perf_counter() - wall, time.process_time() - cpu
 
 class ResumeParser:
     """
     Responsible for converting unstructured Binary Data (PDF/Docx/Txt)
     into a Raw Text Stream.
+
+    Sources can be a file path, raw bytes, or a binary file-like object
+    (e.g. a Streamlit UploadedFile), so uploads never touch the disk.
+    - max_pages: only the first `max_pages` pages of a PDF are read.
+    - max_bytes: larger documents are rejected without being parsed.
+
+    Extracted text is cached on disk by content hash (see ParsedTextCache).
+    Priority for the cache location: Env Var > Argument > Default Local Path.
+
+    parse_batch() starts its worker pool on first use and keeps it for later
+    batches; close() shuts it down.
     """
 
-    def extract_text(self, file_path: str) -> str:
+    def __init__(self, max_pages: int = 50, max_bytes: int = 10 * 1024 * 1024,
+                 cache_dir: str = None, use_cache: bool = True,
+                 cache_max_bytes: int = 256 * 1024 * 1024):
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+        self.cache = None
+        if use_cache:
+            cache_dir = os.getenv("PARSED_TEXT_CACHE_DIR", cache_dir or "./parsed_text_cache")
+            self.cache = ParsedTextCache(cache_dir, max_bytes=cache_max_bytes)
+        self._pool = None
+        self._pool_workers = 0
+        self._pool_lock = threading.Lock()
+
+    def extract_text(self, source, filename: str = None, char_budget: int = None) -> str:
         """
         Universal dispatcher that selects the correct extraction method.
+        `filename` supplies the extension when `source` is bytes or a stream.
+        With `char_budget`, parsing stops once that many characters are read.
         """
-        ext = os.path.splitext(file_path)[1].lower()
-        
+        if char_budget is not None:
+            failures = []
+            text = "".join(self.iter_pages(source, filename, char_budget=char_budget, failures=failures))
+            # Pages read before a failure aren't returned as if they were the resume
+            return failures[0] if failures else text
+
+        name = self._name_of(source, filename)
+        error = self._check_size(source, name)
+        if error:
+            return error
+
+        key = None
+        if self.cache is not None:
+            try:
+                source = self._read_bytes(source)
+            except OSError as e:
+                return self._read_error(name, e)
+            key = self._cache_key(source, name)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        text = self._extract_uncached(source, name)
+        if key is not None and not text.startswith("Error"):
+            self.cache.put(key, text)
+        return text
+
+    def _extract_uncached(self, source, name):
+        ext = os.path.splitext(name)[1].lower()
         if ext == '.pdf':
-            return self.extract_text_from_pdf(file_path)
+            return self.extract_text_from_pdf(source)
         elif ext == '.docx':
-            return self.extract_text_from_docx(file_path)
+            return self.extract_text_from_docx(source)
         elif ext == '.txt':
-            return self.extract_text_from_txt(file_path)
+            return self.extract_text_from_txt(source)
         else:
             return f"Error: Unsupported file format {ext}"
 
-    def extract_text_from_pdf(self, pdf_path: str) -> str:
-        text = ""
+    def iter_pages(self, source, filename: str = None, char_budget: int = None, failures: list = None):
+        """
+        Yields a document's text page by page as it is extracted, so callers
+        can start work early. Stops once `char_budget` characters have been
+        yielded (the last page is trimmed to fit).
+        DOCX/TXT files and cache hits come out as a single "page".
+        Errors are yielded as an "Error ..." page and, if given, appended to
+        `failures`.
+        """
+        failures = [] if failures is None else failures  # set by the extractor, not guessed from the text
+        name = self._name_of(source, filename)
+        error = self._check_size(source, name)
+        if error:
+            failures.append(error)
+            yield error
+            return
+
+        key = None
+        if self.cache is not None:
+            try:
+                source = self._read_bytes(source)
+            except OSError as e:
+                failures.append(self._read_error(name, e))
+                yield failures[-1]
+                return
+            key = self._cache_key(source, name)
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield cached[:char_budget] if char_budget is not None else cached
+                return
+
+        if os.path.splitext(name)[1].lower() == '.pdf':
+            pages = self._iter_pdf_pages(source, failures)
+        else:
+            text = self._extract_uncached(source, name)
+            if text.startswith("Error"):
+                failures.append(text)
+            pages = iter([text])
+
+        emitted, parts, complete = 0, [], True
+        for page in pages:
+            if char_budget is not None and emitted + len(page) > char_budget:
+                page = page[:char_budget - emitted]
+                complete = False
+            emitted += len(page)
+            parts.append(page)
+            yield page
+            if not complete:
+                break
+        # Only a document read to the end without errors is worth caching
+        if complete and not failures and key is not None:
+            self.cache.put(key, "".join(parts))
+
+    def _iter_pdf_pages(self, pdf_source, failures=None):
+        """Pages as they are extracted; on failure yields the error text and records it in `failures`."""
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
+            with pdfplumber.open(self._open(pdf_source)) as pdf:
+                pages = pdf.pages[:self.max_pages] if self.max_pages else pdf.pages
+                for page in pages:
                     content = page.extract_text()
+                    if hasattr(page, "close"):
+                        page.close()  # drop the parsed layout objects as we go
                     if content:
-                        text += content + "\n"
+                        yield content + "\n"
+        except Exception as e:
+            error = f"Error parsing PDF: {e}"
+            if failures is not None:
+                failures.append(error)
+            yield error
+
+    @staticmethod
+    def _name_of(source, filename):
+        return filename or (source if isinstance(source, str) else getattr(source, "name", ""))
+
+    def _check_size(self, source, name):
+        size = self._size_of(source)
+        if self.max_bytes and size is not None and size > self.max_bytes:
+            return f"Error: {os.path.basename(name)} is {size / 2**20:.1f} MB (limit {self.max_bytes / 2**20:.0f} MB)"
+        return None
+
+    def _cache_key(self, data, name):
+        ext = os.path.splitext(name)[1].lower().lstrip(".")
+        return self.cache.key(data, variant=f"{ext}{self.max_pages or 0}")
+
+    @staticmethod
+    def _read_error(name, e):
+        kind = os.path.splitext(name)[1].lstrip(".").upper() or "file"
+        return f"Error parsing {kind}: {e}"
+
+    @staticmethod
+    def _read_bytes(source):
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return bytes(source)
+        if isinstance(source, str):
+            with open(source, "rb") as f:
+                return f.read()
+        return source.getvalue() if hasattr(source, "getvalue") else source.read()
+
+    @staticmethod
+    def _open(source):
+        """Paths and streams pass through; raw bytes get wrapped in a stream."""
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return io.BytesIO(source)
+        return source
+
+    @staticmethod
+    def _size_of(source):
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return len(source)
+        if isinstance(source, str):
+            return os.path.getsize(source) if os.path.exists(source) else None
+        size = getattr(source, "size", None)
+        return size if isinstance(size, int) else None
+
+    def extract_text_from_pdf(self, pdf_source) -> str:
+        try:
+            with pdfplumber.open(self._open(pdf_source)) as pdf:
+                pages = pdf.pages[:self.max_pages] if self.max_pages else pdf.pages
+                # Collect and join once: repeated += is quadratic on long PDFs
+                parts = [content + "\n" for content in (page.extract_text() for page in pages) if content]
         except Exception as e:
             return f"Error parsing PDF: {e}"
-        return text
+        return "".join(parts)
 
-    def extract_text_from_docx(self, docx_path: str) -> str:
+    def extract_pdf_pages(self, pdf_source, start: int, end: int) -> str:
+        """Text of pages [start, end) only; used to split big PDFs across workers."""
         try:
-            doc = Document(docx_path)
+            with pdfplumber.open(self._open(pdf_source)) as pdf:
+                parts = [content + "\n" for content in (page.extract_text() for page in pdf.pages[start:end]) if content]
+        except Exception as e:
+            return f"Error parsing PDF: {e}"
+        return "".join(parts)
+
+    def count_pdf_pages(self, pdf_source) -> int:
+        try:
+            with pdfplumber.open(self._open(pdf_source)) as pdf:
+                return len(pdf.pages)
+        except Exception:
+            return 0
+
+    def extract_text_from_docx(self, docx_source) -> str:
+        try:
+            doc = Document(self._open(docx_source))
             return "\n".join([para.text for para in doc.paragraphs])
         except Exception as e:
             return f"Error parsing DOCX: {e}"
 
-    def extract_text_from_txt(self, txt_path: str) -> str:
+    def extract_text_from_txt(self, txt_source) -> str:
         try:
-            with open(txt_path, 'r', encoding='utf-8', errors='ignore') as f:
-                return f.read()
+            if isinstance(txt_source, str):
+                with open(txt_source, 'r', encoding='utf-8', errors='ignore') as f:
+                    return f.read()
+            data = txt_source if isinstance(txt_source, (bytes, bytearray, memoryview)) else txt_source.read()
+            return bytes(data).decode('utf-8', errors='ignore')
         except Exception as e:
             return f"Error parsing TXT: {e}"
 
-               
-        
-    
\ No newline at end of file
+    def parse_batch(self, documents, max_workers: int = None, timeout: float = 30.0,
+                    pages_per_job: int = 10):
+        """
+        Parses many documents in parallel across a process pool.
+        - documents: list of (filename, source) pairs; source is a path, bytes
+          or a binary stream.
+        - timeout: per-document (per page-range job) limit in seconds.
+        - pages_per_job: PDFs longer than this are split into page ranges that
+          run on different workers and are stitched back in order.
+        Returns the extracted texts in input order (errors as "Error ..." strings,
+        like extract_text). Documents already in the text cache are not sent
+        to the pool at all; every other document gets a "parse_doc" trace
+        record with its own wall and CPU time.
+        """
+        # Streams can't cross process boundaries; read them once here
+        docs = []
+        for filename, source in documents:
+            if not isinstance(source, (str, bytes, bytearray)):
+                source = source.getvalue() if hasattr(source, "getvalue") else source.read()
+            docs.append((filename, bytes(source) if isinstance(source, (bytearray, memoryview)) else source))
+
+        if pages_per_job < 1:
+            raise ValueError(f"pages_per_job must be at least 1, got {pages_per_job}")
+        max_workers = max_workers or os.cpu_count() or 1
+        if max_workers == 1 or len(docs) <= 1 and not self._is_large_pdf(docs, pages_per_job):
+            texts = []
+            for filename, source in docs:
+                with tracer.span("parse_doc", docs=1, file=filename):
+                    texts.append(self.extract_text(source, filename))
+            return texts
+
+        # 0. Cache lookups
+        texts = [None] * len(docs)
+        keys = [None] * len(docs)
+        if self.cache is not None:
+            for i, (filename, source) in enumerate(docs):
+                if self._check_size(source, filename):
+                    continue
+                try:
+                    data = self._read_bytes(source)
+                except OSError as e:
+                    texts[i] = self._read_error(filename, e)  # not cached: keys[i] stays None
+                    continue
+                keys[i] = self._cache_key(data, filename)
+                texts[i] = self.cache.get(keys[i])
+
+        # 1. Plan the jobs: one per document, or one per page range of a big PDF
+        jobs = []  # (doc index, args)
+        for i, (filename, source) in enumerate(docs):
+            if texts[i] is not None:
+                continue
+            size = self._size_of(source)
+            too_big = self.max_bytes and size is not None and size > self.max_bytes
+            n_pages = self.count_pdf_pages(source) if filename.lower().endswith(".pdf") and not too_big else 0
+            if self.max_pages:
+                n_pages = min(n_pages, self.max_pages)
+            if n_pages > pages_per_job:
+                for start in range(0, n_pages, pages_per_job):
+                    page_range = (start, min(start + pages_per_job, n_pages))
+                    jobs.append((i, (source, filename, page_range, timeout, self.max_pages, self.max_bytes)))
+            else:
+                jobs.append((i, (source, filename, None, timeout, self.max_pages, self.max_bytes)))
+
+        # 2. Run them on the shared pool
+        parts = [[] for _ in docs]
+        timings = [[0.0, 0.0] for _ in docs]  # wall, CPU summed over a document's jobs
+        if not jobs:
+            return texts
+        pool = self._get_pool(max_workers)
+        try:
+            futures = [(i, args, pool.submit(_parse_job, *args)) for i, args in jobs]
+        except BrokenProcessPool:
+            self._discard_pool(pool)
+            futures = [(i, args, None) for i, args in jobs]
+        for i, args, future in futures:
+            try:
+                if future is None:
+                    raise BrokenProcessPool()
+                text, wall, cpu = future.result()
+            except BrokenProcessPool:
+                # A dead worker breaks the whole pool: finish the batch here instead
+                self._discard_pool(pool)
+                wall, cpu = time.perf_counter(), time.process_time()
+                text = self._parse_in_process(*args[:3])
+                wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            except Exception as e:
+                text, wall, cpu = f"Error parsing {docs[i][0]}: {e}", 0.0, 0.0
+            parts[i].append(text)
+            timings[i][0] += wall
+            timings[i][1] += cpu
+
+        # 3. A failed page range fails the whole document
+        for i, chunks in enumerate(parts):
+            if texts[i] is not None:
+                continue
+            errors = [c for c in chunks if c.startswith("Error")]
+            texts[i] = errors[0] if errors else "".join(chunks)
+            tracer.record("parse_doc", *timings[i], docs=1, file=docs[i][0], jobs=len(chunks))
+            if keys[i] is not None and not errors:
+                self.cache.put(keys[i], texts[i])
+        return texts
+
+    def _get_pool(self, max_workers):
+        """The worker pool, started on first use (and again if `max_workers` changes)."""
+        with self._pool_lock:
+            if self._pool is not None and self._pool_workers != max_workers:
+                self._pool.shutdown(wait=False)
+                self._pool = None
+            if self._pool is None:
+                # forkserver keeps workers free of the parent's model threads
+                methods = multiprocessing.get_all_start_methods()
+                ctx = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+                self._pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx)
+                self._pool_workers = max_workers
+            return self._pool
+
+    def _discard_pool(self, pool):
+        """Drops a broken pool (unless another batch already replaced it)."""
+        with self._pool_lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def close(self):
+        """Shuts the worker pool down; the next parse_batch() starts a new one."""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def _parse_in_process(self, source, filename, page_range):
+        """_parse_job without a worker (and so without its timeout)."""
+        if page_range is not None:
+            return self.extract_pdf_pages(source, *page_range)
+        return self._check_size(source, filename) or self._extract_uncached(source, filename)
+
+    def _is_large_pdf(self, docs, pages_per_job):
+        return any(
+            filename.lower().endswith(".pdf") and self.count_pdf_pages(source) > pages_per_job
+            for filename, source in docs
+        )
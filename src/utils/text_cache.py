@@ -0,0 +1,93 @@
+import os
+import hashlib
+import threading
+
+class ParsedTextCache:
+    """
+    On-disk cache of extracted document text, keyed by a hash of the raw file
+    bytes, so re-uploading the same resume skips parsing entirely.
+
+    Each entry is one UTF-8 file under a two-character shard directory. Reads
+    refresh the file's mtime; once the cache grows past `max_bytes` the
+    least recently used files are deleted first.
+    """
+
+    def __init__(self, cache_dir, max_bytes=256 * 1024 * 1024):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._total = sum(size for _, _, size in self._entries())
+
+    @staticmethod
+    def key(data, variant=""):
+        """Content hash of the raw bytes; `variant` separates parser settings."""
+        digest = hashlib.sha256(data).hexdigest()
+        return f"{digest}-{variant}" if variant else digest
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".txt")
+
+    def _entries(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".txt"):
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    yield path, st.st_mtime, st.st_size
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+        except OSError:
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        self.hits += 1
+        return text
+
+    def put(self, key, text):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        with self._lock:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+            self._total += os.path.getsize(path) - old_size
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Oldest first, down to 90% of the budget so we don't evict on every put
+        target = int(self.max_bytes * 0.9)
+        for path, _, size in sorted(self._entries(), key=lambda e: e[1]):
+            if self._total <= target:
+                break
+            try:
+                os.remove(path)
+                self._total -= size
+            except OSError:
+                pass
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "bytes": self._total,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,203 @@
+import os
+import json
+import time
+import logging
+import threading
+import tracemalloc
+from collections import deque
+
+logger = logging.getLogger("ats.trace")
+
+class _NoopSpan:
+    """What span() hands out while tracing is off: entering it costs one method call."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **labels):
+        pass
+
+_NOOP = _NoopSpan()
+
+class _Span:
+    __slots__ = ("tracer", "name", "labels", "wall", "cpu", "mem_start", "mem_peak")
+
+    def __init__(self, tracer, name, labels):
+        self.tracer = tracer
+        self.name = name
+        self.labels = labels
+
+    def set(self, **labels):
+        """Adds labels once they are known (e.g. a document count)."""
+        self.labels.update(labels)
+
+    def __enter__(self):
+        if self.tracer.memory:
+            stack = self.tracer._stack()
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                # The enclosing span's peak so far, before we reset the counter
+                stack[-1].mem_peak = max(stack[-1].mem_peak, peak)
+            tracemalloc.reset_peak()
+            self.mem_start = self.mem_peak = current
+            stack.append(self)
+        self.cpu = time.process_time()
+        self.wall = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.wall
+        cpu = time.process_time() - self.cpu
+        peak = None
+        if self.tracer.memory:
+            stack = self.tracer._stack()
+            self.mem_peak = max(self.mem_peak, tracemalloc.get_traced_memory()[1])
+            if stack and stack[-1] is self:
+                stack.pop()
+            if stack:
+                stack[-1].mem_peak = max(stack[-1].mem_peak, self.mem_peak)
+            peak = self.mem_peak - self.mem_start
+        self.tracer._record(self.name, self.labels, wall, cpu, peak)
+        return False
+
+class Tracer:
+    """
+    Lightweight spans around pipeline stages:
+
+        with tracer.span("parse", docs=len(files)):
+            ...
+
+    Each span records wall time, the CPU time of the whole process while it
+    ran (time.process_time(): every thread, so concurrent stages overlap, and
+    no ProcessPool workers) and, with `memory`, the peak growth of the Python
+    heap while it ran (tracemalloc; numpy buffers are included, torch tensors
+    are not). tracemalloc's peak is process-global and every span resets it,
+    so heap peaks are only meaningful while one run executes at a time:
+    concurrent Streamlit sessions or server requests reset each other's.
+    Work timed elsewhere comes in through record(); parse_batch uses it for
+    one "parse_doc" record per document, with that worker's own CPU time.
+
+    Disabled (the default) span() returns a shared no-op object. Enabled,
+    totals per stage are kept for Prometheus export and the most recent spans
+    for run summaries; each span is also logged as JSON on the "ats.trace" logger.
+    Env: ATS_TRACING=1 enables timing, ATS_TRACING_MEMORY=1 adds memory.
+    """
+
+    def __init__(self, enabled=None, memory=None, keep=2000):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._totals = {}
+        self._recent = deque(maxlen=keep)
+        self._count = 0
+        self.enabled = False
+        self.memory = False
+        self.configure(
+            enabled=os.getenv("ATS_TRACING", "0") == "1" if enabled is None else enabled,
+            memory=os.getenv("ATS_TRACING_MEMORY", "0") == "1" if memory is None else memory,
+        )
+
+    def configure(self, enabled=None, memory=None):
+        """Switching `enabled` without `memory` re-reads ATS_TRACING_MEMORY."""
+        if enabled is not None:
+            self.enabled = enabled
+            if memory is None:
+                memory = os.getenv("ATS_TRACING_MEMORY", "0") == "1"
+        if memory is not None:
+            self.memory = memory and self.enabled
+            if self.memory and not tracemalloc.is_tracing():
+                tracemalloc.start()
+
+    def span(self, name, **labels):
+        if not self.enabled:
+            return _NOOP
+        return _Span(self, name, labels)
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(self, name, labels, wall, cpu, peak):
+        record = {"stage": name, "wall_s": wall, "cpu_s": cpu, "peak_bytes": peak,
+                  "thread": threading.get_ident(), **labels}
+        with self._lock:
+            self._count += 1
+            record["seq"] = self._count
+            total = self._totals.setdefault(name, {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "peak_bytes": 0, "docs": 0})
+            total["calls"] += 1
+            total["wall_s"] += wall
+            total["cpu_s"] += cpu
+            total["docs"] += labels.get("docs", 0)
+            if peak is not None:
+                total["peak_bytes"] = max(total["peak_bytes"], peak)
+            self._recent.append(record)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(record, default=str))
+
+    def record(self, name, wall_s, cpu_s, peak_bytes=None, **labels):
+        """Adds a measurement taken elsewhere (e.g. in a worker process) as if a span had run."""
+        if self.enabled:
+            self._record(name, labels, wall_s, cpu_s, peak_bytes)
+
+    # --- Reading ---
+    def mark(self):
+        """A position in the span log; pass it to spans_since() to get one run's spans."""
+        return self._count
+
+    def spans_since(self, mark, this_thread=False):
+        """`this_thread` keeps out spans from concurrent sessions/requests."""
+        thread = threading.get_ident()
+        with self._lock:
+            return [r for r in self._recent if r["seq"] > mark and (not this_thread or r["thread"] == thread)]
+
+    def summarize(self, spans):
+        """
+        Per-stage totals of a list of spans, in the order the stages first ran.
+        Stages recorded per document (a "file" label) also get their slowest
+        one as `slowest`: (file, wall seconds).
+        """
+        rows = {}
+        for s in spans:
+            row = rows.setdefault(s["stage"], {"stage": s["stage"], "calls": 0, "wall_s": 0.0, "cpu_s": 0.0,
+                                               "peak_bytes": None, "docs": 0, "slowest": None})
+            row["calls"] += 1
+            row["wall_s"] += s["wall_s"]
+            row["cpu_s"] += s["cpu_s"]
+            row["docs"] += s.get("docs", 0)
+            if s["peak_bytes"] is not None:
+                row["peak_bytes"] = max(row["peak_bytes"] or 0, s["peak_bytes"])
+            if "file" in s and (row["slowest"] is None or s["wall_s"] > row["slowest"][1]):
+                row["slowest"] = (s["file"], s["wall_s"])
+        return list(rows.values())
+
+    def prometheus_text(self):
+        """Totals per stage in the Prometheus text exposition format."""
+        with self._lock:
+            totals = {name: dict(t) for name, t in self._totals.items()}
+        metrics = [
+            ("ats_stage_calls_total", "counter", "Spans recorded per stage.", "calls"),
+            ("ats_stage_wall_seconds_total", "counter", "Wall time spent per stage.", "wall_s"),
+            ("ats_stage_cpu_seconds_total", "counter", "Process-wide CPU time (all threads, not worker processes) while each stage ran.", "cpu_s"),
+            ("ats_stage_documents_total", "counter", "Documents processed per stage.", "docs"),
+            ("ats_stage_peak_heap_bytes", "gauge", "Largest Python heap growth seen in one span.", "peak_bytes"),
+        ]
+        lines = []
+        for metric, kind, help_text, field in metrics:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for name, t in sorted(totals.items()):
+                lines.append(f'{metric}{{stage="{name}"}} {t[field]}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._totals.clear()
+            self._recent.clear()
+
+# The shared instance everything in the app should use
+tracer = Tracer()
@@ -0,0 +1,85 @@
+from types import SimpleNamespace
+
+from src.services.gemini_api import GeminiService
+from src.services.response_cache import ResponseCache
+
+SCORES = {"total_score": 0.7, "semantic_match": 0.8, "keyword_match": 0.6, "impact_score": 0.5}
+RESUME = "Backend developer. Built a billing service in Python, reducing latency by 30%."
+JD = "Looking for a Python backend engineer with AWS experience."
+
+
+class StubModels:
+    """Stands in for client.models: counts calls, answers with fixed token usage."""
+
+    def __init__(self):
+        self.calls = []
+
+    def generate_content(self, model, contents):
+        self.calls.append((model, contents))
+        return SimpleNamespace(
+            text=f"feedback #{len(self.calls)}",
+            usage_metadata=SimpleNamespace(prompt_token_count=100, candidates_token_count=20),
+        )
+
+
+def make_service(tmp_path, **kwargs):
+    client = SimpleNamespace(models=StubModels())
+    service = GeminiService(client=client, cache_path=str(tmp_path / "responses.sqlite"), **kwargs)
+    return service, client.models
+
+
+def test_injected_client_is_used(tmp_path):
+    service, models = make_service(tmp_path, use_cache=False)
+    text, usage = service.generate_feedback(SCORES, RESUME, JD, resume_skills=["Python"], jd_skills=["Python", "AWS"])
+    assert text == "feedback #1"
+    assert models.calls[0][0] == service.model_id
+    assert usage["input"] == 100 and usage["output"] == 20
+    assert usage["cached_input"] == 0
+
+
+def test_repeat_prompt_is_served_from_cache(tmp_path, monkeypatch):
+    monkeypatch.delenv("GEMINI_CACHE_PATH", raising=False)
+    service, models = make_service(tmp_path)
+    first = service.generate_feedback(SCORES, RESUME, JD, resume_skills=["Python"], jd_skills=["Python", "AWS"])
+    second = service.generate_feedback(SCORES, RESUME, JD, resume_skills=["Python"], jd_skills=["Python", "AWS"])
+
+    assert len(models.calls) == 1
+    assert second[0] == first[0]
+    assert second[1]["input"] == 0 and second[1]["cached_input"] == 100 and second[1]["cached_output"] == 20
+    report = service.usage_report()
+    assert report["input"] == 100 and report["cached_input"] == 100
+    assert report["cache"]["hits"] == 1
+
+
+def test_cache_survives_a_new_service(tmp_path, monkeypatch):
+    monkeypatch.delenv("GEMINI_CACHE_PATH", raising=False)
+    service, _ = make_service(tmp_path)
+    service.generate_feedback(SCORES, RESUME, JD, resume_skills=[], jd_skills=[])
+    fresh, models = make_service(tmp_path)
+    fresh.generate_feedback(SCORES, RESUME, JD, resume_skills=[], jd_skills=[])
+    assert models.calls == []
+
+
+def test_response_cache_key_ignores_whitespace():
+    assert ResponseCache.key("m", "a  b\n c") == ResponseCache.key("m", " a b c ")
+    assert ResponseCache.key("m", "a b") != ResponseCache.key("other", "a b")
+
+
+def test_response_cache_expires_entries(tmp_path):
+    cache = ResponseCache(str(tmp_path / "c.sqlite"), ttl_seconds=10)
+    cache.put("k", "m", "text", {"input": 5, "output": 1}, now=1000)
+    assert cache.get("k", now=1005) == ("text", {"input": 5, "output": 1})
+    assert cache.get("k", now=1011) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_response_cache_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(str(tmp_path / "c.sqlite"), max_entries=10)
+    for i in range(10):
+        cache.put(f"k{i}", "m", "text", {"input": 1, "output": 1}, now=1000 + i)
+    cache.get("k0", now=2000)  # k0 becomes the most recently used
+    cache.put("k10", "m", "text", {"input": 1, "output": 1}, now=2001)
+
+    assert cache.stats()["entries"] == 9
+    assert cache.get("k0", now=2002) is not None
+    assert cache.get("k1", now=2002) is None
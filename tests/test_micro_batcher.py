@@ -0,0 +1,49 @@
+import asyncio
+import threading
+
+import pytest
+
+from src.services.micro_batcher import MicroBatcher, Overloaded
+
+
+def test_concurrent_requests_are_batched():
+    sizes = []
+
+    def process(items):
+        sizes.append(len(items))
+        return [item * 2 for item in items]
+
+    async def run():
+        batcher = MicroBatcher(process, max_batch_size=8, max_wait_ms=50)
+        batcher.start()
+        try:
+            return await asyncio.gather(*(batcher.submit(i) for i in range(8)))
+        finally:
+            await batcher.stop()
+
+    assert asyncio.run(run()) == [i * 2 for i in range(8)]
+    assert sizes == [8]
+
+
+def test_stop_fails_queued_and_in_flight_requests():
+    release = threading.Event()
+
+    def process(items):
+        release.wait(5)
+        return items
+
+    async def run():
+        batcher = MicroBatcher(process, max_batch_size=1, max_wait_ms=0)
+        batcher.start()
+        requests = [asyncio.ensure_future(batcher.submit(i)) for i in range(3)]
+        await asyncio.sleep(0.05)  # the first request is in process(), the rest are queued
+        await asyncio.wait_for(batcher.stop(), 1)
+        release.set()
+        results = await asyncio.wait_for(asyncio.gather(*requests, return_exceptions=True), 1)
+        with pytest.raises(Overloaded):
+            await batcher.submit(3)
+        return results
+
+    results = asyncio.run(run())
+    assert len(results) == 3
+    assert all(isinstance(r, Overloaded) for r in results)
@@ -0,0 +1,81 @@
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from src.utils.parser import ResumeParser
+
+
+def make_parser(tmp_path, **kwargs):
+    return ResumeParser(cache_dir=str(tmp_path / "cache"), **kwargs)
+
+
+def test_missing_file_is_an_error_string(tmp_path):
+    missing = str(tmp_path / "missing.pdf")
+    for parser in (make_parser(tmp_path), make_parser(tmp_path, use_cache=False)):
+        assert parser.extract_text(missing).startswith("Error parsing PDF:")
+    assert make_parser(tmp_path).extract_text(missing, char_budget=100).startswith("Error parsing PDF:")
+
+
+def test_missing_file_does_not_abort_batch(tmp_path):
+    good = tmp_path / "good.txt"
+    good.write_text("Python developer")
+    parser = make_parser(tmp_path)
+
+    texts = parser.parse_batch([("missing.txt", str(tmp_path / "missing.txt")), ("good.txt", str(good))],
+                               max_workers=1)
+
+    assert texts[0].startswith("Error parsing TXT:")
+    assert texts[1] == "Python developer"
+    assert len(list(parser.cache._entries())) == 1
+
+
+def test_partial_pdf_failure_returns_only_the_error(tmp_path, monkeypatch):
+    def pages(self, source, failures=None):
+        yield "Page one\n"
+        failures.append("Error parsing PDF: broken xref")
+        yield "Error parsing PDF: broken xref"
+
+    monkeypatch.setattr(ResumeParser, "_iter_pdf_pages", pages)
+    parser = make_parser(tmp_path)
+
+    assert parser.extract_text(b"%PDF-1.4", "resume.pdf", char_budget=1000) == "Error parsing PDF: broken xref"
+    assert list(parser.cache._entries()) == []
+
+
+def test_parse_batch_reuses_its_pool(tmp_path):
+    docs = []
+    for i in range(3):
+        path = tmp_path / f"r{i}.txt"
+        path.write_text(f"Resume {i}")
+        docs.append((path.name, str(path)))
+    parser = make_parser(tmp_path, use_cache=False)
+    try:
+        assert parser.parse_batch(docs, max_workers=2) == ["Resume 0", "Resume 1", "Resume 2"]
+        pool = parser._pool
+        assert parser.parse_batch(docs, max_workers=2) == ["Resume 0", "Resume 1", "Resume 2"]
+        assert parser._pool is pool
+    finally:
+        parser.close()
+    assert parser._pool is None
+
+
+def test_parse_batch_falls_back_when_the_pool_breaks(tmp_path, monkeypatch):
+    class BrokenPool:
+        def submit(self, *args):
+            raise BrokenProcessPool()
+
+        def shutdown(self, wait=True, cancel_futures=False):
+            pass
+
+    path = tmp_path / "r.txt"
+    path.write_text("Python developer")
+    parser = make_parser(tmp_path, use_cache=False)
+    monkeypatch.setattr(parser, "_get_pool", lambda max_workers: BrokenPool())
+
+    assert parser.parse_batch([("r.txt", str(path)), ("r2.txt", str(path))], max_workers=2) == \
+        ["Python developer", "Python developer"]
+
+
+def test_pages_per_job_must_be_positive(tmp_path):
+    with pytest.raises(ValueError):
+        make_parser(tmp_path).parse_batch([("a.txt", b"text")], pages_per_job=0)
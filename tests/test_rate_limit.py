@@ -0,0 +1,129 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.services.gemini_api import GeminiService
+from src.services.rate_limit import AsyncTokenBucket
+
+SCORES = {"total_score": 0.7, "semantic_match": 0.8, "keyword_match": 0.6, "impact_score": 0.5}
+JD = "Looking for a Python backend engineer with AWS experience."
+
+
+class ApiError(Exception):
+    def __init__(self, code):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+class StubAsyncModels:
+    """client.aio.models: fails according to `failures[resume text]`, tracks concurrency."""
+
+    def __init__(self, failures=None, latency=0.01):
+        self.failures = dict(failures or {})
+        self.latency = latency
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def generate_content(self, model, contents):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            for marker, codes in self.failures.items():
+                if marker in contents and codes:
+                    raise ApiError(codes.pop(0))
+            return SimpleNamespace(
+                text="feedback",
+                usage_metadata=SimpleNamespace(prompt_token_count=50, candidates_token_count=10),
+            )
+        finally:
+            self.in_flight -= 1
+
+
+def make_service(models):
+    client = SimpleNamespace(models=None, aio=SimpleNamespace(models=models))
+    return GeminiService(client=client, use_cache=False)
+
+
+def generate(service, prompt, max_retries=4):
+    """_agenerate with millisecond backoff, so retries don't slow the suite."""
+    return asyncio.run(service._agenerate(prompt, {"tokens_saved": 0}, max_retries=max_retries, base_delay=0.001))
+
+
+def test_bucket_allows_burst_then_paces():
+    async def run():
+        bucket = AsyncTokenBucket(rate=20, capacity=5)
+        start = time.monotonic()
+        for _ in range(5):
+            await bucket.acquire()
+        burst = time.monotonic() - start
+        for _ in range(4):
+            await bucket.acquire()
+        return burst, time.monotonic() - start
+
+    burst, total = asyncio.run(run())
+    assert burst < 0.05
+    # 4 more tokens at 20/s take ~0.2s
+    assert 0.15 <= total < 0.5
+
+
+def test_retryable_errors_are_retried():
+    models = StubAsyncModels(failures={"Flaky": [429, 503]})
+    service = make_service(models)
+    text, usage = generate(service, "Flaky resume", max_retries=3)
+    assert text == "feedback" and usage["input"] == 50
+    assert models.calls == 3
+
+
+def test_non_retryable_errors_raise_immediately():
+    models = StubAsyncModels(failures={"Broken": [400]})
+    service = make_service(models)
+    with pytest.raises(ApiError):
+        generate(service, "Broken resume")
+    assert models.calls == 1
+
+
+def test_retries_give_up_after_max_retries():
+    models = StubAsyncModels(failures={"Down": [503] * 10})
+    service = make_service(models)
+    with pytest.raises(ApiError):
+        generate(service, "Down resume", max_retries=1)
+    assert models.calls == 2
+
+
+def test_feedback_batch_limits_concurrency_and_reports_failures():
+    models = StubAsyncModels(failures={"Broken": [400]})
+    service = make_service(models)
+    candidates = [{"name": f"c{i}", "text": f"Resume {i}", "scores": SCORES, "skills": []} for i in range(8)]
+    candidates.append({"name": "bad", "text": "Broken resume", "scores": SCORES, "skills": []})
+
+    async def collect():
+        return [item async for item in service.feedback_batch(
+            candidates, JD, jd_skills=[], max_concurrency=3, requests_per_minute=6000)]
+
+    results = {name: (text, usage) for name, text, usage in asyncio.run(collect())}
+    assert set(results) == {c["name"] for c in candidates}
+    assert models.max_in_flight <= 3
+    assert results["bad"][0].startswith("⚠️ Feedback Error")
+    assert results["bad"][1]["input"] == 0
+    assert all(results[f"c{i}"][0] == "feedback" for i in range(8))
+
+
+def test_feedback_batch_burst_stays_within_the_rate():
+    models = StubAsyncModels(latency=0)
+    service = make_service(models)
+    candidates = [{"name": f"c{i}", "text": f"Resume {i}", "scores": SCORES, "skills": []} for i in range(3)]
+
+    async def collect():
+        return [item async for item in service.feedback_batch(
+            candidates, JD, jd_skills=[], max_concurrency=8, requests_per_minute=120)]
+
+    start = time.monotonic()
+    asyncio.run(collect())
+    # 2 requests/s: a burst of 2, not max_concurrency, then the third waits ~0.5s
+    assert time.monotonic() - start >= 0.4
+    assert models.calls == 3
@@ -0,0 +1,22 @@
+from src.services.skill_matcher import SkillMatcher
+
+SKILLS = ["Python", "JavaScript", "Machine Learning", "Deep Learning", "Go", "React", "AWS"]
+ALIASES = {"JS": "JavaScript", "ML": "Machine Learning", "DL": "Deep Learning", "React.js": "React"}
+
+
+def make_matcher():
+    return SkillMatcher(SKILLS, ALIASES)
+
+
+def test_dotted_names_are_one_word():
+    matcher = make_matcher()
+    assert matcher.extract("Built with Node.js and Three.js") == []
+    assert matcher.extract("Frontend in React.js") == ["React"]
+    assert matcher.extract("Five years of JS. Then Python.") == ["JavaScript", "Python"]
+
+
+def test_ambiguous_short_forms_are_case_sensitive():
+    matcher = make_matcher()
+    assert matcher.extract("Add 5 ml of buffer, then go home") == []
+    assert matcher.extract("ML and DL research in Go") == ["Machine Learning", "Deep Learning", "Go"]
+    assert matcher.extract("deployed on aws") == ["AWS"]
@@ -0,0 +1,122 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.services.usage_store import UsageStore, LocalHub
+
+
+class FlakyHub(LocalHub):
+    """LocalHub whose next `fail_uploads` uploads raise, as a dropped connection would."""
+
+    def __init__(self, path, fail_uploads=0):
+        super().__init__(path)
+        self.fail_uploads = fail_uploads
+
+    def upload(self, counts):
+        if self.fail_uploads:
+            self.fail_uploads -= 1
+            raise ConnectionError("hub unreachable")
+        super().upload(counts)
+
+
+def test_increment_respects_limit_under_concurrency(tmp_path):
+    store = UsageStore(tmp_path / "usage.sqlite")
+    with ThreadPoolExecutor(16) as pool:
+        results = list(pool.map(lambda _: store.increment("racer@example.com", limit=2), range(16)))
+
+    assert sorted(r for r in results if r is not None) == [1, 2]
+    assert results.count(None) == 14
+    assert store.get("racer@example.com") == 2
+
+
+def test_concurrent_increments_are_all_counted(tmp_path):
+    store = UsageStore(tmp_path / "usage.sqlite", hub=LocalHub(tmp_path / "hub" / "usage.json"))
+
+    def spend(_):
+        for _ in range(25):
+            store.increment("busy@example.com")
+
+    threads = [threading.Thread(target=spend, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert store.sync() is True
+    assert store.hub.download() == {"busy@example.com": 200}
+    assert store.stats()["pending_users"] == 0
+
+
+def test_replicas_keep_each_others_increments(tmp_path):
+    hub = LocalHub(tmp_path / "hub" / "usage.json")
+    a = UsageStore(tmp_path / "a.sqlite", hub=hub)
+    b = UsageStore(tmp_path / "b.sqlite", hub=hub)
+    a.increment("shared@example.com")
+    b.increment("shared@example.com")
+    b.increment("only-b@example.com")
+
+    a.sync(), b.sync(), a.sync()
+
+    expected = {"shared@example.com": 2, "only-b@example.com": 1}
+    assert hub.download() == expected
+    assert a.all_counts() == expected
+    assert b.all_counts() == expected
+
+
+def test_increments_during_sync_stay_pending(tmp_path):
+    hub = LocalHub(tmp_path / "hub" / "usage.json")
+    store = UsageStore(tmp_path / "usage.sqlite", hub=hub)
+    store.increment("user@example.com")
+
+    download = hub.download
+
+    def download_then_increment():
+        counts = download()
+        store.increment("user@example.com")  # lands between the snapshot and the upsert
+        return counts
+
+    hub.download = download_then_increment
+    store.sync()
+    hub.download = download
+
+    assert hub.download() == {"user@example.com": 1}
+    assert store.get("user@example.com") == 2
+    assert store.stats()["pending_users"] == 1
+    store.sync()
+    assert hub.download() == {"user@example.com": 2}
+
+
+def test_failed_sync_is_retried(tmp_path):
+    hub = FlakyHub(tmp_path / "hub" / "usage.json", fail_uploads=1)
+    store = UsageStore(tmp_path / "usage.sqlite", hub=hub)
+    store.increment("user@example.com", n=3)
+
+    assert store.sync() is False
+    assert store.stats()["sync_errors"] == 1
+    assert store.stats()["pending_users"] == 1
+    assert hub.download() == {}
+
+    assert store.sync() is True
+    assert hub.download() == {"user@example.com": 3}
+    assert store.all_counts() == {"user@example.com": 3}
+    assert store.stats()["pending_users"] == 0
+
+
+def test_sync_without_increments_does_not_upload(tmp_path):
+    hub = LocalHub(tmp_path / "hub" / "usage.json")
+    hub.upload({"other@example.com": 4})
+    store = UsageStore(tmp_path / "usage.sqlite", hub=hub)
+
+    assert store.sync() is False
+    assert hub.uploads == 1
+    assert store.get("other@example.com") == 4
+
+
+def test_get_is_cached_for_ttl(tmp_path):
+    store = UsageStore(tmp_path / "usage.sqlite", cache_ttl=5.0)
+    store.increment("user@example.com")
+
+    # A second process writing the same SQLite file isn't seen until the entry expires
+    UsageStore(tmp_path / "usage.sqlite").increment("user@example.com")
+    assert store.get("user@example.com", now=store._cache["user@example.com"][1] - 1) == 1
+    assert store.get("user@example.com", now=store._cache["user@example.com"][1] + 1) == 2
+    assert store.cache_hits == 1 and store.cache_misses == 1